@@ -2,26 +2,239 @@ import streamlit as st
 import pandas as pd
 import zipfile
 import tempfile
-from tratamiento_inei.proce_victimización_inseguridad_inei import cargar_y_procesar_datos_victimizacion
-from tratamiento_inei.proce_percepcion_inseguridad_inei import cargar_y_procesar_datos_percepcion
-from tratamiento_inei.proce_confianza_instituciones_inei import cargar_y_procesar_datos_confianza
+from tratamiento_inei.lectura_enapres import leer_csv_lima_por_bloques, buscar_csv_enapres, COLUMNAS_REQUERIDAS
+from tratamiento_inei.pipeline_inei import procesar_encuesta
+from tratamiento_inei.ejecucion_paralela import PARALELO_DISPONIBLE
+from tratamiento_inei.serie_anual import detectar_anio, registrar_anio, anios_registrados, serie_temporal, variacion_interanual
 import plotly.express as px
-import json
+from tratamiento_redes.acumulado_redes import metricas_acumuladas, version_acumulado
+from utils.comparacion_fuentes import comparar_fuentes
 from utils.geo_processing import cargar_y_preparar_datos
+from utils.mapas import crear_mapa
+from utils.cache_resultados import clave_resultados, huella_miembro_zip, huella_subida, cargar_resultados, guardar_resultados
+from utils.almacen_resultados import registrar_resultado
+from utils.subidas import archivo_en_disco
+from utils.tabla_paginada import FILAS_POR_PAGINA, VistaPaginada
 from st_aggrid import AgGrid
+from streamlit.runtime.uploaded_file_manager import UploadedFile
+
+
+# ================================
+# TABLAS PAGINADAS (fragmento)
+# ================================
+# Solo la página visible viaja al navegador; filtrar, ordenar o cambiar de
+# página vuelve a ejecutar solo esta tabla. `origen` identifica el contenido
+# de la tabla (p. ej. clave del resultado y nombre de la tabla): las copias que
+# se reciben en cada rerun cambian, el origen no.
+@st.fragment
+def tabla_paginada(df, clave, origen, filas_por_pagina=FILAS_POR_PAGINA, decimales=None):
+    if len(df) <= filas_por_pagina:
+        st.dataframe(df if decimales is None else df.round(decimales), hide_index=True)
+        return
+
+    # Filtro y orden en caché por sesión mientras el origen de la tabla sea el mismo
+    origen_vista, vista = st.session_state.get(f"_vista_{clave}", (None, None))
+    if vista is None or origen_vista != origen:
+        vista = VistaPaginada(df)
+        st.session_state[f"_vista_{clave}"] = (origen, vista)
+
+    col_filtro, col_orden, col_sentido = st.columns([2, 2, 1])
+    filtro = col_filtro.text_input("🔎 Filtrar", key=f"{clave}_filtro")
+    columna = col_orden.selectbox(
+        "Ordenar por", [None] + list(df.columns), key=f"{clave}_orden",
+        format_func=lambda c: "(orden original)" if c is None else str(c)
+    )
+    ascendente = col_sentido.radio("Sentido", ["↑", "↓"], horizontal=True, key=f"{clave}_sentido") == "↑"
+
+    total = len(vista.posiciones(filtro, columna, ascendente))
+    paginas = max(1, -(-total // filas_por_pagina))
+    # Si el filtro dejó menos páginas, se vuelve a la última disponible
+    if st.session_state.get(f"{clave}_pagina", 1) > paginas:
+        st.session_state[f"{clave}_pagina"] = paginas
+    pagina = st.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas,
+                             step=1, key=f"{clave}_pagina")
+
+    filas, total = vista.pagina(pagina, filas_por_pagina, filtro, columna, ascendente)
+    st.dataframe(filas if decimales is None else filas.round(decimales), hide_index=True)
+    inicio = (pagina - 1) * filas_por_pagina
+    st.caption(f"Filas {min(inicio + 1, total):,}–{inicio + len(filas):,} de {total:,}")
+
+
+# ================================
+# COMPARACIÓN ENTRE FUENTES (en caché)
+# ================================
+# La clave son las tablas de métricas (sin geometría): pocas filas, hash barato
+@st.cache_data
+def comparar_cargadas(tablas, metricas):
+    return comparar_fuentes(tablas, list(metricas))
+
+
+# ================================
+# PANEL DE INDICADORES (fragmento)
+# ================================
+# Cambiar el indicador vuelve a ejecutar solo esta función: las subidas, las
+# vistas previas y las geometrías de page_2 no se recalculan.
+@st.fragment
+def panel_indicadores(fuentes_cargadas, gdfs):
+    n = len(fuentes_cargadas)
+
+    # ================================
+    # SELECCIÓN DE MÉTRICA
+    # ================================
+    metric_options = [
+        "Victimizacion_total_%", 
+        "Inseguridad_general_%", 
+        "Indice_confianza_PNP_%"
+    ]
+
+    metric = st.selectbox("📊 Selecciona el indicador:", metric_options)
+
+    # ================================
+    # SERIE HISTÓRICA INEI (agregados guardados por año)
+    # ================================
+    anios_serie = anios_registrados()
+    if len(anios_serie) >= 2:
+        st.markdown("## 📅 Serie histórica INEI")
+        st.caption(f"Años registrados: {', '.join(map(str, anios_serie))}")
+
+        col_serie, col_variacion = st.columns(2)
+        with col_serie:
+            st.markdown(f"### {metric} por año")
+            st.dataframe(serie_temporal(metric).round(1), use_container_width=True)
+        with col_variacion:
+            st.markdown("### Variación interanual (puntos porcentuales)")
+            variacion = variacion_interanual(metric).dropna(subset=["VARIACION_PP"])
+            st.dataframe(
+                variacion.sort_values("VARIACION_PP", ascending=False).round(1),
+                use_container_width=True, hide_index=True
+            )
+
+    # ================================
+    # CASO 1 → Análisis individual
+    # ================================
+    if n == 1:
+        nombre, f = next(iter(fuentes_cargadas.items()))
+
+        st.subheader(f"🗺️ Mapa – {nombre}")
+        st.plotly_chart(crear_mapa(gdfs[nombre], metric, f["tag"]), use_container_width=True)
+
+        # Seleccionar los datos del dataframe
+        df = f["data"]
+        # Filtrar el indicador seleccionado
+        selected_data = df[["NOMBREDI", metric]].sort_values(by=metric, ascending=False)
+
+        # Mostrar las primeras 10 filas
+        top_distritos = selected_data.head(10)
+
+        # Crear gráfico de barras
+        fig_barras = px.bar(
+            top_distritos, 
+            x="NOMBREDI", 
+            y=metric, 
+            title=f"Top 10 distritos con mayor {metric}",
+            labels={metric: f"{metric} (%)", "NOMBREDI": "Distrito"},
+            color=metric, 
+            color_continuous_scale="Viridis"
+        )
+
+        # Mostrar el gráfico de barras
+        st.plotly_chart(fig_barras, use_container_width=True)
+
+        # Agrupar por distrito y obtener la suma del indicador seleccionado
+        pie_data = df.groupby("NOMBREDI")[metric].sum().reset_index()
+
+        # Crear gráfico de pie
+        fig_pie = px.pie(
+            pie_data, 
+            names="NOMBREDI", 
+            values=metric, 
+            title=f"Distribución de {metric} por distrito",
+            color="NOMBREDI",
+            color_discrete_sequence=px.colors.qualitative.Set3
+        )
+
+        # Mostrar el gráfico de pie
+        st.plotly_chart(fig_pie, use_container_width=True)
+        return
+
+
+    # ================================
+    # CASO 2 O 3 → Comparaciones
+    # ================================
+    # 1. MAPAS EN COLUMNAS (dinámico)
+    st.markdown("## 🗺️ Comparación de Mapas por Fuente")
+
+    cols = st.columns(n)
+
+    for idx, (nombre, f) in enumerate(fuentes_cargadas.items()):
+        with cols[idx]:
+            st.subheader(f"Mapa – {nombre}")
+            st.plotly_chart(
+                crear_mapa(gdfs[nombre], metric, f["tag"], paneles=n),
+                use_container_width=True
+            )
+
+
+    # 2. GRÁFICO COMPARATIVO
+    st.markdown("---")
+    st.markdown("## 📈 Comparación de Valores por Distrito")
+
+    # Fuentes alineadas por UBIGEO (unión externa) y estadísticas de todas las
+    # métricas, en caché: cambiar de indicador no vuelve a calcular nada
+    comparacion = comparar_cargadas(
+        {nombre: pd.DataFrame(gdf.drop(columns="geometry")) for nombre, gdf in gdfs.items()},
+        tuple(metric_options),
+    )
+    fuentes = list(fuentes_cargadas)
+    valores = comparacion.valores_metrica(metric).dropna(subset=fuentes, how="all")
+
+    faltantes = {f: k for f, k in comparacion.faltantes(metric).items() if k}
+    if faltantes:
+        st.caption("Distritos sin dato en alguna fuente (se muestran igual): "
+                   + ", ".join(f"{f}: {k}" for f, k in faltantes.items()))
+
+    fig = px.bar(
+        valores,
+        x="NOMBDIST",
+        y=fuentes,
+        barmode="group",
+        title="Comparación entre fuentes de datos",
+        labels={"NOMBDIST": "Distrito", "value": f"{metric} (%)", "variable": "Fuente"}
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    # 3. ACUERDO ENTRE FUENTES
+    st.markdown("### 🤝 Acuerdo entre fuentes")
+    acuerdo = comparacion.acuerdo[comparacion.acuerdo["METRICA"] == metric].drop(columns="METRICA")
+    st.dataframe(acuerdo.round(3), use_container_width=True, hide_index=True)
+
+    st.markdown(f"### ↕️ Diferencias por distrito respecto de {comparacion.referencia}")
+    diferencias = comparacion.diferencias[comparacion.diferencias["METRICA"] == metric].drop(columns="METRICA")
+    st.dataframe(
+        diferencias.sort_values("DELTA", key=abs, ascending=False).round(1),
+        use_container_width=True, hide_index=True
+    )
+
 
 def page_2():
-        # Recuperar los datos desde el session_state
-    df_final = st.session_state.get("df_final", None)
-    df_completo = st.session_state.get("df_completo", None)
+    # Recuperar los datos del almacén compartido con el manejador de la sesión
+    resultado = st.session_state.get("resultado", None)
+    tablas = (resultado.tablas() if resultado is not None else None) or {}
+    df_final = tablas.get("df_final")
+    df_completo = tablas.get("df_completo")
 
     if df_final is not None:
         st.write("Datos finales procesados (principal):")
-        st.dataframe(df_final)
+        tabla_paginada(df_final, "df_final", (resultado.clave, "df_final"))
 
     if df_completo is not None:
         st.write("Datos completos procesados:")
-        st.dataframe(df_completo)
+        tabla_paginada(df_completo, "df_completo", (resultado.clave, "df_completo"))
+
+    df_precision = tablas.get("df_precision")
+    if df_precision is not None and not df_precision.empty:
+        st.write("Precisión de las estimaciones (error estándar e IC 95%, en puntos porcentuales):")
+        tabla_paginada(df_precision, "df_precision", (resultado.clave, "df_precision"), decimales=2)
 
 
     # ================================
@@ -109,9 +322,9 @@ def page_2():
     # ================================
     # ENCABEZADO PRINCIPAL
     # ================================
-    st.markdown("""
+    st.markdown(f"""
     <div style='text-align:center; margin-bottom: 2rem;'>
-        <h1>Mapa de Percepción Ciudadana 2024</h1>
+        <h1>Mapa de Percepción Ciudadana {st.session_state.get("anio", 2024)}</h1>
         <h4 style='color:#555; margin-top:-10px;'>Comparación entre datos oficiales y datos de redes sociales</h4>
     </div>
     """, unsafe_allow_html=True)
@@ -120,7 +333,8 @@ def page_2():
     # ================================
     # 1. CARGA DE DATOS
     # ================================
-    @st.cache_data
+    # Las subidas se identifican por su huella (id, nombre, tamaño), sin recorrer sus bytes
+    @st.cache_data(hash_funcs={UploadedFile: huella_subida})
     def load_data(uploaded_file):
         if uploaded_file:
             # 1. Cargar el DataFrame
@@ -146,6 +360,15 @@ def page_2():
                     
             return df
         return None
+    # Acumulado de redes en disco (tratamiento_redes.acumulado_redes): se usa si no
+    # se sube un CSV de la fuente; `version` cambia al sumar un lote e invalida la caché
+    @st.cache_data
+    def load_acumulado(fuente, version):
+        if version is None:
+            return None
+        df = metricas_acumuladas(fuente)
+        return df.round(1) if not df.empty else None
+
     st.sidebar.header("📂 Subir Archivos)")
 
     official_file = st.sidebar.file_uploader("📘 Datos Oficiales (CSV)", type=["csv"])
@@ -156,6 +379,23 @@ def page_2():
     youtube_data = load_data(youtube_file)
     twitter_data = load_data(twitter_file)
 
+    # Origen de cada tabla (subida o versión del acumulado), para las vistas paginadas
+    official_origen, youtube_origen, twitter_origen = (
+        huella_subida(archivo) if archivo is not None else None
+        for archivo in (official_file, youtube_file, twitter_file)
+    )
+
+    if youtube_data is None:
+        youtube_origen = ("acumulado", "youtube", version_acumulado("youtube"))
+        youtube_data = load_acumulado("youtube", youtube_origen[2])
+        if youtube_data is not None:
+            st.sidebar.caption("📺 YouTube: usando el acumulado de comentarios procesados.")
+    if twitter_data is None:
+        twitter_origen = ("acumulado", "twitter", version_acumulado("twitter"))
+        twitter_data = load_acumulado("twitter", twitter_origen[2])
+        if twitter_data is not None:
+            st.sidebar.caption("🐦 Twitter: usando el acumulado de comentarios procesados.")
+
     # ================================
     # MOSTRAR DATAFRAMES EN COLUMNAS
     # ================================
@@ -165,13 +405,13 @@ def page_2():
     dfs_to_show = []
 
     if official_data is not None:
-        dfs_to_show.append(("📘 Datos oficiales", official_data))
+        dfs_to_show.append(("📘 Datos oficiales", official_data, official_origen))
 
     if youtube_data is not None:
-        dfs_to_show.append(("📺 YouTube", youtube_data))
+        dfs_to_show.append(("📺 YouTube", youtube_data, youtube_origen))
 
     if twitter_data is not None:
-        dfs_to_show.append(("🐦 Twitter", twitter_data))
+        dfs_to_show.append(("🐦 Twitter", twitter_data, twitter_origen))
 
     if len(dfs_to_show) > 0:
         st.markdown("## 📊 Vista previa de datos cargados")
@@ -179,86 +419,28 @@ def page_2():
         # Crear columnas de manera dinámica
         cols = st.columns(len(dfs_to_show))
 
-        for idx, (title, df) in enumerate(dfs_to_show):
+        for idx, (title, df, origen) in enumerate(dfs_to_show):
             with cols[idx]:
                 # Título de la tabla
                 st.markdown(f"### {title}", unsafe_allow_html=True)  
                 
-                # Mostrar la tabla con un tamaño fijo y barras de desplazamiento si es necesario
-                AgGrid(df, height=300, fit_columns_on_grid_load=True, enable_enterprise_modules=True)
+                # Mostrar la tabla con un tamaño fijo y barras de desplazamiento si es necesario;
+                # las tablas grandes se paginan en el servidor en vez de enviarse completas
+                if len(df) > FILAS_POR_PAGINA:
+                    tabla_paginada(df, f"vista_{idx}", origen)
+                else:
+                    AgGrid(df, height=300, fit_columns_on_grid_load=True, enable_enterprise_modules=True)
                 
                 # Ajustar el diseño de la tabla
                 st.markdown("<br>", unsafe_allow_html=True)
 
 
-    # ================================
-    # 2. SELECCIÓN DE MÉTRICA
-    # ================================
-    metric_options = [
-        "Victimizacion_total_%", 
-        "Inseguridad_general_%", 
-        "Indice_confianza_PNP_%"
-    ]
-
-    metric = st.sidebar.selectbox("📊 Selecciona el indicador:", metric_options)
-
-    @st.cache_data
+    @st.cache_data(hash_funcs={UploadedFile: huella_subida})
     def load_gdf(file):
         return cargar_y_preparar_datos(file)
 
     # ================================
-    # 3. LIMPIEZA DE GEOMETRÍAS
-    # ================================
-    # Verificar que el archivo de datos oficiales y de redes sociales esté cargado correctamente
-    if official_data is not None:
-        official_file.seek(0)
-        gdfm_official = load_gdf(official_file).dropna(subset=["geometry"])
-
-    if youtube_data is not None:
-        youtube_file.seek(0)
-        gdfm_youtube = load_gdf(youtube_file).dropna(subset=["geometry"])
-
-    if twitter_data is not None:
-        twitter_file.seek(0)
-        gdfm_twitter = load_gdf(twitter_file).dropna(subset=["geometry"])
-    # ================================
-    # 4. FUNCIONES DE MAPAS Y GRAFICOS
-    # ================================
-    def crear_mapa(gdf, metric, data_source):
-        geojson = json.loads(gdf.to_json())
-        
-        # Colores específicos según la fuente de datos
-        if data_source == "youtube":
-            color_scale = "reds"  # Color rojo para YouTube
-        elif data_source == "twitter":
-            color_scale = "blues"  # Color azul para Twitter
-        else:  # INEI
-            color_scale = "Viridis"  # Color por defecto para INEI
-        
-        fig = px.choropleth_mapbox(
-            gdf,
-            geojson=geojson,
-            locations=gdf.index,
-            color=metric,
-            color_continuous_scale=color_scale,  # Asignar color específico
-            mapbox_style="carto-positron",
-            center={"lat": -12.0464, "lon": -77.0428},
-            zoom=10,
-            opacity=0.70,
-        )
-        fig.update_layout(
-            height=650,
-            margin={"r": 0, "t": 5, "l": 0, "b": 0},
-            coloraxis_colorbar=dict(
-                title=metric,
-                thickness=14,
-                len=0.55
-            )
-        )
-        return fig
-
-    # ================================
-    # 5. LÓGICA GENERAL DE ANÁLISIS
+    # 2. LÓGICA GENERAL DE ANÁLISIS
     # ================================
 
     # Diccionario de datos cargados
@@ -295,14 +477,8 @@ def page_2():
         st.warning("📂 Sube al menos un archivo para comenzar el análisis.")
         st.stop()
 
-
-    # ================================
-    # CASO 1 → Análisis individual
-    # ================================
     if n == 1:
-
-        nombre, f = list(fuentes_cargadas.items())[0]
-
+        nombre = next(iter(fuentes_cargadas))
         st.info(f"🔍 Solo se cargó **{nombre}**.")
         continuar = st.sidebar.radio(
             f"¿Deseas analizar únicamente la fuente **{nombre}**?",
@@ -311,108 +487,22 @@ def page_2():
 
         if continuar == "No":
             st.stop()
-
-        f["file"].seek(0)
-        gdf = load_gdf(f["file"]).dropna(subset=["geometry"])
-
-        st.subheader(f"🗺️ Mapa – {nombre}")
-        st.plotly_chart(crear_mapa(gdf, metric, f["tag"]), use_container_width=True)
-
-        # Seleccionar los datos del dataframe
-        df = f["data"]
-        # Filtrar el indicador seleccionado
-        selected_data = df[["NOMBREDI", metric]].sort_values(by=metric, ascending=False)
-
-        # Mostrar las primeras 10 filas
-        top_distritos = selected_data.head(10)
-
-        # Crear gráfico de barras
-        fig_barras = px.bar(
-            top_distritos, 
-            x="NOMBREDI", 
-            y=metric, 
-            title=f"Top 10 distritos con mayor {metric}",
-            labels={metric: f"{metric} (%)", "NOMBREDI": "Distrito"},
-            color=metric, 
-            color_continuous_scale="Viridis"
-        )
-
-        # Mostrar el gráfico de barras
-        st.plotly_chart(fig_barras, use_container_width=True)
-
-        # Agrupar por distrito y obtener la suma del indicador seleccionado
-        pie_data = df.groupby("NOMBREDI")[metric].sum().reset_index()
-
-        # Crear gráfico de pie
-        fig_pie = px.pie(
-            pie_data, 
-            names="NOMBREDI", 
-            values=metric, 
-            title=f"Distribución de {metric} por distrito",
-            color="NOMBREDI",
-            color_discrete_sequence=px.colors.qualitative.Set3
-        )
-
-        # Mostrar el gráfico de pie
-        st.plotly_chart(fig_pie, use_container_width=True)
-
-        st.stop()
-
+    else:
+        st.success("📊 Archivos cargados correctamente. Análisis comparativo activado.")
 
     # ================================
-    # CASO 2 O 3 → Comparaciones
+    # 3. GEOMETRÍAS (una vez por fuente)
     # ================================
-    st.success("📊 Archivos cargados correctamente. Análisis comparativo activado.")
-
-    # Convertir todos los archivos subidos en geodataframes
     gdfs = {}
     for nombre, f in fuentes_cargadas.items():
-        f["file"].seek(0)
-        gdfs[nombre] = load_gdf(f["file"]).dropna(subset=["geometry"])
+        # Sin CSV subido, la fuente viene del acumulado de redes (un DataFrame)
+        entrada = f["file"] if f["file"] is not None else f["data"]
+        if hasattr(entrada, "seek"):
+            entrada.seek(0)
+        gdfs[nombre] = load_gdf(entrada).dropna(subset=["geometry"])
 
-
-    # ================================
-    # 1. MAPAS EN COLUMNAS (dinámico)
-    # ================================
-    st.markdown("## 🗺️ Comparación de Mapas por Fuente")
-
-    cols = st.columns(n)
-
-    for idx, (nombre, f) in enumerate(fuentes_cargadas.items()):
-        with cols[idx]:
-            st.subheader(f"Mapa – {nombre}")
-            st.plotly_chart(
-                crear_mapa(gdfs[nombre], metric, f["tag"]),
-                use_container_width=True
-            )
-
-
-    # ================================
-    # 2. GRÁFICO COMPARATIVO (si >= 2 fuentes)
-    # ================================
-    if n >= 2:
-        st.markdown("---")
-        st.markdown("## 📈 Comparación de Valores por Distrito")
-
-        # Unir todas las fuentes por distrito
-        merged = None
-
-        for nombre, f in fuentes_cargadas.items():
-            df = f["data"][["NOMBREDI", metric]].rename(
-                columns={metric: f"{metric}_{nombre}"}
-            )
-            if merged is None:
-                merged = df
-            else:
-                merged = pd.merge(merged, df, on="NOMBREDI")
-
-        fig = px.bar(
-            merged,
-            x="NOMBREDI",
-            y=[col for col in merged.columns if col != "NOMBREDI"],
-            title="Comparación entre fuentes de datos"
-        )
-        st.plotly_chart(fig, use_container_width=True)
+    # Mapas y gráficos: se vuelven a dibujar solos al cambiar de indicador
+    panel_indicadores(fuentes_cargadas, gdfs)
 
     # ================================
     # FOOTER EN SIDEBAR
@@ -447,142 +537,82 @@ if st.session_state.step == 1:
 
     # Verificar si se ha cargado un archivo
     if uploaded_file is not None:
-        with zipfile.ZipFile(uploaded_file, 'r') as zip_ref:
+        # El ZIP se vuelca a disco una vez y sus miembros se leen en flujo desde ahí
+        with zipfile.ZipFile(archivo_en_disco(uploaded_file), 'r') as zip_ref:
             # Listar los archivos dentro del ZIP
             file_list = zip_ref.namelist()
             st.write("Archivos dentro del ZIP:", file_list)
 
-            # Buscar la carpeta dentro del ZIP (en este caso, cualquier carpeta dentro)
-            folder_name = None
-            for file in file_list:
-                if file.endswith("/"):  # Carpeta
-                    folder_name = file
-                    break
-
-            if folder_name:
-                # Buscar el archivo CSV dentro de esa carpeta
-                csv_file = None
-                for file in file_list:
-                    if file.startswith(folder_name) and file.endswith(".csv"):
-                        csv_file = file
-                        break
-
-                if csv_file:
-                    # Extraer el archivo CSV desde el ZIP y leerlo en un DataFrame
-                    with zip_ref.open(csv_file) as f:
-                        columnas_geografia = [
-                            "NOMBREDD", "NOMBREPP", "NOMBREDI",
-                            "CCDD", "CCPP", "CCDI"
-                        ]
-
-                        columnas_peso = [
-                            "FACTOR"
-                        ]
-
-                        columnas_confianza_declarada = [
-                            "P608_1", "P608_2", "P608_3", "P608_4"
-                        ]
-
-                        columnas_desempeno = [
-                            "P612_1", "P612_2", "P612_3", "P612_4", "P613"
-                        ]
-
-                        columnas_presencia_existencia = [
-                            "P642_1", "P642_2", "P642_3"
-                        ]
-
-                        columnas_presencia_calidad = [
-                            "P643_1", "P643_2", "P643_3"
-                        ]
-
-                        columnas_presencia_meses = [
-                            "P644_1", "P644_2", "P644_3"
-                        ]
-
-                        columnas_expectativa = [
-                            f"P601_{i}" for i in range(1, 17)  # por seguridad, capturamos P601_1 hasta P601_19
-                        ]
-
-                        columnas_inseguridad_directa = [
-                            "P602",  # inseguridad en barrio
-                            "P604",  # inseguridad de noche
-                            "P605"   # inseguridad de día
-                        ]	
-
-                        columnas_lugares = [
-                            f"P606_{i}" for i in range(1, 11)   # por seguridad, P606_1 a P606_39
-                        ]
-
-
-                        # 3) Columnas P615 (bandera: fue víctima 1=Sí 2=No)
-                        # (capturamos un rango amplio para seguridad)
-                        # --------------------------
-                        columnas_p615 = ['P615_1', 'P615_2', 'P615_3', 'P615_4', 'P615_5', 
-                        'P615_6', 'P615_7', 'P615_8', 'P615_9', 'P615_10', 'P615_11', 'P615_12', 
-                        'P615_13', 'P615_14', 'P615_15', 'P615_16', 'P615_17', 'P615_18', 'P615_19', 
-                        'P615_20', 'P615_21', 'P615_22', 'P615_23', 'P615_24', 'P615_25', 'P615_26', 'P615_27', 'P615_28']
-
-
-                        # --------------------------
-                        # 4) Columnas P616 (conteo: nº de veces)
-                        # (mismo rango amplio)
-                        # --------------------------
-                        columnas_p616 = ['P616_1', 'P616_2', 'P616_3', 'P616_4', 'P616_5', 
-                        'P616_6', 'P616_7', 'P616_8', 'P616_9', 'P616_10', 'P616_11', 'P616_12', 
-                        'P616_13', 'P616_14', 'P616_15', 'P616_16', 'P616_17', 'P616_18', 
-                        'P616_19', 'P616_20', 'P616_21', 'P616_22', 'P616_23', 'P616_24', 
-                        'P616_25', 'P616_26', 'P616_27', 'P616_28']
-
-
-                        columnas_requeridas = (
-                            columnas_geografia
-                            + columnas_peso
-                            + columnas_confianza_declarada
-                            + columnas_desempeno
-                            + columnas_presencia_existencia
-                            + columnas_presencia_calidad
-                            + columnas_presencia_meses
-                            + columnas_expectativa
-                            + columnas_inseguridad_directa
-                            + columnas_lugares
-                            +columnas_p615
-                            +columnas_p616)
-
-
-                        df = pd.read_csv(
-                            f,
-                            usecols=columnas_requeridas,   # SOLO las que necesitas
-                            low_memory=False
-                        )
-
-                    # Botón para procesar el CSV
-                    if st.button("Procesar Datos"):
-                        # Procesar los datos
-                        dist_total_victimizacion, dist_segmentado_victimizacion = cargar_y_procesar_datos_victimizacion(df)
-                        dist_percepcion, dist_segmentado_percepcion = cargar_y_procesar_datos_percepcion(df)
-                        distritos_confianza = cargar_y_procesar_datos_confianza(df)
-
-                        # Extraer solo las columnas necesarias de cada DataFrame
-                        vict_total_df = dist_total_victimizacion[["NOMBREDI", "Victimizacion_total_%"]]
-                        inseguridad_general_df = dist_segmentado_percepcion[["NOMBREDI", "Inseguridad_general_%"]]
-                        confianza_df = distritos_confianza[["NOMBREDI", "Indice_confianza_PNP_%"]]
-
-                        # Crear un DataFrame final con las tres métricas clave
-                        df_final = pd.merge(vict_total_df, inseguridad_general_df, on="NOMBREDI", how="left")
-                        df_final = pd.merge(df_final, confianza_df, on="NOMBREDI", how="left")
-                        st.success("Datos procesados exitosamente. Puedes ir a la página de visualización para ver los resultados.")
-
-                        # Crear df_completo con todos los datos procesados
-                        df_completo = pd.merge(dist_segmentado_victimizacion, dist_segmentado_percepcion, on="NOMBREDI", how="left")
-                        df_completo = pd.merge(df_completo, distritos_confianza, on="NOMBREDI", how="left")
-
-                        # Guardar los datos procesados en session_state
-                        st.session_state.df_final = df_final
-                        st.session_state.df_completo = df_completo
-
-                        # Botón para redirigir a la página de visualización (usando `st.session_state`)
-                        st.button("Ir a la página de visualización", on_click=lambda: st.session_state.update({'step': 2}))
-                        
+            # Buscar el CSV del módulo (primer CSV dentro de la carpeta del ZIP)
+            csv_file = buscar_csv_enapres(file_list)
+
+            if csv_file:
+                # Huella barata del CSV (entrada del ZIP) + versión del código de procesamiento
+                clave = clave_resultados(huella_miembro_zip(zip_ref, csv_file))
+
+                # Año de la encuesta (para la serie histórica); se propone el del nombre del
+                # ZIP y, si no lo trae (o está fuera del rango admitido), hay que escribirlo
+                anio_min, anio_max = 2010, 2100
+                anio_detectado = detectar_anio(uploaded_file.name)
+                if anio_detectado is not None and not anio_min <= anio_detectado <= anio_max:
+                    anio_detectado = None
+                anio = st.number_input(
+                    "Año de la encuesta",
+                    min_value=anio_min, max_value=anio_max, step=1,
+                    value=anio_detectado,
+                    placeholder="No se encontró el año en el nombre del ZIP",
+                )
+                if anio is None:
+                    st.warning("Indica el año de la encuesta para poder procesarla.")
+
+                # Un año ya guardado en la serie solo se reemplaza con confirmación
+                ya_registrado = anio is not None and int(anio) in anios_registrados()
+                reemplazar = False
+                if ya_registrado:
+                    reemplazar = st.checkbox(
+                        f"El año {int(anio)} ya está en la serie histórica: reemplazar sus resultados"
+                    )
+
+                # Botón para procesar el CSV
+                if st.button("Procesar Datos", disabled=anio is None):
+                    def calcular():
+                        # Si este mismo archivo ya se procesó, se carga desde la caché en disco
+                        tablas = cargar_resultados(clave)
+
+                        if tablas is None:
+                            # Extraer el archivo CSV desde el ZIP y leerlo en un DataFrame
+                            with zip_ref.open(csv_file) as f:
+                                # Lectura por bloques: cada bloque se filtra a Lima Metropolitana
+                                # apenas se lee, así la memoria depende del tamaño del bloque
+                                df = leer_csv_lima_por_bloques(
+                                    f,
+                                    columnas=COLUMNAS_REQUERIDAS   # SOLO las que necesitas
+                                )
+
+                            # Preparar la encuesta una sola vez y ejecutar los tres procesadores
+                            # (a la vez, en procesos separados, si hay más de un núcleo)
+                            tablas = procesar_encuesta(df, paralelo=PARALELO_DISPONIBLE)
+                            guardar_resultados(clave, tablas)
+                        return tablas
+
+                    # Almacén compartido entre sesiones: si otra sesión ya procesó (o está
+                    # procesando) el mismo archivo, se reutiliza ese resultado
+                    resultado, tablas = registrar_resultado(clave, calcular)
+
+                    # Agregados del año para la serie histórica (sin volver a leer microdatos)
+                    registrar_anio(anio, tablas, reemplazar=reemplazar)
+                    st.session_state.anio = int(anio)
+                    if ya_registrado and not reemplazar:
+                        st.info(f"Se mantuvieron los resultados ya guardados del año {int(anio)} en la serie histórica.")
+
+                    st.success("Datos procesados exitosamente. Puedes ir a la página de visualización para ver los resultados.")
+
+                    # La sesión guarda solo el manejador; las tablas viven en el almacén compartido
+                    st.session_state.resultado = resultado
+
+                    # Botón para redirigir a la página de visualización (usando `st.session_state`)
+                    st.button("Ir a la página de visualización", on_click=lambda: st.session_state.update({'step': 2}))
+                    
 else:
     # Página de visualización
     page_2()
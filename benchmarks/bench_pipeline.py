@@ -0,0 +1,222 @@
+"""
+Benchmark del flujo INEI sobre microdatos sintéticos.
+
+Mide tiempo (mínimo y mediana de varias repeticiones) y memoria pico
+(tracemalloc, en una corrida aparte para no distorsionar el tiempo) de cada
+etapa: lectura del ZIP, normalización de nombres, filtro de Lima, los tres
+procesadores, la unión con la geometría y la creación del mapa (con el tamaño
+del JSON de la figura).
+
+Uso:
+    python -m benchmarks.bench_pipeline --filas 10000 100000 1000000
+    python -m benchmarks.bench_pipeline --filas 100000 --comparar benchmarks/resultados/base.json
+
+Los ZIP sintéticos se generan una vez en benchmarks/datos/ y se reutilizan.
+El resultado es un JSON con los metadatos del entorno y una fila por
+(etapa, filas), para comparar corridas entre commits.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generar_enapres_sintetico import escribir_enapres_sintetico
+from tratamiento_inei.lectura_enapres import (
+    COLUMNAS_REQUERIDAS, ESQUEMA_ENAPRES, VALORES_FALTANTES,
+    buscar_csv_enapres, leer_csv_lima_por_bloques, mascara_lima_metropolitana,
+)
+from tratamiento_inei.preparacion_encuesta import preparar_encuesta
+from tratamiento_inei.proce_victimización_inseguridad_inei import cargar_y_procesar_datos_victimizacion
+from tratamiento_inei.proce_percepcion_inseguridad_inei import cargar_y_procesar_datos_percepcion
+from tratamiento_inei.proce_confianza_instituciones_inei import cargar_y_procesar_datos_confianza
+from tratamiento_inei.pipeline_inei import procesar_encuesta
+from utils import normalizacion
+from utils.normalizacion import normalizar_serie
+
+DIR_BENCH = Path(__file__).resolve().parent
+DIR_DATOS = DIR_BENCH / "datos"
+DIR_RESULTADOS = DIR_BENCH / "resultados"
+
+
+# =========================
+# Medición
+# =========================
+def medir(funcion, repeticiones):
+    """Ejecuta `funcion` y devuelve (resultado, segundos_min, segundos_mediana, pico_mb)."""
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return resultado, min(tiempos), statistics.median(tiempos), pico / 2**20
+
+
+def _leer_zip_completo(ruta):
+    """Lee el CSV del ZIP con el esquema tipado, sin filtrar (costo de parseo puro)."""
+    with zipfile.ZipFile(ruta) as zip_ref:
+        with zip_ref.open(buscar_csv_enapres(zip_ref.namelist())) as f:
+            return pd.read_csv(f, usecols=COLUMNAS_REQUERIDAS, dtype=ESQUEMA_ENAPRES,
+                               na_values=VALORES_FALTANTES)
+
+
+def _leer_zip_lima(ruta):
+    with zipfile.ZipFile(ruta) as zip_ref:
+        with zip_ref.open(buscar_csv_enapres(zip_ref.namelist())) as f:
+            return leer_csv_lima_por_bloques(f)
+
+
+def _normalizar_nombres(df):
+    # Sin la memoria entre llamadas, para medir el caso de un archivo nuevo
+    normalizacion._normalizar_texto.cache_clear()
+    return {c: normalizar_serie(df[c]) for c in ["NOMBREDD", "NOMBREPP", "NOMBREDI"]}
+
+
+def _etapas_geograficas(df_final, repeticiones):
+    """Unión con la geometría y mapa; se omiten si la geometría no está disponible."""
+    try:
+        from utils.geo_processing import cargar_y_preparar_datos
+        from utils.geometrias import cargar_geometria_lima
+        from utils.geometrias import NIVELES_DETALLE
+        from utils.mapas import crear_mapa, geojson_distritos
+        # Carga única por proceso (igual que en la app): no entra en la medición
+        cargar_geometria_lima()
+        for nivel in NIVELES_DETALLE:
+            geojson_distritos(nivel)
+    except Exception as e:
+        return [{"etapa": etapa, "omitida": f"geometría no disponible: {e}"}
+                for etapa in ["cargar_y_preparar_datos", "crear_mapa", "crear_mapa_3_paneles"]]
+
+    gdf, *m1 = medir(lambda: cargar_y_preparar_datos(df_final), repeticiones)
+    filas = [_fila("cargar_y_preparar_datos", *m1)]
+    for etapa, paneles in [("crear_mapa", 1), ("crear_mapa_3_paneles", 3)]:
+        fig, *m = medir(lambda: crear_mapa(gdf, "Victimizacion_total_%", "INEI", paneles=paneles), repeticiones)
+        # Tamaño de la figura que recibe el navegador (por panel)
+        filas.append({**_fila(etapa, *m), "kb_figura": round(len(fig.to_json()) / 1024, 1)})
+    return filas
+
+
+def _fila(etapa, seg_min, seg_mediana, pico_mb):
+    return {"etapa": etapa, "segundos_min": round(seg_min, 6),
+            "segundos_mediana": round(seg_mediana, 6), "pico_mb": round(pico_mb, 3)}
+
+
+def bench_tamano(n_filas, semilla=0, repeticiones=3):
+    """Corre todas las etapas sobre un ZIP sintético de `n_filas` filas."""
+    ruta = DIR_DATOS / f"enapres_sintetico_{n_filas}_s{semilla}.zip"
+    if not ruta.exists():
+        escribir_enapres_sintetico(ruta, n_filas, semilla)
+
+    filas = []
+
+    def registrar(etapa, funcion):
+        resultado, *m = medir(funcion, repeticiones)
+        filas.append(_fila(etapa, *m))
+        return resultado
+
+    df_todo = registrar("lectura_zip", lambda: _leer_zip_completo(ruta))
+    registrar("normalizacion", lambda: _normalizar_nombres(df_todo))
+    registrar("filtro_lima", lambda: df_todo.loc[mascara_lima_metropolitana(df_todo)])
+    del df_todo
+
+    df_lima = registrar("lectura_zip_lima_por_bloques", lambda: _leer_zip_lima(ruta))
+    registrar("preparar_encuesta", lambda: preparar_encuesta(df_lima))
+    registrar("victimizacion", lambda: cargar_y_procesar_datos_victimizacion(df_lima))
+    registrar("percepcion", lambda: cargar_y_procesar_datos_percepcion(df_lima))
+    registrar("confianza", lambda: cargar_y_procesar_datos_confianza(df_lima))
+    tablas = registrar("pipeline_completo", lambda: procesar_encuesta(df_lima))
+    # La memoria pico de este modo solo cuenta el proceso principal
+    registrar("pipeline_paralelo", lambda: procesar_encuesta(df_lima, paralelo=True))
+
+    filas.extend(_etapas_geograficas(tablas["df_final"], repeticiones))
+
+    for fila in filas:
+        fila["filas"] = n_filas
+        fila["filas_lima"] = len(df_lima)
+    return filas
+
+
+# =========================
+# Metadatos y comparación
+# =========================
+def _commit_actual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=DIR_BENCH,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadatos(semilla, repeticiones):
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit_actual(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "semilla": semilla,
+        "repeticiones": repeticiones,
+    }
+
+
+def comparar(actual, base):
+    """Tabla con la razón actual/base de tiempo mediano y memoria pico por etapa y tamaño."""
+    clave = ["etapa", "filas"]
+    a = pd.DataFrame(actual["resultados"]).dropna(subset=["segundos_mediana"])
+    b = pd.DataFrame(base["resultados"]).dropna(subset=["segundos_mediana"])
+    tabla = a.merge(b, on=clave, suffixes=("", "_base"))
+    tabla["razon_tiempo"] = tabla["segundos_mediana"] / tabla["segundos_mediana_base"]
+    tabla["razon_memoria"] = tabla["pico_mb"] / tabla["pico_mb_base"]
+    return tabla[clave + ["segundos_mediana_base", "segundos_mediana", "razon_tiempo",
+                          "pico_mb_base", "pico_mb", "razon_memoria"]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del flujo INEI con datos sintéticos.")
+    parser.add_argument("--filas", type=int, nargs="+", default=[10_000, 100_000],
+                        help="Tamaños a medir (p. ej. 10000 100000 1000000 5000000)")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--salida", default=None,
+                        help="JSON de salida (por defecto: benchmarks/resultados/bench_<commit>.json)")
+    parser.add_argument("--comparar", default=None, help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args(argv)
+
+    resultados = []
+    for n in args.filas:
+        print(f"== {n:,} filas", file=sys.stderr)
+        resultados.extend(bench_tamano(n, args.semilla, args.repeticiones))
+
+    informe = {"meta": metadatos(args.semilla, args.repeticiones), "resultados": resultados}
+    salida = Path(args.salida) if args.salida else DIR_RESULTADOS / f"bench_{informe['meta']['commit'] or 'local'}.json"
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    salida.write_text(json.dumps(informe, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(pd.DataFrame(resultados).to_string(index=False))
+        if args.comparar:
+            base = json.loads(Path(args.comparar).read_text(encoding="utf-8"))
+            print(comparar(informe, base).to_string(index=False))
+    print(f"Resultados en {salida}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Benchmark del flujo de redes sociales sobre un volcado sintético.
+
+Etapas (cada una sobre todos los comentarios en memoria):
+- normalizacion: `normalizar_textos`
+- geo-etiquetado, tres formas de encontrar la primera mención de distrito:
+  automata (el de `Gazetteer`), regex_combinado (una expresión regular con
+  todos los patrones) y busqueda_por_patron (un `str.find` por patrón)
+- clasificación: clasificador_lexico (`ClasificadorLexico`) y regex_por_clase
+  (un `str.contains` por léxico)
+- conteos_bloque: normalización, gazetteer y clasificación juntos
+
+Las alternativas de una misma etapa deben dar el mismo resultado; se reporta
+si coinciden con la implementación del repositorio y los comentarios por
+segundo.
+
+Uso:
+    python -m benchmarks.bench_redes --filas 10000 100000 1000000
+"""
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_pipeline import DIR_DATOS, DIR_RESULTADOS, _fila, comparar, medir, metadatos
+from benchmarks.generar_comentarios_sinteticos import escribir_comentarios_sinteticos
+from tratamiento_redes.clasificacion import LEXICOS, ClasificadorLexico, _resolver
+from tratamiento_redes.gazetteer import Gazetteer, patrones_distritos
+from tratamiento_redes.pipeline_redes import conteos_bloque
+from tratamiento_redes.lectura_comentarios import leer_comentarios_por_bloques
+from utils.normalizacion import normalizar_textos
+
+
+# =========================
+# Alternativas de referencia
+# =========================
+def busqueda_por_patron(textos, patrones):
+    """Un `str.find` por patrón; gana el que empieza antes (el más largo si empatan)."""
+    mejor_inicio = np.full(len(textos), np.iinfo(np.int64).max)
+    mejor_largo = np.zeros(len(textos), dtype=np.int64)
+    codigos = np.full(len(textos), -1, dtype=np.int64)
+    for patron, valor in patrones.items():
+        inicio = textos.str.find(patron).to_numpy(dtype=np.int64)
+        mejora = (inicio >= 0) & ((inicio < mejor_inicio) | ((inicio == mejor_inicio) & (len(patron) > mejor_largo)))
+        mejor_inicio[mejora] = inicio[mejora]
+        mejor_largo[mejora] = len(patron)
+        codigos[mejora] = valor
+    return codigos
+
+
+def regex_combinado(textos, patrones):
+    """Una expresión regular con todos los patrones, los más largos primero."""
+    alternativas = "|".join(re.escape(p) for p in sorted(patrones, key=len, reverse=True))
+    menciones = textos.str.extract(f"({alternativas})", expand=False)
+    return menciones.map(patrones).fillna(-1).to_numpy(dtype=np.int64)
+
+
+def regex_por_clase(textos, lexicos=LEXICOS):
+    """Un `str.contains` por léxico, con las mismas reglas entre clases."""
+    marcas = {
+        clase: textos.str.contains("|".join(re.escape(f" {frase} ") for frase in frases), regex=True)
+        .to_numpy(dtype=bool)
+        for clase, frases in lexicos.items()
+    }
+    return _resolver(marcas, textos.index)
+
+
+# =========================
+# Corridas
+# =========================
+def bench_tamano(n_filas, semilla=0, repeticiones=3):
+    """Mide todas las etapas sobre `n_filas` comentarios sintéticos."""
+    ruta = DIR_DATOS / f"comentarios_sinteticos_{n_filas}_s{semilla}.jsonl"
+    if not ruta.exists():
+        escribir_comentarios_sinteticos(ruta, n_filas, semilla)
+
+    crudos = pd.concat(list(leer_comentarios_por_bloques(ruta)), ignore_index=True)
+    patrones = patrones_distritos()
+    gazetteer = Gazetteer(patrones)
+    clasificador = ClasificadorLexico()
+
+    filas = []
+
+    def registrar(etapa, funcion, referencia=None):
+        resultado, *m = medir(funcion, repeticiones)
+        fila = _fila(etapa, *m)
+        if referencia is not None:
+            fila["coincide"] = bool(np.array_equal(np.asarray(resultado), np.asarray(referencia)))
+        filas.append(fila)
+        return resultado
+
+    textos = registrar("normalizacion", lambda: normalizar_textos(crudos["TEXTO"]))
+
+    codigos = registrar("automata", lambda: gazetteer.codigos(textos))
+    registrar("regex_combinado", lambda: regex_combinado(textos, patrones), codigos)
+    registrar("busqueda_por_patron", lambda: busqueda_por_patron(textos, patrones), codigos)
+
+    con_distrito = textos[codigos >= 0]
+    clases = registrar("clasificador_lexico", lambda: clasificador.clasificar(con_distrito))
+    registrar("regex_por_clase", lambda: regex_por_clase(con_distrito), clases)
+
+    registrar("conteos_bloque", lambda: conteos_bloque(crudos))
+
+    for fila in filas:
+        fila["filas"] = n_filas
+        fila["mb_texto"] = round(int(textos.str.len().sum()) / 2**20, 2)
+        fila["comentarios_por_s"] = round(n_filas / fila["segundos_mediana"])
+        fila["con_distrito_%"] = round(float((codigos >= 0).mean() * 100), 2)
+    return filas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del flujo de redes sociales.")
+    parser.add_argument("--filas", type=int, nargs="+", default=[10_000, 100_000],
+                        help="Tamaños a medir (p. ej. 10000 100000 1000000)")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--salida", default=None,
+                        help="JSON de salida (por defecto: benchmarks/resultados/redes_<commit>.json)")
+    parser.add_argument("--comparar", default=None, help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args(argv)
+
+    resultados = []
+    for n in args.filas:
+        print(f"== {n:,} comentarios", file=sys.stderr)
+        resultados.extend(bench_tamano(n, args.semilla, args.repeticiones))
+
+    informe = {"meta": metadatos(args.semilla, args.repeticiones), "resultados": resultados}
+    salida = Path(args.salida) if args.salida else DIR_RESULTADOS / f"redes_{informe['meta']['commit'] or 'local'}.json"
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    salida.write_text(json.dumps(informe, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(pd.DataFrame(resultados).to_string(index=False))
+        if args.comparar:
+            base = json.loads(Path(args.comparar).read_text(encoding="utf-8"))
+            print(comparar(informe, base).to_string(index=False))
+    print(f"Resultados en {salida}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Generador de comentarios sintéticos con la forma de un volcado de YouTube.
+
+Cada comentario mezcla relleno, a veces una frase de los léxicos de
+clasificación y a veces una mención de distrito escrita de distintas formas
+(con y sin tildes, en minúsculas, alias como "SJL" o lugares como "Gamarra").
+El largo sigue una distribución sesgada: la mayoría son cortos y unos pocos
+muy largos. Con la misma semilla y tamaño el archivo es siempre idéntico.
+
+Uso:
+    python -m benchmarks.generar_comentarios_sinteticos 1000000 comentarios.jsonl --semilla 0
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generar_enapres_sintetico import DISTRITOS_LIMA
+from tratamiento_redes.clasificacion import LEXICOS
+from tratamiento_redes.gazetteer import ALIAS_REDES, CONTEXTOS
+
+PROP_CON_DISTRITO = 0.6
+PROP_CON_FRASE = 0.5
+
+RELLENO = (
+    "la verdad", "todos los dias", "ayer en la noche", "por el paradero", "cerca al mercado",
+    "saliendo del trabajo", "con mi familia", "que tal", "increible", "no puede ser",
+    "otra vez", "hasta cuando", "y nadie dice nada", "jajaja", "👏👏", "😡", "🙏",
+    "alcalde", "vecinos", "combi", "mototaxi", "celular", "cartera", "barrio",
+)
+
+
+def _menciones():
+    """Formas de mencionar un distrito: nombre oficial (con contexto) y alias."""
+    formas = [f"{contexto.lower()} {nombre}" for nombre in DISTRITOS_LIMA[1:] for contexto in CONTEXTOS[:3]]
+    formas += [f"por {alias.title()}" for alias in ALIAS_REDES]
+    formas += [f"en {alias}" for alias in ALIAS_REDES if len(alias) <= 3]
+    return np.array(formas, dtype=object)
+
+
+def generar_comentarios(n, rng):
+    """DataFrame con `n` comentarios (columnas id, textOriginal, autor)."""
+    menciones = _menciones()
+    frases = np.array([f.lower() for frases in LEXICOS.values() for f in frases], dtype=object)
+    relleno = np.array(RELLENO, dtype=object)
+
+    # Palabras de relleno por comentario: la mayoría pocas, algunos cientos
+    n_relleno = np.minimum(rng.lognormal(1.5, 1.0, n).astype(int), 400)
+    con_distrito = rng.random(n) < PROP_CON_DISTRITO
+    con_frase = rng.random(n) < PROP_CON_FRASE
+    mayus = rng.random(n) < 0.1
+
+    textos = []
+    for i in range(n):
+        partes = list(relleno[rng.integers(0, len(relleno), n_relleno[i])])
+        if con_frase[i]:
+            partes.insert(rng.integers(0, len(partes) + 1), frases[rng.integers(0, len(frases))])
+        if con_distrito[i]:
+            partes.insert(rng.integers(0, len(partes) + 1), menciones[rng.integers(0, len(menciones))])
+        texto = " ".join(partes)
+        textos.append(texto.upper() if mayus[i] else texto)
+
+    return pd.DataFrame({"id": np.arange(n), "textOriginal": textos, "autor": "x"})
+
+
+def escribir_comentarios_sinteticos(ruta, n_filas, semilla=0, tamano_bloque=200_000):
+    """Escribe un JSONL de `n_filas` comentarios por bloques y devuelve la ruta."""
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(semilla)
+
+    with open(ruta, "w", encoding="utf-8") as f:
+        for inicio in range(0, n_filas, tamano_bloque):
+            bloque = generar_comentarios(min(tamano_bloque, n_filas - inicio), rng)
+            bloque["id"] += inicio
+            bloque.to_json(f, orient="records", lines=True, force_ascii=False)
+            f.write("\n")
+    return ruta
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera un volcado sintético de comentarios (JSONL).")
+    parser.add_argument("filas", type=int)
+    parser.add_argument("destino")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+    print(escribir_comentarios_sinteticos(args.destino, args.filas, args.semilla))
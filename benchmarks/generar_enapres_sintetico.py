@@ -0,0 +1,186 @@
+"""
+Generador de microdatos sintéticos con la forma del módulo ENAPRES.
+
+Produce las mismas columnas que COLUMNAS_REQUERIDAS más el diseño muestral
+(ESTRATO, CONGLOMERADO), con varios departamentos (Lima Metropolitana ≈ 30%
+de las filas), nombres con y sin tildes, faltantes por persona y por ítem, y
+pesos FACTOR. Con la misma semilla y tamaño el
+archivo es siempre idéntico.
+
+Uso:
+    python -m benchmarks.generar_enapres_sintetico 1000000 datos.zip --semilla 0
+"""
+import argparse
+import io
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from tratamiento_inei.lectura_enapres import (
+    COLUMNAS_REQUERIDAS, columnas_diseno,
+    columnas_confianza_declarada, columnas_desempeno,
+    columnas_presencia_existencia, columnas_presencia_calidad, columnas_presencia_meses,
+    columnas_expectativa, columnas_inseguridad_directa, columnas_lugares,
+    columnas_p615, columnas_p616,
+)
+
+# =========================
+# Geografía
+# =========================
+DISTRITOS_LIMA = [
+    "Lima", "Ancón", "Ate", "Barranco", "Breña", "Carabayllo", "Chaclacayo", "Chorrillos",
+    "Cieneguilla", "Comas", "El Agustino", "Independencia", "Jesús María", "La Molina",
+    "La Victoria", "Lince", "Los Olivos", "Lurigancho", "Lurín", "Magdalena del Mar",
+    "Pueblo Libre", "Miraflores", "Pachacámac", "Pucusana", "Puente Piedra", "Punta Hermosa",
+    "Punta Negra", "Rímac", "San Bartolo", "San Borja", "San Isidro", "San Juan de Lurigancho",
+    "San Juan de Miraflores", "San Luis", "San Martín de Porres", "San Miguel", "Santa Anita",
+    "Santa María del Mar", "Santa Rosa", "Santiago de Surco", "Surquillo", "Villa El Salvador",
+    "Villa María del Triunfo",
+]
+
+DEPARTAMENTOS = [
+    "Amazonas", "Áncash", "Apurímac", "Arequipa", "Ayacucho", "Cajamarca", "Callao", "Cusco",
+    "Huancavelica", "Huánuco", "Ica", "Junín", "La Libertad", "Lambayeque", "Lima", "Loreto",
+    "Madre de Dios", "Moquegua", "Pasco", "Piura", "Puno", "San Martín", "Tacna", "Tumbes", "Ucayali",
+]
+
+PROP_LIMA_METRO = 0.30
+DISTRITOS_POR_DEPTO = 60
+# Tamaño medio de conglomerado (personas por UPM) y número de estratos
+PERSONAS_POR_CONGLOMERADO = 12
+ESTRATOS = 6
+
+
+def _catalogo_distritos():
+    """Tabla de distritos: códigos, nombres y peso relativo en la muestra."""
+    filas = []
+    for i, nombre in enumerate(DISTRITOS_LIMA, start=1):
+        filas.append(("15", "01", f"{i:02d}", "Lima", "Lima", nombre, PROP_LIMA_METRO / len(DISTRITOS_LIMA)))
+
+    resto = (1 - PROP_LIMA_METRO) / (len(DEPARTAMENTOS) * DISTRITOS_POR_DEPTO)
+    for d, depto in enumerate(DEPARTAMENTOS, start=1):
+        for j in range(DISTRITOS_POR_DEPTO):
+            # Lima provincias empieza en la provincia 02 (la 01 es Lima Metropolitana)
+            prov = j // 10 + (2 if d == 15 else 1)
+            dist = j % 10 + 1
+            nombre_prov = f"Provincia {d:02d}{prov:02d}"
+            filas.append((f"{d:02d}", f"{prov:02d}", f"{dist:02d}", depto, nombre_prov,
+                          f"Distrito {d:02d}{prov:02d}{dist:02d}", resto))
+
+    catalogo = pd.DataFrame(filas, columns=["CCDD", "CCPP", "CCDI", "NOMBREDD", "NOMBREPP", "NOMBREDI", "p"])
+    catalogo["p"] /= catalogo["p"].sum()
+    return catalogo
+
+
+# =========================
+# Respuestas
+# =========================
+def _respuestas(rng, n, valores, probs, faltante, saltar):
+    """Códigos de respuesta como Int8 nullable, con faltantes por ítem y por persona."""
+    v = rng.choice(np.asarray(valores, dtype="int8"), size=n, p=probs)
+    mask = saltar | (rng.random(n) < faltante)
+    return pd.arrays.IntegerArray(v, mask)
+
+
+def generar_bloque(n, rng, catalogo, numero_bloque=0):
+    """Genera `n` filas sintéticas (los conglomerados no se repiten entre bloques)."""
+    p = catalogo["p"].to_numpy()
+    idx = rng.choice(len(catalogo), size=n, p=p)
+    geo = catalogo.iloc[idx].reset_index(drop=True)
+
+    cols = {}
+    # Nombres a veces en mayúsculas, como en los archivos del INEI
+    mayus = rng.random(n) < 0.5
+    for c in ["NOMBREDD", "NOMBREPP", "NOMBREDI"]:
+        nombres = geo[c].to_numpy(dtype=object)
+        cols[c] = np.where(mayus, np.char.upper(nombres.astype(str)), nombres)
+    for c in ["CCDD", "CCPP", "CCDI"]:
+        # Algunos archivos traen los códigos sin cero a la izquierda
+        cols[c] = geo[c].str.lstrip("0").replace("", "0").to_numpy()
+
+    # Diseño: conglomerados anidados en distrito y estrato; el peso varía por conglomerado
+    conglomerados_distrito = np.maximum(2, np.ceil(n * p / PERSONAS_POR_CONGLOMERADO)).astype("int64")
+    local = (rng.random(n) * conglomerados_distrito[idx]).astype("int64")
+    cols["ESTRATO"] = (idx % ESTRATOS + 1).astype("int16")
+    cols["CONGLOMERADO"] = (numero_bloque * 10**7 + idx.astype("int64") * 10**3 + local % 10**3)
+    factor_upm = rng.gamma(8.0, 1 / 8.0, conglomerados_distrito.max())
+    cols["FACTOR"] = np.round(rng.gamma(4.0, 60.0, n) * factor_upm[local], 4)
+
+    # Personas que no respondieron el módulo completo
+    saltar = rng.random(n) < 0.03
+    # Nivel de inseguridad por distrito para que los porcentajes varíen entre distritos
+    sesgo = np.clip(0.5 + 0.1 * np.sin(idx.astype(float)), 0.2, 0.8)
+
+    for c in columnas_confianza_declarada:
+        cols[c] = _respuestas(rng, n, [1, 2, 3, 4, 5], [.3, .35, .2, .1, .05], .04, saltar)
+    for c in columnas_desempeno:
+        cols[c] = _respuestas(rng, n, [1, 2, 3, 4], [.25, .35, .3, .1], .04, saltar)
+    for c in columnas_presencia_existencia + columnas_presencia_meses:
+        cols[c] = _respuestas(rng, n, [1, 2], [.55, .45], .1, saltar)
+    for c in columnas_presencia_calidad:
+        cols[c] = _respuestas(rng, n, [1, 2, 3, 4], [.2, .3, .35, .15], .3, saltar)
+    for c in columnas_expectativa:
+        cols[c] = _respuestas(rng, n, [1, 2], [.7, .3], .05, saltar)
+    for c in columnas_inseguridad_directa:
+        inseguro = rng.random(n) < sesgo
+        v = np.where(inseguro, rng.integers(1, 3, n), rng.integers(3, 5, n)).astype("int8")
+        cols[c] = pd.arrays.IntegerArray(v, saltar | (rng.random(n) < .03))
+    for c in columnas_lugares:
+        cols[c] = _respuestas(rng, n, [1, 2, 3, 4, 5], [.2, .3, .25, .1, .15], .08, saltar)
+
+    # P615 (fue víctima 1=Sí 2=No) y P616 (nº de veces, solo si fue víctima)
+    for c615, c616 in zip(columnas_p615, columnas_p616):
+        victima = rng.random(n) < sesgo * 0.08
+        flag = np.where(victima, 1, 2).astype("int8")
+        falta_flag = saltar | (rng.random(n) < .02)
+        cols[c615] = pd.arrays.IntegerArray(flag, falta_flag)
+        veces = rng.integers(1, 5, n).astype("int16")
+        cols[c616] = pd.arrays.IntegerArray(veces, ~victima | falta_flag | (rng.random(n) < .2))
+
+    return pd.DataFrame(cols)[COLUMNAS_REQUERIDAS + columnas_diseno]
+
+
+def escribir_enapres_sintetico(ruta, n_filas, semilla=0, tamano_bloque=500_000):
+    """
+    Escribe `n_filas` sintéticas en `ruta` (.csv o .zip con una carpeta interna).
+
+    Se genera por bloques, así la memoria no depende de `n_filas`.
+    """
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    catalogo = _catalogo_distritos()
+    rng = np.random.default_rng(semilla)
+
+    def _bloques():
+        restantes, numero = n_filas, 0
+        while restantes > 0:
+            n = min(tamano_bloque, restantes)
+            yield generar_bloque(n, rng, catalogo, numero)
+            restantes -= n
+            numero += 1
+
+    if ruta.suffix.lower() == ".zip":
+        with zipfile.ZipFile(ruta, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("ENAPRES_SINTETICO/", "")
+            with zf.open("ENAPRES_SINTETICO/CAP_600_URBANO_RURAL.csv", "w") as f:
+                texto = io.TextIOWrapper(f, encoding="utf-8", newline="")
+                for i, bloque in enumerate(_bloques()):
+                    bloque.to_csv(texto, index=False, header=(i == 0))
+                texto.flush()
+                texto.detach()
+    else:
+        with open(ruta, "w", encoding="utf-8", newline="") as f:
+            for i, bloque in enumerate(_bloques()):
+                bloque.to_csv(f, index=False, header=(i == 0))
+    return ruta
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera microdatos ENAPRES sintéticos.")
+    parser.add_argument("filas", type=int, help="Número de filas (p. ej. 10000 a 5000000)")
+    parser.add_argument("destino", help="Archivo de salida .csv o .zip")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+    print(escribir_enapres_sintetico(args.destino, args.filas, args.semilla))
@@ -0,0 +1,153 @@
+import pandas as pd
+import numpy as np
+
+
+# =========================
+# Motor de agregación ponderada por grupo
+# =========================
+def _matrices(df, geo_col, cols, weight_col, dropna):
+    """Valores, pesos, máscara de válidos y códigos de grupo comunes a sumas y varianzas."""
+    x = df[cols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    if weight_col:
+        w = pd.to_numeric(df[weight_col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    else:
+        w = np.ones(len(df), dtype="float64")
+
+    valido = ~np.isnan(x) & ~np.isnan(w)[:, None]
+
+    # Códigos de grupo (ordenados, NaN al final como en groupby(dropna=False))
+    codigos, grupos = pd.factorize(df[geo_col], sort=True, use_na_sentinel=dropna)
+    return x, w, valido, codigos, grupos
+
+
+def sumas_ponderadas(df, geo_col, cols, weight_col=None, dropna=True):
+    """
+    Estadísticos suficientes por grupo para medias ponderadas que ignoran NAs.
+
+    Para cada columna de `cols` devuelve, por grupo de `geo_col`:
+        - suma_wx: suma de w·x sobre las filas con x y w válidos
+        - suma_w:  suma de w sobre esas mismas filas
+        - n:       número de filas válidas
+
+    Todo se calcula en una sola pasada agrupada sobre arreglos enmascarados.
+    Sin `weight_col` se usa w=1 (media simple).
+    """
+    x, w, valido, codigos, grupos = _matrices(df, geo_col, cols, weight_col, dropna)
+    wx = np.where(valido, x * w[:, None], 0.0)
+    ww = np.where(valido, w[:, None], 0.0)
+
+    usar = codigos >= 0
+    k = len(cols)
+
+    bloque = np.hstack([wx[usar], ww[usar], valido[usar].astype("float64")])
+    sumas = pd.DataFrame(bloque).groupby(codigos[usar], sort=True).sum().to_numpy()
+
+    # Índice con valores planos (aunque la clave sea categórica)
+    indice = pd.Index(np.asarray(grupos), name=geo_col)
+    suma_wx = pd.DataFrame(sumas[:, :k], index=indice, columns=cols)
+    suma_w = pd.DataFrame(sumas[:, k:2 * k], index=indice, columns=cols)
+    n = pd.DataFrame(sumas[:, 2 * k:].astype("int64"), index=indice, columns=cols)
+    return suma_wx, suma_w, n
+
+
+def medias_desde_sumas(suma_wx, suma_w, n):
+    """Media ponderada a partir de los estadísticos suficientes (NaN si no hay datos)."""
+    return (suma_wx / suma_w).where(n > 0)
+
+
+def sumas_por_prefijo(sumas, longitud):
+    """
+    Suma los estadísticos suficientes de códigos jerárquicos por su prefijo.
+
+    Con índices UBIGEO de distrito ("150101"), `longitud=4` da provincias
+    ("1501") y `longitud=2` departamentos ("15"). Opera sobre la tabla
+    distrital ya agregada, no sobre los microdatos.
+    """
+    clave = pd.Index(sumas[0].index.astype(str).str[:longitud], name=sumas[0].index.name)
+    return tuple(t.groupby(clave, sort=True).sum() for t in sumas)
+
+
+def medias_ponderadas(df, geo_col, cols, weight_col=None, dropna=True):
+    """
+    Media ponderada por grupo de todas las columnas `cols` a la vez.
+
+    Equivale a aplicar `weighted_mean(g[col], g[weight_col])` a cada grupo y
+    columna, pero sin llamadas Python por grupo.
+    """
+    return medias_desde_sumas(*sumas_ponderadas(df, geo_col, cols, weight_col, dropna))
+
+
+# =========================
+# Varianza por linealización (diseño estratificado por conglomerados)
+# =========================
+def errores_estandar(df, geo_col, cols, weight_col=None, estrato_col=None, psu_col=None, dropna=True):
+    """
+    Error estándar de las medias ponderadas por grupo, según el diseño muestral.
+
+    Cada media por grupo es un cociente R = Σw·x / Σw; su varianza se estima
+    por linealización de Taylor con la variable z = w·(x − R) / Σw, sumada
+    por conglomerado (`psu_col`) dentro de cada estrato (`estrato_col`):
+
+        V(R) = Σ_h n_h/(n_h − 1) · [Σ_j z_hj² − (Σ_j z_hj)² / n_h]
+
+    donde n_h es el número de conglomerados del estrato en toda la muestra
+    (los grupos son dominios: los conglomerados sin filas del grupo cuentan
+    como z = 0). Estratos con un solo conglomerado no aportan varianza.
+    Sin estrato ni conglomerado, cada fila es su propio conglomerado en un
+    único estrato (muestreo con reemplazo).
+
+    Todas las columnas se resuelven a la vez con dos agrupaciones sobre la
+    matriz de residuos; el costo es similar al de `sumas_ponderadas`.
+    Devuelve un DataFrame con el mismo índice y columnas que las medias.
+    """
+    x, w, valido, codigos, grupos = _matrices(df, geo_col, cols, weight_col, dropna)
+    usar = codigos >= 0
+    x, w, valido, codigos = x[usar], w[usar], valido[usar], codigos[usar]
+    n_grupos = len(grupos)
+
+    indice = pd.Index(np.asarray(grupos), name=geo_col)
+    if len(x) == 0:
+        return pd.DataFrame(np.nan, index=indice, columns=cols)
+
+    # Medias y pesos por grupo (G × K) llevados a cada fila
+    k = len(cols)
+    wv = np.where(valido, w[:, None], 0.0)
+    sumas = (pd.DataFrame(np.hstack([np.where(valido, x, 0.0) * wv, wv]))
+               .groupby(codigos, sort=True).sum()
+               .reindex(range(n_grupos), fill_value=0.0).to_numpy())
+    suma_wx, suma_w = sumas[:, :k], sumas[:, k:]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = suma_wx / suma_w
+        z = np.where(valido, wv * (x - media[codigos]) / suma_w[codigos], 0.0)
+
+    # Conglomerado y estrato de cada fila (sin diseño: una fila = un conglomerado)
+    if estrato_col and psu_col:
+        diseno = df.loc[usar, [estrato_col, psu_col]]
+        psu = diseno.groupby([estrato_col, psu_col], sort=False, dropna=False).ngroup().to_numpy()
+        estrato_de_psu = pd.factorize(
+            diseno.groupby([estrato_col, psu_col], sort=False, dropna=False).size().index.get_level_values(0)
+        )[0]
+    else:
+        psu = np.arange(len(z))
+        estrato_de_psu = np.zeros(len(z), dtype="int64")
+    n_h = np.bincount(estrato_de_psu)
+
+    # 1) Totales de z por (grupo, conglomerado)
+    clave, unicas = pd.factorize(codigos.astype("int64") * (psu.max() + 1) + psu)
+    z_psu = pd.DataFrame(z).groupby(clave, sort=False).sum().to_numpy()
+    grupo_psu = unicas // (psu.max() + 1)
+    estrato = estrato_de_psu[unicas % (psu.max() + 1)]
+
+    # 2) Σ z² y Σ z por (grupo, estrato), luego suma sobre estratos
+    clave_h, unicas_h = pd.factorize(grupo_psu * len(n_h) + estrato)
+    a = pd.DataFrame(z_psu ** 2).groupby(clave_h, sort=False).sum().to_numpy()
+    b = pd.DataFrame(z_psu).groupby(clave_h, sort=False).sum().to_numpy()
+    nh = n_h[unicas_h % len(n_h)].astype("float64")[:, None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        aporte = np.where(nh > 1, nh / (nh - 1) * (a - b ** 2 / nh), 0.0)
+
+    varianza = np.zeros((n_grupos, k))
+    np.add.at(varianza, unicas_h // len(n_h), aporte)
+
+    ee = pd.DataFrame(np.sqrt(np.clip(varianza, 0, None)), index=indice, columns=cols)
+    return ee.where(suma_w > 0)
@@ -0,0 +1,137 @@
+"""
+Ejecución en paralelo de los tres indicadores (victimización, percepción y confianza).
+
+La encuesta preparada se escribe una vez como archivo Arrow IPC (en /dev/shm
+cuando existe) y cada proceso lo abre con memory-map: las páginas se comparten
+entre procesos y cada uno convierte a pandas solo la geografía, el peso y sus
+propias preguntas. Nada del DataFrame completo se serializa hacia los procesos.
+"""
+import multiprocessing
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.ipc
+
+from tratamiento_inei.preparacion_encuesta import EncuestaPreparada
+from tratamiento_inei.proce_victimización_inseguridad_inei import (
+    PREGUNTAS_VICTIMIZACION, calcular_victimizacion_persona, agregar_victimizacion,
+)
+from tratamiento_inei.proce_percepcion_inseguridad_inei import (
+    PREGUNTAS_PERCEPCION, calcular_percepcion_persona, agregar_percepcion,
+)
+from tratamiento_inei.proce_confianza_instituciones_inei import (
+    PREGUNTAS_CONFIANZA, calcular_confianza_persona, agregar_confianza,
+)
+
+# nombre -> (preguntas que usa, cálculo por persona, agregación distrital)
+INDICADORES = {
+    "victimizacion": (PREGUNTAS_VICTIMIZACION, calcular_victimizacion_persona, agregar_victimizacion),
+    "percepcion": (PREGUNTAS_PERCEPCION, calcular_percepcion_persona, agregar_percepcion),
+    "confianza": (PREGUNTAS_CONFIANZA, calcular_confianza_persona, agregar_confianza),
+}
+
+# Con un solo núcleo los procesos se turnan y el paralelo solo agrega costo
+PARALELO_DISPONIBLE = (os.cpu_count() or 1) > 1
+
+# Memoria compartida del sistema si existe; si no, el directorio temporal por defecto
+DIR_COMPARTIDO = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# Columna con el índice original de la encuesta dentro del archivo Arrow
+_COLUMNA_INDICE = "__index_level_0__"
+
+_pool = None
+
+
+def _obtener_pool():
+    """Pool de procesos reutilizado entre cargas (el arranque se paga una vez)."""
+    global _pool
+    if _pool is None:
+        # "spawn": no se hereda el estado de los hilos del servidor (Streamlit)
+        _pool = ProcessPoolExecutor(max_workers=len(INDICADORES),
+                                    mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+# =========================
+# Arrow IPC compartido
+# =========================
+def escribir_encuesta_arrow(encuesta, ruta):
+    """Escribe el DataFrame preparado (con su índice) como archivo Arrow IPC sin comprimir."""
+    tabla = pa.Table.from_pandas(encuesta.df, preserve_index=True)
+    with pa.OSFile(str(ruta), "wb") as destino:
+        with pa.ipc.new_file(destino, tabla.schema) as escritor:
+            escritor.write_table(tabla)
+
+
+def leer_encuesta_arrow(ruta, tipos, geo_col, weight_col):
+    """
+    Abre el archivo Arrow con memory-map y arma una EncuestaPreparada.
+
+    `tipos` es {columna: dtype original}: solo esas columnas se convierten a
+    pandas (el resto no se lee) y se devuelven con el mismo dtype que en la
+    encuesta preparada (Arrow no distingue categorías object de str).
+    """
+    with pa.memory_map(str(ruta), "r") as fuente:
+        tabla = pa.ipc.open_file(fuente).read_all()
+        disponibles = set(tabla.column_names)
+        seleccion = [c for c in tipos if c in disponibles]
+        if _COLUMNA_INDICE in disponibles:
+            seleccion.append(_COLUMNA_INDICE)
+        df = tabla.select(seleccion).to_pandas()
+
+    for c, tipo in tipos.items():
+        if df[c].dtype != tipo:
+            df[c] = df[c].astype(tipo)
+    return EncuestaPreparada(df=df, geo_col=geo_col, weight_col=weight_col)
+
+
+def _tipos_indicador(df, patron, geo_col, weight_col):
+    """Geografía, peso y preguntas del indicador, con su dtype."""
+    base = [c for c in (geo_col, weight_col) if c]
+    columnas = base + [c for c in df.columns if c not in base and re.fullmatch(patron, c)]
+    return {c: df[c].dtype for c in columnas}
+
+
+def _calcular_indicador(nombre, ruta, tipos, geo_col, weight_col):
+    """Trabajo de cada proceso: indicadores por persona y agregación distrital."""
+    _, calcular, agregar = INDICADORES[nombre]
+    encuesta = leer_encuesta_arrow(ruta, tipos, geo_col, weight_col)
+    personas = calcular(encuesta)
+    return personas, agregar(personas, geo_col, weight_col)
+
+
+# =========================
+# Ejecución
+# =========================
+def calcular_indicadores_en_paralelo(encuesta):
+    """
+    Ejecuta los tres indicadores a la vez sobre una EncuestaPreparada.
+
+    Devuelve {nombre: (personas, agregados)} con los mismos resultados que la
+    ejecución secuencial.
+    """
+    global _pool
+    geo_col, weight_col = encuesta.geo_col, encuesta.weight_col
+
+    with tempfile.TemporaryDirectory(prefix="enapres_", dir=DIR_COMPARTIDO) as tmp:
+        ruta = Path(tmp) / "encuesta.arrow"
+        escribir_encuesta_arrow(encuesta, ruta)
+
+        pool = _obtener_pool()
+        futuros = {
+            nombre: pool.submit(_calcular_indicador, nombre, str(ruta),
+                                _tipos_indicador(encuesta.df, patron, geo_col, weight_col),
+                                geo_col, weight_col)
+            for nombre, (patron, _, _) in INDICADORES.items()
+        }
+        try:
+            return {nombre: futuro.result() for nombre, futuro in futuros.items()}
+        except BrokenProcessPool:
+            # Un proceso murió (p. ej. sin memoria): la próxima carga crea un pool nuevo
+            _pool = None
+            raise
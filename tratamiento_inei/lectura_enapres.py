@@ -0,0 +1,243 @@
+import pandas as pd
+
+from utils.normalizacion import aplicar_por_valor, normalizar_serie
+
+# =========================
+# 1) Columnas requeridas del módulo ENAPRES
+# =========================
+columnas_geografia = [
+    "NOMBREDD", "NOMBREPP", "NOMBREDI",
+    "CCDD", "CCPP", "CCDI"
+]
+
+columnas_peso = [
+    "FACTOR"
+]
+
+columnas_confianza_declarada = [
+    "P608_1", "P608_2", "P608_3", "P608_4"
+]
+
+columnas_desempeno = [
+    "P612_1", "P612_2", "P612_3", "P612_4", "P613"
+]
+
+columnas_presencia_existencia = [
+    "P642_1", "P642_2", "P642_3"
+]
+
+columnas_presencia_calidad = [
+    "P643_1", "P643_2", "P643_3"
+]
+
+columnas_presencia_meses = [
+    "P644_1", "P644_2", "P644_3"
+]
+
+columnas_expectativa = [
+    f"P601_{i}" for i in range(1, 17)
+]
+
+columnas_inseguridad_directa = [
+    "P602",  # inseguridad en barrio
+    "P604",  # inseguridad de noche
+    "P605"   # inseguridad de día
+]
+
+columnas_lugares = [
+    f"P606_{i}" for i in range(1, 11)
+]
+
+# P615 (bandera: fue víctima 1=Sí 2=No)
+columnas_p615 = [f"P615_{i}" for i in range(1, 29)]
+
+# P616 (conteo: nº de veces)
+columnas_p616 = [f"P616_{i}" for i in range(1, 29)]
+
+# Diseño muestral (estrato y conglomerado): se leen si el archivo las trae
+columnas_diseno = [
+    "ESTRATO", "CONGLOMERADO"
+]
+
+COLUMNAS_REQUERIDAS = (
+    columnas_geografia
+    + columnas_peso
+    + columnas_confianza_declarada
+    + columnas_desempeno
+    + columnas_presencia_existencia
+    + columnas_presencia_calidad
+    + columnas_presencia_meses
+    + columnas_expectativa
+    + columnas_inseguridad_directa
+    + columnas_lugares
+    + columnas_p615
+    + columnas_p616
+)
+
+# =========================
+# 2) Esquema de tipos compacto
+# =========================
+# - Códigos de respuesta (1..9): Int8 nullable (1 byte en vez de 8)
+# - Conteos P616 (nº de veces): Int16 nullable
+# - FACTOR: float32
+# - Códigos y nombres geográficos: categóricos (se repiten en millones de filas)
+ESQUEMA_ENAPRES = {
+    **{c: "category" for c in columnas_geografia},
+    **{c: "float32" for c in columnas_peso},
+    **{c: "Int8" for c in (
+        columnas_confianza_declarada
+        + columnas_desempeno
+        + columnas_presencia_existencia
+        + columnas_presencia_calidad
+        + columnas_presencia_meses
+        + columnas_expectativa
+        + columnas_inseguridad_directa
+        + columnas_lugares
+        + columnas_p615
+    )},
+    **{c: "Int16" for c in columnas_p616},
+    "ESTRATO": "Int16",
+    "CONGLOMERADO": "Int64",
+}
+
+# INEI publica celdas vacías o con un espacio para "sin respuesta"
+VALORES_FALTANTES = ["", " "]
+
+# Filas por bloque: la memoria pico depende de este valor, no del tamaño del archivo
+TAMANO_BLOQUE = 200_000
+
+
+# =========================
+# 3) Filtro Lima Metropolitana (Depto 15, Prov 01)
+# =========================
+def codigo_dos_digitos(serie):
+    """Códigos con cero a la izquierda ("1" -> "01"), calculados una vez por valor distinto."""
+    return aplicar_por_valor(serie, lambda v: str(v).zfill(2))
+
+
+def mascara_lima_metropolitana(df):
+    """
+    Devuelve la máscara booleana de filas de Lima Metropolitana.
+
+    Usa la misma regla que los procesadores: (CCDD=15 o NOMBREDD=LIMA) y
+    (CCPP=01 o NOMBREPP=LIMA). No modifica el DataFrame recibido.
+    """
+    is_lima_dept = False
+    if "CCDD" in df.columns:
+        is_lima_dept = codigo_dos_digitos(df["CCDD"]).eq("15")
+    if "NOMBREDD" in df.columns:
+        is_lima_dept = is_lima_dept | normalizar_serie(df["NOMBREDD"]).eq("LIMA")
+
+    is_lima_prov = False
+    if "CCPP" in df.columns:
+        is_lima_prov = codigo_dos_digitos(df["CCPP"]).eq("01")
+    if "NOMBREPP" in df.columns:
+        is_lima_prov = is_lima_prov | normalizar_serie(df["NOMBREPP"]).eq("LIMA")
+
+    return is_lima_dept & is_lima_prov
+
+
+# =========================
+# 4) Lectura por bloques
+# =========================
+def leer_csv_por_bloques(archivo, columnas=None, tamano_bloque=TAMANO_BLOQUE, filtro=None):
+    """
+    Lee el CSV de ENAPRES por bloques con el esquema compacto.
+
+    `archivo` puede ser una ruta o un objeto tipo archivo (por ejemplo el
+    miembro abierto con `zip_ref.open`). Si se da `filtro` (función que recibe
+    un bloque y devuelve una máscara), cada bloque se filtra apenas se lee, así
+    que nunca se materializa el archivo completo en memoria.
+    """
+    columnas = COLUMNAS_REQUERIDAS if columnas is None else columnas
+    # Las columnas de diseño son opcionales: se agregan solo si existen en el archivo
+    leer = set(columnas) | set(columnas_diseno)
+    dtypes = {c: t for c, t in ESQUEMA_ENAPRES.items() if c in leer}
+
+    bloques = []
+    lector = pd.read_csv(
+        archivo,
+        usecols=lambda c: c in leer,
+        dtype=dtypes,
+        na_values=VALORES_FALTANTES,
+        chunksize=tamano_bloque,
+    )
+    with lector:
+        for bloque in lector:
+            faltantes = [c for c in columnas if c not in bloque.columns]
+            if faltantes:
+                raise ValueError(f"Faltan columnas en el CSV de ENAPRES: {faltantes}")
+            bloques.append(bloque.loc[filtro(bloque)] if filtro else bloque)
+
+    if not bloques:
+        return pd.DataFrame(columns=columnas).astype({c: t for c, t in dtypes.items() if c in columnas})
+
+    df = pd.concat(bloques, ignore_index=True)
+
+    # Cada bloque trae sus propias categorías; concat las deja como object
+    for c, t in dtypes.items():
+        if t == "category" and c in df.columns and df[c].dtype != "category":
+            df[c] = df[c].astype("category")
+    return df
+
+
+def leer_csv_lima_por_bloques(archivo, columnas=None, tamano_bloque=TAMANO_BLOQUE):
+    """Lee el CSV de ENAPRES por bloques y conserva solo Lima Metropolitana."""
+    return leer_csv_por_bloques(archivo, columnas, tamano_bloque, filtro=mascara_lima_metropolitana)
+
+
+def buscar_csv_enapres(nombres):
+    """
+    Elige el CSV del módulo dentro de la lista de archivos de un ZIP.
+
+    Como en la app: el primer CSV dentro de la primera carpeta del ZIP; si el
+    ZIP no tiene carpetas, el primer CSV que aparezca. Devuelve None si no hay.
+    """
+    carpeta = next((n for n in nombres if n.endswith("/")), None)
+    if carpeta:
+        csv = next((n for n in nombres if n.startswith(carpeta) and n.endswith(".csv")), None)
+        if csv:
+            return csv
+    return next((n for n in nombres if n.lower().endswith(".csv")), None)
+
+
+# =========================
+# 5) Reporte de memoria
+# =========================
+def reporte_memoria(antes, despues):
+    """
+    Compara el uso de memoria por columna de dos versiones del mismo DataFrame.
+
+    Devuelve una tabla con tipo y bytes antes/después, ordenada por ahorro, y
+    una fila TOTAL al final.
+    """
+    reporte = pd.DataFrame({
+        "tipo_antes": antes.dtypes.astype(str),
+        "bytes_antes": antes.memory_usage(index=False, deep=True),
+        "tipo_despues": despues.dtypes.astype(str),
+        "bytes_despues": despues.memory_usage(index=False, deep=True),
+    })
+    reporte["reduccion_%"] = (1 - reporte["bytes_despues"] / reporte["bytes_antes"]) * 100
+    reporte = reporte.sort_values("bytes_antes", ascending=False)
+
+    total_antes = reporte["bytes_antes"].sum()
+    total_despues = reporte["bytes_despues"].sum()
+    reporte.loc["TOTAL"] = ["", total_antes, "", total_despues, (1 - total_despues / total_antes) * 100]
+    return reporte
+
+
+if __name__ == "__main__":
+    # Uso: python -m tratamiento_inei.lectura_enapres archivo.csv [n_filas]
+    import sys
+
+    ruta = sys.argv[1]
+    n_filas = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+
+    sin_esquema = pd.read_csv(ruta, usecols=COLUMNAS_REQUERIDAS, nrows=n_filas, low_memory=False)
+    con_esquema = pd.read_csv(
+        ruta, usecols=COLUMNAS_REQUERIDAS, nrows=n_filas,
+        dtype=ESQUEMA_ENAPRES, na_values=VALORES_FALTANTES,
+    )
+    reporte = reporte_memoria(sin_esquema, con_esquema)
+    with pd.option_context("display.max_rows", None, "display.width", 120):
+        print(reporte)
@@ -0,0 +1,158 @@
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from tratamiento_inei.preparacion_encuesta import preparar_encuesta, codigo_ubigeo
+from tratamiento_inei.agregacion_ponderada import sumas_ponderadas, medias_desde_sumas, errores_estandar
+from tratamiento_inei.proce_victimización_inseguridad_inei import calcular_victimizacion_persona, agregar_victimizacion, INDICADORES_VICTIMIZACION
+from tratamiento_inei.proce_percepcion_inseguridad_inei import calcular_percepcion_persona, agregar_percepcion, INDICADORES_PERCEPCION
+from tratamiento_inei.proce_confianza_instituciones_inei import calcular_confianza_persona, agregar_confianza, columnas_detalle_confianza
+from tratamiento_inei.ejecucion_paralela import calcular_indicadores_en_paralelo
+
+
+# =========================
+# Flujo completo: encuesta -> df_final / df_completo
+# =========================
+def combinar_resultados(victimizacion, percepcion, confianza):
+    """
+    Une las salidas de los tres procesadores como lo hace la app.
+
+    Recibe (dist_total, dist_segmentado), (dist_percepcion, dist_segmentado)
+    y distritos_confianza; devuelve (df_final, df_completo).
+    """
+    dist_total_victimizacion, dist_segmentado_victimizacion = victimizacion
+    dist_percepcion, dist_segmentado_percepcion = percepcion
+    distritos_confianza = confianza
+
+    # Extraer solo las columnas necesarias de cada DataFrame
+    vict_total_df = dist_total_victimizacion[["NOMBREDI", "Victimizacion_total_%"]]
+    inseguridad_general_df = dist_segmentado_percepcion[["NOMBREDI", "Inseguridad_general_%"]]
+    confianza_df = distritos_confianza[["NOMBREDI", "Indice_confianza_PNP_%"]]
+
+    # Crear un DataFrame final con las tres métricas clave
+    df_final = pd.merge(vict_total_df, inseguridad_general_df, on="NOMBREDI", how="left")
+    df_final = pd.merge(df_final, confianza_df, on="NOMBREDI", how="left")
+
+    # Crear df_completo con todos los datos procesados
+    df_completo = pd.merge(dist_segmentado_victimizacion, dist_segmentado_percepcion, on="NOMBREDI", how="left")
+    df_completo = pd.merge(df_completo, distritos_confianza, on="NOMBREDI", how="left")
+
+    return df_final, df_completo
+
+
+def ubigeo_por_distrito(encuesta):
+    """
+    UBIGEO de cada NOMBREDI (el más frecuente en los microdatos).
+
+    Devuelve una Serie indexada por NOMBREDI, o None si la encuesta no trae
+    CCDD/CCPP/CCDI. Con ella df_final se une a la geometría por código.
+    """
+    df = encuesta.df
+    if not all(c in df.columns for c in ["NOMBREDI", "CCDD", "CCPP", "CCDI"]):
+        return None
+    pares = pd.DataFrame({"NOMBREDI": df["NOMBREDI"], "UBIGEO": codigo_ubigeo(df)}).dropna()
+    conteo = pares.value_counts(sort=True).reset_index()
+    return conteo.drop_duplicates("NOMBREDI").set_index("NOMBREDI")["UBIGEO"].astype(str)
+
+
+def unir_indicadores(personas, geo_col, weight_col):
+    """
+    Une los indicadores por persona de los tres procesadores en una sola tabla.
+
+    `personas` es el diccionario con personas_victimizacion, personas_percepcion
+    y personas_confianza (como lo devuelve `procesar_encuesta` o la caché). La
+    tabla tiene la geografía, el peso y una columna por métrica con su nombre
+    final (Victimizacion_total_%, Inseguridad_general_%, ...).
+    """
+    confianza = personas["personas_confianza"]
+    metricas_confianza = {col: nombre for nombre, col in columnas_detalle_confianza(confianza.columns)}
+
+    base = [c for c in (geo_col, weight_col) if c]
+    return pd.concat([
+        personas["personas_victimizacion"][base + list(INDICADORES_VICTIMIZACION)].rename(columns=INDICADORES_VICTIMIZACION),
+        personas["personas_percepcion"][list(INDICADORES_PERCEPCION)].rename(columns=INDICADORES_PERCEPCION),
+        confianza[list(metricas_confianza)].rename(columns=metricas_confianza),
+    ], axis=1)
+
+
+def precision_indicadores(encuesta, personas, nivel_confianza=0.95):
+    """
+    Error estándar e intervalo de confianza de todas las métricas distritales.
+
+    Usa el estrato y el conglomerado de la encuesta si existen (si no, cada
+    persona es su propio conglomerado). Devuelve una tabla larga con NOMBREDI,
+    METRICA, VALOR, EE, IC_INF, IC_SUP, CV (coeficiente de variación) y N,
+    todo en % salvo CV y N.
+    """
+    geo_col, weight_col = encuesta.geo_col, encuesta.weight_col
+    tabla = unir_indicadores(personas, geo_col, weight_col)
+    metricas = [c for c in tabla.columns if c not in (geo_col, weight_col)]
+
+    diseno = [c for c in (encuesta.estrato_col, encuesta.psu_col) if c]
+    if diseno:
+        tabla = tabla.join(encuesta.df[diseno])
+
+    suma_wx, suma_w, n = sumas_ponderadas(tabla, geo_col, metricas, weight_col)
+    valor = medias_desde_sumas(suma_wx, suma_w, n) * 100
+    ee = errores_estandar(tabla, geo_col, metricas, weight_col, encuesta.estrato_col, encuesta.psu_col) * 100
+
+    z = NormalDist().inv_cdf(0.5 + nivel_confianza / 2)
+    precision = pd.concat({"VALOR": valor.stack(), "EE": ee.stack(), "N": n.stack()}, axis=1)
+    precision.index.names = ["NOMBREDI", "METRICA"]
+    precision["IC_INF"] = (precision["VALOR"] - z * precision["EE"]).clip(lower=0)
+    precision["IC_SUP"] = (precision["VALOR"] + z * precision["EE"]).clip(upper=100)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        precision["CV"] = precision["EE"] / precision["VALOR"]
+    return precision.reset_index()[["NOMBREDI", "METRICA", "VALOR", "EE", "IC_INF", "IC_SUP", "CV", "N"]]
+
+
+def procesar_encuesta(archivo_o_df, paralelo=False):
+    """
+    Prepara la encuesta una vez y ejecuta victimización, percepción y confianza.
+
+    Con `paralelo=True` los tres indicadores corren a la vez en procesos
+    separados que comparten la encuesta preparada (ver ejecucion_paralela);
+    el resultado es el mismo.
+
+    Devuelve un diccionario de tablas: df_final (con UBIGEO si la encuesta trae
+    los códigos), df_completo, df_precision
+    (error estándar e IC de cada métrica, ver `precision_indicadores`) y las
+    tablas por persona de cada procesador (personas_victimizacion,
+    personas_percepcion, personas_confianza).
+    """
+    encuesta = preparar_encuesta(archivo_o_df)
+    geo_col, weight_col = encuesta.geo_col, encuesta.weight_col
+
+    if paralelo:
+        resultados = calcular_indicadores_en_paralelo(encuesta)
+        personas_victimizacion, victimizacion = resultados["victimizacion"]
+        personas_percepcion, percepcion = resultados["percepcion"]
+        personas_confianza, confianza = resultados["confianza"]
+    else:
+        personas_victimizacion = calcular_victimizacion_persona(encuesta)
+        personas_percepcion = calcular_percepcion_persona(encuesta)
+        personas_confianza = calcular_confianza_persona(encuesta)
+        victimizacion = agregar_victimizacion(personas_victimizacion, geo_col, weight_col)
+        percepcion = agregar_percepcion(personas_percepcion, geo_col, weight_col)
+        confianza = agregar_confianza(personas_confianza, geo_col, weight_col)
+
+    df_final, df_completo = combinar_resultados(victimizacion, percepcion, confianza)
+    ubigeos = ubigeo_por_distrito(encuesta) if geo_col == "NOMBREDI" else None
+    if ubigeos is not None:
+        df_final.insert(1, "UBIGEO", df_final["NOMBREDI"].map(ubigeos))
+    personas = {
+        "personas_victimizacion": personas_victimizacion,
+        "personas_percepcion": personas_percepcion,
+        "personas_confianza": personas_confianza,
+    }
+    df_precision = precision_indicadores(encuesta, personas) if geo_col else pd.DataFrame()
+
+    return {
+        "df_final": df_final,
+        "df_completo": df_completo,
+        "df_precision": df_precision,
+        "personas_victimizacion": personas_victimizacion,
+        "personas_percepcion": personas_percepcion,
+        "personas_confianza": personas_confianza,
+    }
@@ -0,0 +1,75 @@
+import pandas as pd
+
+from tratamiento_inei.preparacion_encuesta import preparar_encuesta
+from tratamiento_inei.agregacion_ponderada import sumas_ponderadas, sumas_por_prefijo, medias_desde_sumas
+from tratamiento_inei.pipeline_inei import unir_indicadores
+from tratamiento_inei.proce_victimización_inseguridad_inei import calcular_victimizacion_persona
+from tratamiento_inei.proce_percepcion_inseguridad_inei import calcular_percepcion_persona
+from tratamiento_inei.proce_confianza_instituciones_inei import calcular_confianza_persona
+
+# Nivel geográfico -> largo del prefijo UBIGEO y columna con su nombre
+NIVELES_UBIGEO = {
+    "departamento": (2, "NOMBREDD"),
+    "provincia":    (4, "NOMBREPP"),
+    "distrito":     (6, "NOMBREDI"),
+}
+
+
+# =========================
+# Modo nacional: departamento / provincia / distrito en una pasada
+# =========================
+def _nombres_por_nivel(df):
+    """Nombre de cada distrito, provincia y departamento según su UBIGEO (el primero que aparece)."""
+    distritos = df.groupby("UBIGEO", observed=True, sort=True)[["NOMBREDD", "NOMBREPP", "NOMBREDI"]].first()
+    distritos.index = distritos.index.astype(str)
+    return {
+        nivel: distritos[col].groupby(distritos.index.str[:largo]).first().rename("NOMBRE")
+        for nivel, (largo, col) in NIVELES_UBIGEO.items()
+    }
+
+
+def agregar_por_niveles(tabla, metricas, weight_col):
+    """
+    Medias ponderadas (en %) por departamento, provincia y distrito.
+
+    Los microdatos se recorren una sola vez para obtener los estadísticos
+    suficientes por distrito; provincias y departamentos se obtienen
+    sumándolos por prefijo de UBIGEO, como un GROUPING SETS.
+    """
+    sumas = sumas_ponderadas(tabla, "UBIGEO", metricas, weight_col)
+    sumas = tuple(t.set_axis(t.index.astype(str)) for t in sumas)
+
+    niveles = {}
+    for nivel, (largo, _) in NIVELES_UBIGEO.items():
+        sumas_nivel = sumas if largo == 6 else sumas_por_prefijo(sumas, largo)
+        niveles[nivel] = medias_desde_sumas(*sumas_nivel) * 100
+    return niveles
+
+
+def procesar_encuesta_nacional(archivo_o_df):
+    """
+    Indicadores de victimización, percepción y confianza para todo el país.
+
+    Devuelve un diccionario con `df_nacional` (una fila por nivel y UBIGEO:
+    NIVEL, UBIGEO, NOMBRE y las métricas) y las tablas por persona.
+    """
+    encuesta = preparar_encuesta(archivo_o_df, ambito="nacional")
+    personas = {
+        "personas_victimizacion": calcular_victimizacion_persona(encuesta),
+        "personas_percepcion": calcular_percepcion_persona(encuesta),
+        "personas_confianza": calcular_confianza_persona(encuesta),
+    }
+    tabla = unir_indicadores(personas, encuesta.geo_col, encuesta.weight_col)
+    metricas = [c for c in tabla.columns if c not in (encuesta.geo_col, encuesta.weight_col)]
+
+    niveles = agregar_por_niveles(tabla, metricas, encuesta.weight_col)
+    nombres = _nombres_por_nivel(encuesta.df)
+
+    partes = []
+    for nivel, medias in niveles.items():
+        parte = medias.join(nombres[nivel]).reset_index()
+        parte.insert(0, "NIVEL", nivel)
+        partes.append(parte[["NIVEL", "UBIGEO", "NOMBRE"] + metricas])
+    df_nacional = pd.concat(partes, ignore_index=True)
+
+    return {"df_nacional": df_nacional, **personas}
@@ -0,0 +1,148 @@
+import io
+import re
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from tratamiento_inei.lectura_enapres import mascara_lima_metropolitana, codigo_dos_digitos
+from utils.normalizacion import normalizar_serie
+
+
+# "lima": solo Lima Metropolitana, por nombre de distrito; "nacional": todo el país, por UBIGEO
+AMBITOS = ("lima", "nacional")
+
+# Columnas que se reconocen como peso muestral, estrato y conglomerado (UPM)
+PATRON_PESO = r"(FACTOR|PESO|EXPAN|PONDER)"
+PATRON_ESTRATO = r"ESTRATO"
+PATRON_CONGLOMERADO = r"(CONGLOMERADO|CONGLOME|UPM)"
+
+
+# =========================
+# Encuesta preparada (se calcula una vez por carga)
+# =========================
+@dataclass(frozen=True)
+class EncuestaPreparada:
+    """
+    Microdatos (Lima Metropolitana o nacional) listos para los tres procesadores.
+
+    - df: filas filtradas, nombres normalizados y códigos con cero a la izquierda
+    - geo_col: columna de agrupación distrital (o None si no hay geografía)
+    - weight_col: columna de peso muestral (o None)
+    - estrato_col, psu_col: diseño muestral para los errores estándar (o None)
+
+    El DataFrame no debe modificarse; los procesadores trabajan sobre `vista()`.
+    """
+    df: pd.DataFrame
+    geo_col: str | None
+    weight_col: str | None
+    estrato_col: str | None = None
+    psu_col: str | None = None
+
+    def vista(self, columnas_numericas=()):
+        """
+        Copia superficial para trabajar: las columnas nuevas no alteran el DataFrame preparado.
+
+        Las `columnas_numericas` indicadas se entregan como float64 (NaN para
+        faltantes), así los procesadores funcionan igual con el esquema compacto
+        (Int8/Int16 nullable) que con los tipos por defecto de pandas.
+        """
+        df = self.df.copy(deep=False)
+        for c in columnas_numericas:
+            if c in df.columns and df[c].dtype != "float64":
+                df[c] = df[c].to_numpy(dtype="float64", na_value=np.nan)
+        return df
+
+
+def codigo_ubigeo(df, columnas=("CCDD", "CCPP", "CCDI")):
+    """
+    UBIGEO concatenando los códigos ya rellenados ("15", "01", "01" -> "150101").
+
+    Se arma una vez por combinación distinta y se devuelve como categórico;
+    NaN si falta alguno de los códigos.
+    """
+    grupos = df.groupby(list(columnas), observed=True, dropna=False, sort=True)
+    codigos = grupos.ngroup().to_numpy()
+    claves = grupos.size().index
+    valores = pd.Series(
+        ["".join(k) if all(isinstance(p, str) for p in k) else None for k in claves], dtype=object
+    )
+    codigos_ubigeo, categorias = pd.factorize(valores, sort=True)
+    return pd.Series(pd.Categorical.from_codes(codigos_ubigeo[codigos], categories=categorias),
+                     index=df.index, name="UBIGEO")
+
+
+def preparar_encuesta(archivo_o_df, ambito="lima"):
+    """
+    Normaliza, filtra a Lima Metropolitana y detecta geografía y peso.
+
+    Con `ambito="nacional"` no se filtra y la geografía es el UBIGEO
+    (CCDD+CCPP+CCDI), porque los nombres de distrito se repiten entre
+    departamentos.
+
+    Acepta un CSV en memoria (bytes), un DataFrame o una EncuestaPreparada
+    (que se devuelve sin cambios). El DataFrame recibido no se modifica.
+    """
+    if isinstance(archivo_o_df, EncuestaPreparada):
+        return archivo_o_df
+    if isinstance(archivo_o_df, bytes):  # Si es un archivo en memoria (Streamlit)
+        df = pd.read_csv(io.BytesIO(archivo_o_df), low_memory=False)
+    elif isinstance(archivo_o_df, pd.DataFrame):  # Si ya es un DataFrame
+        df = archivo_o_df
+    else:
+        raise ValueError("El parámetro debe ser un archivo CSV o un DataFrame")
+    if ambito not in AMBITOS:
+        raise ValueError(f"ambito debe ser uno de {AMBITOS}")
+
+    # =========================
+    # 1) Filtro Lima Metropolitana (Depto 15, Prov 01)
+    # =========================
+    if ambito == "lima":
+        df = df.loc[mascara_lima_metropolitana(df)].copy()
+    else:
+        # Sin filtro: copia superficial, las columnas se reemplazan (no se modifican)
+        df = df.copy(deep=False)
+
+    # =========================
+    # 2) Normalizar nombres y códigos geográficos
+    # =========================
+    for c in ["NOMBREDD", "NOMBREPP", "NOMBREDI"]:
+        if c in df.columns:
+            df[c] = normalizar_serie(df[c])
+
+    for c in ["CCDD", "CCPP", "CCDI"]:
+        if c in df.columns:
+            df[c] = codigo_dos_digitos(df[c])
+
+    # =========================
+    # 3) Variables geográficas y pesos (geografía distrital)
+    # =========================
+    tiene_codigos = all(c in df.columns for c in ["CCDD", "CCPP", "CCDI"])
+    if ambito == "nacional":
+        if not tiene_codigos:
+            raise ValueError("El modo nacional requiere las columnas CCDD, CCPP y CCDI.")
+        df["UBIGEO"] = codigo_ubigeo(df)
+        geo_col = "UBIGEO"
+    elif "NOMBREDI" in df.columns and df["NOMBREDI"].notna().any():
+        geo_col = "NOMBREDI"
+    elif "CCDI" in df.columns:
+        geo_col = "CCDI"
+    else:
+        if tiene_codigos:
+            df["ID_DISTRITO"] = df["CCDD"] + df["CCPP"] + df["CCDI"]
+            geo_col = "ID_DISTRITO"
+        else:
+            geo_col = None
+
+    # Peso muestral
+    weight_candidates = [c for c in df.columns if re.search(PATRON_PESO, c, re.IGNORECASE)]
+    weight_col = weight_candidates[0] if weight_candidates else None
+
+    # Diseño muestral: se usa solo si están el estrato y el conglomerado
+    estrato_col = next((c for c in df.columns if re.fullmatch(PATRON_ESTRATO, c, re.IGNORECASE)), None)
+    psu_col = next((c for c in df.columns if re.fullmatch(PATRON_CONGLOMERADO, c, re.IGNORECASE)), None)
+    if not (estrato_col and psu_col):
+        estrato_col = psu_col = None
+
+    return EncuestaPreparada(df=df, geo_col=geo_col, weight_col=weight_col,
+                             estrato_col=estrato_col, psu_col=psu_col)
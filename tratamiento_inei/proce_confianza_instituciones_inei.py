@@ -1,85 +1,33 @@
 import pandas as pd
 import numpy as np
 import re
-import unicodedata
 
-# =========================
-# 1) Cargar datos
-# =========================
-def cargar_y_procesar_datos_confianza(archivo_o_df):
-    # Verificar si el parámetro es un archivo CSV (tipo BytesIO) o ya un DataFrame
-    if isinstance(archivo_o_df, bytes):  # Si es un archivo en memoria (Streamlit)
-        df = pd.read_csv(archivo_o_df, low_memory=False)
-    elif isinstance(archivo_o_df, pd.DataFrame):  # Si ya es un DataFrame
-        df = archivo_o_df
-    else:
-        raise ValueError("El parámetro debe ser un archivo CSV o un DataFrame")
-
-    # =========================
-    # Utilidades de normalización
-    # =========================
-    def _norm(s):
-        if pd.isna(s): return s
-        s = str(s)
-        s = unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii")
-        return s.strip().upper()
-
-    # Normalizar nombres si existen
-    for c in ["NOMBREDD", "NOMBREPP", "NOMBREDI"]:
-        if c in df.columns:
-            df[c] = df[c].map(_norm)
-
-    # Asegurar códigos con cero a la izquierda si existen
-    for c in ["CCDD", "CCPP", "CCDI"]:
-        if c in df.columns:
-            df[c] = df[c].astype(str).str.zfill(2)
-
-    # =========================
-    # 2) Filtro Lima Metropolitana (Depto 15, Prov 01)
-    # =========================
-    is_lima_dept = False
-    if "CCDD" in df.columns:
-        is_lima_dept = df["CCDD"].eq("15")
-    if "NOMBREDD" in df.columns:
-        is_lima_dept = is_lima_dept | df["NOMBREDD"].eq("LIMA")
-
-    is_lima_prov = False
-    if "CCPP" in df.columns:
-        is_lima_prov = df["CCPP"].eq("01")
-    if "NOMBREPP" in df.columns:
-        is_lima_prov = is_lima_prov | df["NOMBREPP"].eq("LIMA")
-
-    df = df.loc[is_lima_dept & is_lima_prov].copy()
+from tratamiento_inei.preparacion_encuesta import preparar_encuesta
+from tratamiento_inei.agregacion_ponderada import medias_ponderadas
 
-    # =========================
-    # 3) Variables geográficas y pesos (geografía distrital)
-    # =========================
-    if "NOMBREDI" in df.columns and df["NOMBREDI"].notna().any():
-        geo_col = "NOMBREDI"
-    elif "CCDI" in df.columns:
-        geo_col = "CCDI"
-    else:
-        if all(c in df.columns for c in ["CCDD", "CCPP", "CCDI"]):
-            df["ID_DISTRITO"] = df["CCDD"] + df["CCPP"] + df["CCDI"]
-            geo_col = "ID_DISTRITO"
-        else:
-            geo_col = None  
+# Preguntas que usa el procesador (se entregan como float64)
+PREGUNTAS_CONFIANZA = r"P6(08|12|13|42|43|44)(_\d+)?"
 
-    weight_candidates = [c for c in df.columns if re.search(r"(FACTOR|PESO|EXPAN|PONDER)", c, re.IGNORECASE)]
-    weight_col = weight_candidates[0] if weight_candidates else None
+# =========================
+# 1) Indicadores por persona
+# =========================
+def calcular_confianza_persona(archivo_o_df):
+    """
+    Recodifica P608/P612/P613/P642-P644 por persona y arma el índice PNP.
 
-    # =========================
-    # 4) Función weighted mean
-    # =========================
-    def wmean(x, w):
-        x = pd.to_numeric(x, errors="coerce")
-        w = pd.to_numeric(w, errors="coerce")
-        m = x.notna() & w.notna()
-        if m.sum() == 0: return np.nan
-        return np.average(x[m], weights=w[m])
+    Devuelve una tabla alineada con la encuesta preparada con la geografía, el
+    peso y las columnas binarias e índices derivados.
+    """
+    # Normalización, filtro Lima y detección de geografía/peso (etapa compartida)
+    encuesta = preparar_encuesta(archivo_o_df)
+    # Las preguntas se recodifican como float64 (el esquema compacto las trae como Int8/Int16)
+    preguntas = [c for c in encuesta.df.columns if re.fullmatch(PREGUNTAS_CONFIANZA, c)]
+    df = encuesta.vista(columnas_numericas=preguntas)
+    geo_col = encuesta.geo_col
+    weight_col = encuesta.weight_col
 
     # =========================
-    # 5) Selección de columnas PNP
+    # 2) Selección de columnas PNP
     # =========================
     p608_cols = [c for c in df.columns if re.fullmatch(r"P608_\d+", c)]
     p612_cols = [c for c in df.columns if re.fullmatch(r"P612_\d+", c)]
@@ -100,7 +48,7 @@ def cargar_y_procesar_datos_confianza(archivo_o_df):
     if p613_col: DESEMP_IT += [p613_col]
 
     # =========================
-    # 6) Recodificación binaria
+    # 3) Recodificación binaria
     # =========================
     if CONF_PNP:
         df["CONF_DECL_PNP_BIN"] = df[CONF_PNP].replace({3:1,4:1,1:0,2:0})
@@ -130,7 +78,7 @@ def cargar_y_procesar_datos_confianza(archivo_o_df):
         df["PRES_COMPUESTO_ESTRICTO"] = out
 
     # =========================
-    # 7) Índice confianza PNP
+    # 4) Índice confianza PNP
     # =========================
     comp_series = []
     if "CONF_DECL_PNP_BIN" in df: comp_series.append(df["CONF_DECL_PNP_BIN"].astype(float))
@@ -142,34 +90,51 @@ def cargar_y_procesar_datos_confianza(archivo_o_df):
 
     df["INDICE_CONFIANZA_PNP"] = pd.concat(comp_series, axis=1).mean(axis=1, skipna=True)
 
-    # =========================
-    # 8) Agregación distrital
-    # =========================
+    columnas_persona = [col for _, col in columnas_detalle_confianza(df.columns)]
+    return df[[c for c in (geo_col, weight_col) if c] + columnas_persona]
+
+
+# =========================
+# 5) Agregación distrital
+# =========================
+def columnas_detalle_confianza(columnas):
+    """Pares (métrica distrital, indicador por persona) presentes en `columnas`."""
     cols_detalle = []
-    if "CONF_DECL_PNP_BIN" in df: cols_detalle.append(("CONF_DECL_PNP_%","CONF_DECL_PNP_BIN"))
-    for c in desemp_bin_cols:
-        cols_detalle.append((f"{c.replace('_BIN','')}_% (positivo)", c))
-    if "PRES_EXISTE_PNP_BIN" in df: cols_detalle.append(("PRES_EXISTE_PNP_%","PRES_EXISTE_PNP_BIN"))
-    if "PRES_CAL_POS_BIN"   in df: cols_detalle.append(("PRES_CAL_POS_%","PRES_CAL_POS_BIN"))
-    if "PRES_MES_BIN"       in df: cols_detalle.append(("PRES_MES_%","PRES_MES_BIN"))
-
-    def agg_weighted(g, cols):
-        res = {}
-        for outname, col in cols:
-            res[outname] = wmean(g[col], g[weight_col]) * 100 if weight_col else g[col].mean() * 100
-        res["Indice_confianza_PNP_%"] = wmean(g["INDICE_CONFIANZA_PNP"], g[weight_col]) * 100 if weight_col else g["INDICE_CONFIANZA_PNP"].mean() * 100
-        if "PRES_COMPUESTO_ESTRICTO" in g:
-            res["Presencia_compuesto_estricto_%"] = wmean(g["PRES_COMPUESTO_ESTRICTO"], g[weight_col]) * 100 if weight_col else g["PRES_COMPUESTO_ESTRICTO"].mean() * 100
-        return pd.Series(res)
+    if "CONF_DECL_PNP_BIN" in columnas: cols_detalle.append(("CONF_DECL_PNP_%","CONF_DECL_PNP_BIN"))
+    for c in columnas:
+        if re.fullmatch(r"(P612_[1-4]|P613)_BIN", c):
+            cols_detalle.append((f"{c.replace('_BIN','')}_% (positivo)", c))
+    if "PRES_EXISTE_PNP_BIN" in columnas: cols_detalle.append(("PRES_EXISTE_PNP_%","PRES_EXISTE_PNP_BIN"))
+    if "PRES_CAL_POS_BIN"   in columnas: cols_detalle.append(("PRES_CAL_POS_%","PRES_CAL_POS_BIN"))
+    if "PRES_MES_BIN"       in columnas: cols_detalle.append(("PRES_MES_%","PRES_MES_BIN"))
+
+    cols_detalle.append(("Indice_confianza_PNP_%", "INDICE_CONFIANZA_PNP"))
+    if "PRES_COMPUESTO_ESTRICTO" in columnas: cols_detalle.append(("Presencia_compuesto_estricto_%", "PRES_COMPUESTO_ESTRICTO"))
+    return cols_detalle
+
+
+def agregar_confianza(personas, geo_col, weight_col):
+    """Agrega la tabla por persona a nivel distrital."""
+    cols_detalle = columnas_detalle_confianza(personas.columns)
 
     if geo_col:
-        distritos_confianza = df.groupby(geo_col).apply(lambda g: agg_weighted(g, cols_detalle)).reset_index()
+        # Todas las medias ponderadas en una sola pasada agrupada
+        cols_persona = [col for _, col in cols_detalle]
+        distritos_confianza = medias_ponderadas(personas, geo_col, cols_persona, weight_col) * 100
+        distritos_confianza.columns = [outname for outname, _ in cols_detalle]
+        distritos_confianza = distritos_confianza.reset_index()
     else:
         distritos_confianza = pd.DataFrame()
 
     # =========================
-    # 9) Exportar resultados
+    # 6) Exportar resultados
     # =========================
     #distritos_confianza.to_csv("confianza_pnp_distrito_lima.csv", index=False)
 
     return distritos_confianza
+
+
+def cargar_y_procesar_datos_confianza(archivo_o_df):
+    encuesta = preparar_encuesta(archivo_o_df)
+    personas = calcular_confianza_persona(encuesta)
+    return agregar_confianza(personas, encuesta.geo_col, encuesta.weight_col)
@@ -1,28 +1,13 @@
 import pandas as pd
 import numpy as np
 import re
-import unicodedata
+
+from tratamiento_inei.preparacion_encuesta import preparar_encuesta
+from tratamiento_inei.agregacion_ponderada import medias_ponderadas
 
 # -------------------------
 # Utilidades
 # -------------------------
-def _norm(s):
-    if pd.isna(s): return s
-    s = str(s)
-    s = unicodedata.normalize("NFKD", s).encode("ascii","ignore").decode("ascii")
-    return s.strip().upper()
-
-def weighted_mean(series, weights):
-    """Promedio ponderado ignorando NAs."""
-    s = pd.to_numeric(series, errors="coerce")
-    if weights is None:
-        return s.mean()
-    w = pd.to_numeric(weights, errors="coerce")
-    m = s.notna() & w.notna()
-    if m.sum() == 0:
-        return np.nan
-    return np.average(s[m], weights=w[m])
-
 def row_or(a, b):
     # OR con soporte a NAs
     x = pd.concat([a, b], axis=1)
@@ -33,63 +18,44 @@ def row_or(a, b):
     out[zero] = 0.0
     return out
 
+# Indicadores por persona -> nombre de la métrica distrital
+METRICAS_PERCEPCION_FULL = {
+    "PERCEPCION_EXPECTATIVA": "Expectativa_victimizacion_%",
+    "PERCEPCION_BARRIO":      "Barrio_inseguro_%",
+    "PERCEPCION_DIA":         "Dia_inseguro_%",
+    "PERCEPCION_NOCHE":       "Noche_inseguro_%",
+    "PERCEPCION_LUGARES":     "Lugares_inseguros_%",
+}
+METRICAS_PERCEPCION_SEGMENTADAS = {
+    "PERCEPCION_EXPECTATIVA":   "Expectativa_victimizacion_%",
+    "PERCEPCION_INSEG_GENERAL": "Inseguridad_general_%",
+    "PERCEPCION_NOCHE":         "Inseguridad_nocturna_%",
+}
+INDICADORES_PERCEPCION = {**METRICAS_PERCEPCION_FULL, **METRICAS_PERCEPCION_SEGMENTADAS}
+
+# Preguntas que usa el procesador (se entregan como float64)
+PREGUNTAS_PERCEPCION = r"P60[1-6](_\d+)?"
+
 # -------------------------
-# Función de Procesamiento: Cargar y procesar datos
+# 1) Indicadores por persona
 # -------------------------
-def cargar_y_procesar_datos_percepcion(archivo_o_df):
-    # Verificar si el parámetro es un archivo CSV (tipo BytesIO) o ya un DataFrame
-    if isinstance(archivo_o_df, bytes):  # Si es un archivo en memoria (Streamlit)
-        df = pd.read_csv(archivo_o_df, low_memory=False)
-    elif isinstance(archivo_o_df, pd.DataFrame):  # Si ya es un DataFrame
-        df = archivo_o_df
-    else:
-        raise ValueError("El parámetro debe ser un archivo CSV o un DataFrame")
-
-    # Normalizar nombres y códigos geográficos
-    for c in ["NOMBREDD", "NOMBREPP", "NOMBREDI"]:
-        if c in df.columns:
-            df[c] = df[c].map(_norm)
-
-    for c in ["CCDD", "CCPP", "CCDI"]:
-        if c in df.columns:
-            df[c] = df[c].astype(str).str.zfill(2)
-
-    # -------------------------
-    # 2) Filtro Lima Metropolitana (Depto 15, Prov 01)
-    # -------------------------
-    is_lima_dept = False
-    if "CCDD" in df.columns:
-        is_lima_dept = df["CCDD"].eq("15")
-    if "NOMBREDD" in df.columns:
-        is_lima_dept = is_lima_dept | df["NOMBREDD"].eq("LIMA")
-
-    is_lima_prov = False
-    if "CCPP" in df.columns:
-        is_lima_prov = df["CCPP"].eq("01")
-    if "NOMBREPP" in df.columns:
-        is_lima_prov = is_lima_prov | df["NOMBREPP"].eq("LIMA")
-
-    df = df.loc[is_lima_dept & is_lima_prov].copy()
-
-    # -------------------------
-    # 3) Variables geográficas y pesos
-    # -------------------------
-    if "NOMBREDI" in df.columns and df["NOMBREDI"].notna().any():
-        geo_col = "NOMBREDI"
-    elif "CCDI" in df.columns:
-        geo_col = "CCDI"
-    else:
-        if all(c in df.columns for c in ["CCDD", "CCPP", "CCDI"]):
-            df["ID_DISTRITO"] = df["CCDD"] + df["CCPP"] + df["CCDI"]
-            geo_col = "ID_DISTRITO"
-        else:
-            geo_col = None  
-
-    weight_candidates = [c for c in df.columns if re.search(r"(FACTOR|PESO|EXPAN|PONDER)", c, re.IGNORECASE)]
-    weight_col = weight_candidates[0] if weight_candidates else None
+def calcular_percepcion_persona(archivo_o_df):
+    """
+    Recodifica P601/P602/P604/P605/P606 por persona.
+
+    Devuelve una tabla alineada con la encuesta preparada con la geografía, el
+    peso y los indicadores PERCEPCION_*.
+    """
+    # Normalización, filtro Lima y detección de geografía/peso (etapa compartida)
+    encuesta = preparar_encuesta(archivo_o_df)
+    # Las preguntas se recodifican como float64 (el esquema compacto las trae como Int8/Int16)
+    preguntas = [c for c in encuesta.df.columns if re.fullmatch(PREGUNTAS_PERCEPCION, c)]
+    df = encuesta.vista(columnas_numericas=preguntas)
+    geo_col = encuesta.geo_col
+    weight_col = encuesta.weight_col
 
     # ----------------------------------------------------
-    # 4) Recodificaciones – Percepción
+    # 2) Recodificaciones – Percepción
     # ----------------------------------------------------
     # A) Expectativa de ser víctima (P601_*)
     p601_cols = [c for c in df.columns if re.fullmatch(r"P601_\d+", c)]
@@ -126,47 +92,36 @@ def cargar_y_procesar_datos_percepcion(archivo_o_df):
         df["PERCEPCION_LUGARES"] = np.nan
 
     # ----------------------------------------------------
-    # 5) Agregación distrital (5 métricas “full”)
-    # ----------------------------------------------------
-    grouped = df.groupby(geo_col, dropna=False)
-
-    if weight_col:
-        dist_percepcion = grouped.apply(lambda g: pd.Series({
-            "Expectativa_victimizacion_%": weighted_mean(g["PERCEPCION_EXPECTATIVA"], g[weight_col]) * 100,
-            "Barrio_inseguro_%":          weighted_mean(g["PERCEPCION_BARRIO"],      g[weight_col]) * 100,
-            "Dia_inseguro_%":             weighted_mean(g["PERCEPCION_DIA"],         g[weight_col]) * 100,
-            "Noche_inseguro_%":           weighted_mean(g["PERCEPCION_NOCHE"],       g[weight_col]) * 100,
-            "Lugares_inseguros_%":        weighted_mean(g["PERCEPCION_LUGARES"],     g[weight_col]) * 100,
-        }))
-    else:
-        dist_percepcion = grouped[[
-            "PERCEPCION_EXPECTATIVA","PERCEPCION_BARRIO","PERCEPCION_DIA",
-            "PERCEPCION_NOCHE","PERCEPCION_LUGARES"
-        ]].mean() * 100
-
-    dist_percepcion = dist_percepcion.reset_index().rename(columns={geo_col:"NOMBREDI"})
-
-    # ----------------------------------------------------
-    # 6) Versión segmentada (3 compactos)
+    # 3) Indicador compacto de inseguridad general
     # ----------------------------------------------------
     df["LUGARES_UMBRAL50"] = np.where(df["PERCEPCION_LUGARES"]>=0.5, 1.0,
                                np.where(df["PERCEPCION_LUGARES"]<0.5, 0.0, np.nan))
     df["PERCEPCION_INSEG_GENERAL"] = row_or(df["PERCEPCION_BARRIO"], df["LUGARES_UMBRAL50"])
 
-    if weight_col:
-        dist_segmentado = grouped.apply(lambda g: pd.Series({
-            "Expectativa_victimizacion_%": weighted_mean(g["PERCEPCION_EXPECTATIVA"],   g[weight_col]) * 100,
-            "Inseguridad_general_%":       weighted_mean(g["PERCEPCION_INSEG_GENERAL"], g[weight_col]) * 100,
-            "Inseguridad_nocturna_%":      weighted_mean(g["PERCEPCION_NOCHE"],         g[weight_col]) * 100,
-        }))
-    else:
-        dist_segmentado = grouped[[
-            "PERCEPCION_EXPECTATIVA","PERCEPCION_INSEG_GENERAL","PERCEPCION_NOCHE"
-        ]].mean() * 100
+    columnas = [c for c in (geo_col, weight_col) if c] + list(INDICADORES_PERCEPCION)
+    return df[columnas]
+
+# ----------------------------------------------------
+# 4) Agregación distrital (una sola pasada para todas las métricas)
+# ----------------------------------------------------
+def agregar_percepcion(personas, geo_col, weight_col):
+    """Agrega la tabla por persona a nivel distrital: (dist_percepcion, dist_segmentado)."""
+    medias = medias_ponderadas(personas, geo_col, list(INDICADORES_PERCEPCION), weight_col, dropna=False) * 100
 
+    # 5 métricas “full”
+    dist_percepcion = medias[list(METRICAS_PERCEPCION_FULL)].rename(columns=METRICAS_PERCEPCION_FULL)
+    dist_percepcion = dist_percepcion.reset_index().rename(columns={geo_col:"NOMBREDI"})
+
+    # Versión segmentada (3 compactos)
+    dist_segmentado = medias[list(METRICAS_PERCEPCION_SEGMENTADAS)].rename(columns=METRICAS_PERCEPCION_SEGMENTADAS)
     dist_segmentado = dist_segmentado.reset_index().rename(columns={geo_col:"NOMBREDI"})
 
-    # -------------------------
-    # 7) Retornar los resultados
-    # -------------------------
-    return dist_percepcion, dist_segmentado
\ No newline at end of file
+    return dist_percepcion, dist_segmentado
+
+# -------------------------
+# 5) Función de Procesamiento: Cargar y procesar datos
+# -------------------------
+def cargar_y_procesar_datos_percepcion(archivo_o_df):
+    encuesta = preparar_encuesta(archivo_o_df)
+    personas = calcular_percepcion_persona(encuesta)
+    return agregar_percepcion(personas, encuesta.geo_col, encuesta.weight_col)
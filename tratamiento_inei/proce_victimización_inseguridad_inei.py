@@ -1,84 +1,50 @@
 import pandas as pd
 import numpy as np
 import re
-import unicodedata
 
-# =========================
-# 1) Cargar datos
-# =========================
-def cargar_y_procesar_datos_victimizacion(archivo_o_df):
-    if isinstance(archivo_o_df, bytes):  # Si es un archivo CSV
-        df = pd.read_csv(archivo_o_df, low_memory=False)
-    elif isinstance(archivo_o_df, pd.DataFrame):  # Si es un DataFrame
-        df = archivo_o_df
-    else:
-        raise ValueError("El parámetro debe ser un archivo CSV o un DataFrame")
-
-    # -------------------------
-    # Utilidades de normalización
-    # -------------------------
-    def _norm(s):
-        if pd.isna(s):
-            return s
-        s = str(s)
-        s = unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii")
-        return s.strip().upper()
-
-    # Normalizar nombres si existen
-    for c in ["NOMBREDD", "NOMBREPP", "NOMBREDI"]:
-        if c in df.columns:
-            df[c] = df[c].map(_norm)
-
-    # Asegurar códigos con cero a la izquierda si existen
-    for c in ["CCDD", "CCPP", "CCDI"]:
-        if c in df.columns:
-            df[c] = df[c].astype(str).str.zfill(2)
+from tratamiento_inei.preparacion_encuesta import preparar_encuesta
+from tratamiento_inei.agregacion_ponderada import medias_ponderadas
 
-    # =========================
-    # 2) Filtro Lima Metropolitana (Depto 15, Prov 01)
-    # =========================
-    is_lima_dept = False
-    if "CCDD" in df.columns:
-        is_lima_dept = df["CCDD"].eq("15")
-    if "NOMBREDD" in df.columns:
-        is_lima_dept = is_lima_dept | df["NOMBREDD"].eq("LIMA")
+# Indicadores por persona -> nombre de la métrica distrital
+SEGMENTOS_VICTIMIZACION = {
+    "VIC_PATRIMONIAL":    "Victimizacion_patrimonial_%",
+    "VIC_NOPATRIMONIAL":  "Victimizacion_no_patrimonial_%",
+    "VIC_INFORMATICO":    "Victimizacion_informatico_%",
+    "VIC_VANDALISMO":     "Victimizacion_vandalismo_%"
+}
+INDICADORES_VICTIMIZACION = {"VIC_ANY": "Victimizacion_total_%", **SEGMENTOS_VICTIMIZACION}
 
-    is_lima_prov = False
-    if "CCPP" in df.columns:
-        is_lima_prov = df["CCPP"].eq("01")
-    if "NOMBREPP" in df.columns:
-        is_lima_prov = is_lima_prov | df["NOMBREPP"].eq("LIMA")
+# Preguntas que usa el procesador (se entregan como float64)
+PREGUNTAS_VICTIMIZACION = r"P61[56]_\d+"
 
-    mask_lima_metro = is_lima_dept & is_lima_prov
-    df = df.loc[mask_lima_metro].copy()
 
-    # =========================
-    # 3) Variables geográficas y pesos (geografía distrital)
-    # =========================
-    if "NOMBREDI" in df.columns and df["NOMBREDI"].notna().any():
-        geo_col = "NOMBREDI"
-    elif "CCDI" in df.columns:
-        geo_col = "CCDI"
-    else:
-        if all(c in df.columns for c in ["CCDD", "CCPP", "CCDI"]):
-            df["ID_DISTRITO"] = df["CCDD"] + df["CCPP"] + df["CCDI"]
-            geo_col = "ID_DISTRITO"
-        else:
-            geo_col = None
+# =========================
+# 1) Indicadores por persona
+# =========================
+def calcular_victimizacion_persona(archivo_o_df):
+    """
+    Recodifica P615/P616 por persona (VIC_xx, VIC_ANY y grupos).
 
-    # Peso muestral
-    weight_candidates = [c for c in df.columns if re.search(r"(FACTOR|PESO|EXPAN|PONDER)", c, re.IGNORECASE)]
-    weight_col = weight_candidates[0] if weight_candidates else None
+    Devuelve una tabla alineada con la encuesta preparada que contiene solo la
+    geografía, el peso y los indicadores derivados.
+    """
+    # Normalización, filtro Lima y detección de geografía/peso (etapa compartida)
+    encuesta = preparar_encuesta(archivo_o_df)
+    # Las preguntas se recodifican como float64 (el esquema compacto las trae como Int8/Int16)
+    preguntas = [c for c in encuesta.df.columns if re.fullmatch(PREGUNTAS_VICTIMIZACION, c)]
+    df = encuesta.vista(columnas_numericas=preguntas)
+    geo_col = encuesta.geo_col
+    weight_col = encuesta.weight_col
 
     # =========================
-    # 4) Detectar columnas de victimización
+    # 2) Detectar columnas de victimización
     # =========================
     p615_cols = [c for c in df.columns if re.fullmatch(r"P615_\d+", c)]
     p616_cols = [c for c in df.columns if re.fullmatch(r"P616_\d+", c)]
     victim_ids = sorted(set(int(c.split("_")[1]) for c in (p615_cols + p616_cols)))
 
     # =========================
-    # 5) Recodificar prevalencias (por tipo de delito)
+    # 3) Recodificar prevalencias (por tipo de delito)
     # =========================
     prev_cols = []
     for i in victim_ids:
@@ -103,43 +69,12 @@ def cargar_y_procesar_datos_victimizacion(archivo_o_df):
         prev_cols.append(colname)
 
     # =========================
-    # 6) Victimización total (≥1 evento)
+    # 4) Victimización total (≥1 evento)
     # =========================
     df["VIC_ANY"] = df[prev_cols].max(axis=1, skipna=True)
 
-    def weighted_mean(series, weights):
-        mask = series.notna()
-        if weights is not None:
-            mask = mask & weights.notna()
-        if mask.sum() == 0:
-            return np.nan
-        return np.average(series[mask], weights=weights[mask] if weights is not None else None)
-
-    # Agrupador por distrito
-    grouped = df.groupby(geo_col, dropna=False) if geo_col else None
-
-    # =========================
-    # 7) Agregación distrital: total y por tipo de delito
-    # =========================
-    if grouped is not None:
-        if weight_col:
-            dist_total = grouped.apply(lambda g: weighted_mean(g["VIC_ANY"], g[weight_col]) * 100)
-            dist_bytype = pd.DataFrame({
-                c: grouped.apply(lambda g, col=c: weighted_mean(g[col], g[weight_col]) * 100)
-                for c in prev_cols
-            })
-        else:
-            dist_total = grouped["VIC_ANY"].mean() * 100
-            dist_bytype = grouped[prev_cols].mean() * 100
-
-        dist_total = dist_total.rename("Victimizacion_total_%").reset_index()
-        dist_bytype = dist_bytype.reset_index()
-    else:
-        dist_total = pd.DataFrame(columns=["__NO_GEO__", "Victimizacion_total_%"])
-        dist_bytype = pd.DataFrame(columns=["__NO_GEO__"] + prev_cols)
-
     # =========================
-    # 8) Grupos (patrimoniales / no patrimoniales / informáticos / vandalismo)
+    # 5) Grupos (patrimoniales / no patrimoniales / informáticos / vandalismo)
     # =========================
     patrimoniales    = [f"VIC_{i:02d}" for i in range(1, 14)]    # 01–13
     no_patrimoniales = [f"VIC_{i:02d}" for i in range(14, 23)]   # 14–22
@@ -151,27 +86,33 @@ def cargar_y_procesar_datos_victimizacion(archivo_o_df):
     df["VIC_INFORMATICO"]    = df[informaticos].max(axis=1, skipna=True)     if set(informaticos)     <= set(df.columns) else np.nan
     df["VIC_VANDALISMO"]     = df[vandalismo].max(axis=1, skipna=True)       if set(vandalismo)       <= set(df.columns) else np.nan
 
-    if grouped is not None:
-        if weight_col:
-            dist_segmentado = grouped.apply(lambda g: pd.Series({
-                "Victimizacion_patrimonial_%":     weighted_mean(g["VIC_PATRIMONIAL"],   g[weight_col]) * 100,
-                "Victimizacion_no_patrimonial_%":  weighted_mean(g["VIC_NOPATRIMONIAL"], g[weight_col]) * 100,
-                "Victimizacion_informatico_%":     weighted_mean(g["VIC_INFORMATICO"],   g[weight_col]) * 100,
-                "Victimizacion_vandalismo_%":      weighted_mean(g["VIC_VANDALISMO"],    g[weight_col]) * 100
-            }))
-        else:
-            dist_segmentado = grouped[["VIC_PATRIMONIAL", "VIC_NOPATRIMONIAL", "VIC_INFORMATICO", "VIC_VANDALISMO"]].mean() * 100
-            dist_segmentado = dist_segmentado.rename(columns={
-                "VIC_PATRIMONIAL":    "Victimizacion_patrimonial_%",
-                "VIC_NOPATRIMONIAL":  "Victimizacion_no_patrimonial_%",
-                "VIC_INFORMATICO":    "Victimizacion_informatico_%",
-                "VIC_VANDALISMO":     "Victimizacion_vandalismo_%"
-            })
-        dist_segmentado = dist_segmentado.reset_index()
+    columnas = [c for c in (geo_col, weight_col) if c] + prev_cols + list(INDICADORES_VICTIMIZACION)
+    return df[columnas]
+
+
+# =========================
+# 6) Agregación distrital: total, por tipo de delito y por grupo (una sola pasada)
+# =========================
+def agregar_victimizacion(personas, geo_col, weight_col):
+    """Agrega la tabla por persona a nivel distrital: (dist_total, dist_segmentado)."""
+    if geo_col:
+        medias = medias_ponderadas(
+            personas, geo_col, list(INDICADORES_VICTIMIZACION), weight_col, dropna=False
+        ) * 100
+
+        dist_total = medias["VIC_ANY"].rename("Victimizacion_total_%").reset_index()
+        dist_segmentado = medias[list(SEGMENTOS_VICTIMIZACION)].rename(columns=SEGMENTOS_VICTIMIZACION).reset_index()
     else:
-        dist_segmentado = pd.DataFrame(columns=["__NO_GEO__", "Victimizacion_patrimonial_%", "Victimizacion_no_patrimonial_%", "Victimizacion_informatico_%", "Victimizacion_vandalismo_%"])
+        dist_total = pd.DataFrame(columns=["__NO_GEO__", "Victimizacion_total_%"])
+        dist_segmentado = pd.DataFrame(columns=["__NO_GEO__"] + list(SEGMENTOS_VICTIMIZACION.values()))
 
-    # =========================
-    # 9) Retornar los resultados
-    # =========================
-    return dist_total, dist_segmentado
\ No newline at end of file
+    return dist_total, dist_segmentado
+
+
+# =========================
+# 7) Cargar y procesar (flujo completo)
+# =========================
+def cargar_y_procesar_datos_victimizacion(archivo_o_df):
+    encuesta = preparar_encuesta(archivo_o_df)
+    personas = calcular_victimizacion_persona(encuesta)
+    return agregar_victimizacion(personas, encuesta.geo_col, encuesta.weight_col)
@@ -0,0 +1,150 @@
+"""
+Procesamiento por lotes de archivos ENAPRES, sin Streamlit.
+
+Uso:
+    python -m tratamiento_inei.procesar_lote ENAPRES_2023.zip ENAPRES_2024.zip --salida data/
+
+Por cada archivo (ZIP o CSV) escribe <nombre>_final.csv (mismo formato que
+data/INEI_DATA.csv), <nombre>_completo.csv y <nombre>_precision.csv (error
+estándar e IC 95% de cada métrica). Con --nacional escribe en su
+lugar <nombre>_nacional.csv con departamentos, provincias y distritos de todo
+el país. Los archivos se procesan en paralelo, uno por proceso.
+
+Con --historico cada archivo se agrega además a la serie histórica con el año
+de su nombre (ENAPRES_2023.zip -> 2023); los años ya registrados se omiten y
+los archivos que comparten año se reportan como error.
+"""
+import argparse
+import os
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from tratamiento_inei.lectura_enapres import leer_csv_lima_por_bloques, leer_csv_por_bloques, buscar_csv_enapres, TAMANO_BLOQUE
+from tratamiento_inei.pipeline_inei import procesar_encuesta
+from tratamiento_inei.pipeline_nacional import procesar_encuesta_nacional
+from tratamiento_inei.serie_anual import detectar_anio, anios_registrados, registrar_anio
+from utils.cache_resultados import clave_resultados, huella_miembro_zip, cargar_resultados, guardar_resultados
+
+
+def procesar_archivo(ruta, salida, tamano_bloque=TAMANO_BLOQUE, usar_cache=True, nacional=False, anio=None):
+    """
+    Procesa un ZIP o CSV de ENAPRES y escribe sus tablas (final y completa, o nacional).
+
+    Con `anio`, los agregados también se guardan en la serie histórica.
+    """
+    ruta = Path(ruta)
+    tablas = None
+
+    if nacional:
+        def leer(f):
+            return leer_csv_por_bloques(f, tamano_bloque=tamano_bloque)
+        procesar = procesar_encuesta_nacional
+        salidas = {"df_nacional": "nacional"}
+    else:
+        def leer(f):
+            return leer_csv_lima_por_bloques(f, tamano_bloque=tamano_bloque)
+        procesar = procesar_encuesta
+        salidas = {"df_final": "final", "df_completo": "completo", "df_precision": "precision"}
+
+    if zipfile.is_zipfile(ruta):
+        with zipfile.ZipFile(ruta) as zip_ref:
+            csv_file = buscar_csv_enapres(zip_ref.namelist())
+            if csv_file is None:
+                raise ValueError(f"{ruta}: el ZIP no contiene un CSV")
+
+            huella = huella_miembro_zip(zip_ref, csv_file)
+            clave = clave_resultados(f"{huella}-nacional" if nacional else huella)
+            if usar_cache:
+                tablas = cargar_resultados(clave)
+
+            if tablas is None:
+                with zip_ref.open(csv_file) as f:
+                    tablas = procesar(leer(f))
+                if usar_cache:
+                    guardar_resultados(clave, tablas)
+    else:
+        tablas = procesar(leer(ruta))
+
+    if anio is not None:
+        registrar_anio(anio, tablas, "nacional" if nacional else "lima", reemplazar=True)
+
+    salida = Path(salida)
+    salida.mkdir(parents=True, exist_ok=True)
+    rutas = []
+    for tabla, sufijo in salidas.items():
+        destino = salida / f"{ruta.stem}_{sufijo}.csv"
+        tablas[tabla].to_csv(destino, index=False)
+        rutas.append(destino)
+    return rutas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Procesa archivos ENAPRES (ZIP/CSV) sin la interfaz web.")
+    parser.add_argument("archivos", nargs="+", help="Archivos ZIP o CSV de ENAPRES")
+    parser.add_argument("--salida", default="data", help="Carpeta de salida (por defecto: data)")
+    parser.add_argument("--procesos", type=int, default=None,
+                        help="Procesos en paralelo (por defecto: núcleos disponibles)")
+    parser.add_argument("--tamano-bloque", type=int, default=TAMANO_BLOQUE,
+                        help="Filas por bloque al leer el CSV")
+    parser.add_argument("--sin-cache", action="store_true", help="No leer ni escribir la caché en disco")
+    parser.add_argument("--nacional", action="store_true",
+                        help="Todo el país (departamento/provincia/distrito por UBIGEO) en vez de Lima Metropolitana")
+    parser.add_argument("--historico", action="store_true",
+                        help="Agregar cada archivo a la serie histórica (año tomado del nombre)")
+    args = parser.parse_args(argv)
+
+    errores = 0
+    anios = {ruta: None for ruta in args.archivos}
+    if args.historico:
+        registrados = set(anios_registrados("nacional" if args.nacional else "lima"))
+        for ruta in args.archivos:
+            anio = detectar_anio(Path(ruta).name)
+            if anio is None:
+                errores += 1
+                print(f"[ERROR] {ruta}: no se encontró el año en el nombre del archivo", file=sys.stderr)
+                del anios[ruta]
+            elif anio in registrados:
+                print(f"[OMITIDO] {ruta}: el año {anio} ya está en la serie histórica")
+                del anios[ruta]
+            else:
+                anios[ruta] = anio
+
+        # Dos archivos del mismo año se pisarían en la serie: ninguno se procesa
+        por_anio = {}
+        for ruta, anio in anios.items():
+            por_anio.setdefault(anio, []).append(ruta)
+        for anio, rutas in por_anio.items():
+            if len(rutas) > 1:
+                for ruta in rutas:
+                    errores += 1
+                    print(f"[ERROR] {ruta}: el año {anio} también corresponde a "
+                          f"{', '.join(r for r in rutas if r != ruta)}", file=sys.stderr)
+                    del anios[ruta]
+
+    if not anios:
+        return 1 if errores else 0
+    procesos = args.procesos or min(len(anios), os.cpu_count() or 1)
+
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = {
+            pool.submit(procesar_archivo, ruta, args.salida, args.tamano_bloque,
+                        not args.sin_cache, args.nacional, anio): ruta
+            for ruta, anio in anios.items()
+        }
+        for futuro in as_completed(futuros):
+            ruta = futuros[futuro]
+            try:
+                rutas = futuro.result()
+            except Exception as e:
+                errores += 1
+                print(f"[ERROR] {ruta}: {e}", file=sys.stderr)
+            else:
+                print(f"[OK] {ruta} -> {', '.join(map(str, rutas))}")
+
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
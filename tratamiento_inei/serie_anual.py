@@ -0,0 +1,159 @@
+"""
+Serie histórica de ENAPRES: un archivo de agregados por año.
+
+Cada año se procesa una sola vez y se guardan, por distrito y métrica, los
+estadísticos suficientes (suma de w·x, suma de w y n) junto con el valor en
+%. Los años nuevos se agregan sin tocar los anteriores. Las series y las
+variaciones interanuales se calculan solo con esos agregados, nunca con los
+microdatos.
+
+Estructura en disco (por defecto data/historico/, o TESIS_HISTORICO_DIR):
+    <ambito>/<anio>.parquet   columnas ANIO, <clave>, METRICA, SUMA_WX, SUMA_W, N, VALOR
+"""
+import os
+import re
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from tratamiento_inei.agregacion_ponderada import sumas_ponderadas
+from tratamiento_inei.pipeline_inei import unir_indicadores
+from tratamiento_inei.preparacion_encuesta import PATRON_PESO
+
+DIR_HISTORICO = Path(os.environ.get(
+    "TESIS_HISTORICO_DIR",
+    Path(__file__).resolve().parent.parent / "data" / "historico",
+))
+
+# Columna de geografía de cada ámbito (ver preparar_encuesta)
+CLAVE_AMBITO = {"lima": "NOMBREDI", "nacional": "UBIGEO"}
+
+
+def detectar_anio(nombre):
+    """Año de la encuesta a partir del nombre del archivo ("ENAPRES_2023.zip" -> 2023), o None."""
+    encontrados = re.findall(r"(?<!\d)(20\d{2})(?!\d)", str(nombre))
+    return int(encontrados[-1]) if encontrados else None
+
+
+def _ruta_anio(anio, ambito):
+    return DIR_HISTORICO / ambito / f"{int(anio)}.parquet"
+
+
+# =========================
+# Registro incremental
+# =========================
+def agregados_anio(anio, tablas, ambito="lima"):
+    """
+    Estadísticos suficientes por distrito y métrica para un año.
+
+    `tablas` es el resultado de `procesar_encuesta` (o de la caché): solo se
+    usan las tablas por persona, así que no hace falta volver a leer el CSV.
+    """
+    geo_col = CLAVE_AMBITO[ambito]
+    personas = tablas["personas_victimizacion"]
+    if geo_col not in personas.columns:
+        raise ValueError(f"Las tablas por persona no tienen la columna {geo_col} (ámbito {ambito}).")
+    weight_col = next((c for c in personas.columns if re.search(PATRON_PESO, c, re.IGNORECASE)), None)
+
+    tabla = unir_indicadores(tablas, geo_col, weight_col)
+    metricas = [c for c in tabla.columns if c not in (geo_col, weight_col)]
+    suma_wx, suma_w, n = sumas_ponderadas(tabla, geo_col, metricas, weight_col)
+
+    largo = pd.concat({"SUMA_WX": suma_wx.stack(), "SUMA_W": suma_w.stack(), "N": n.stack()}, axis=1)
+    largo.index.names = [geo_col, "METRICA"]
+    largo = largo.reset_index()
+    largo.insert(0, "ANIO", int(anio))
+    largo["VALOR"] = _valor(largo)
+    return largo
+
+
+def _valor(df):
+    """Valor en % desde los estadísticos suficientes (NaN si no hay datos válidos)."""
+    return (df["SUMA_WX"] / df["SUMA_W"] * 100).where(df["N"] > 0)
+
+
+def registrar_anio(anio, tablas, ambito="lima", reemplazar=False):
+    """
+    Guarda los agregados de un año en la serie histórica.
+
+    Si el año ya está guardado no se recalcula, salvo con `reemplazar=True`.
+    Devuelve la ruta del archivo del año.
+    """
+    ruta = _ruta_anio(anio, ambito)
+    if ruta.exists() and not reemplazar:
+        return ruta
+
+    agregados = agregados_anio(anio, tablas, ambito)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    # Escritura atómica: nunca queda un año a medio escribir
+    fd, tmp = tempfile.mkstemp(dir=ruta.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        agregados.to_parquet(tmp, index=False)
+        os.replace(tmp, ruta)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return ruta
+
+
+def anios_registrados(ambito="lima"):
+    """Años guardados en la serie, en orden."""
+    carpeta = DIR_HISTORICO / ambito
+    if not carpeta.exists():
+        return []
+    return sorted(int(p.stem) for p in carpeta.glob("*.parquet") if p.stem.isdigit())
+
+
+def cargar_historico(ambito="lima", anios=None):
+    """Agregados de todos los años (o de `anios`) en una sola tabla larga."""
+    anios = anios_registrados(ambito) if anios is None else anios
+    partes = [pd.read_parquet(_ruta_anio(a, ambito)) for a in anios]
+    if not partes:
+        clave = CLAVE_AMBITO[ambito]
+        return pd.DataFrame(columns=["ANIO", clave, "METRICA", "SUMA_WX", "SUMA_W", "N", "VALOR"])
+    return pd.concat(partes, ignore_index=True)
+
+
+# =========================
+# Consultas
+# =========================
+def _agregados_metrica(metrica, ambito, largo_ubigeo):
+    clave = CLAVE_AMBITO[ambito]
+    df = cargar_historico(ambito)
+    df = df[df["METRICA"] == metrica]
+
+    if largo_ubigeo is not None and ambito == "nacional" and largo_ubigeo < 6:
+        # Provincias o departamentos: se suman los estadísticos de sus distritos
+        df = (df.assign(**{clave: df[clave].astype(str).str[:largo_ubigeo]})
+                .groupby(["ANIO", clave, "METRICA"], as_index=False)[["SUMA_WX", "SUMA_W", "N"]].sum())
+        df["VALOR"] = _valor(df)
+    return df, clave
+
+
+def serie_temporal(metrica, ambito="lima", largo_ubigeo=None):
+    """
+    Serie de una métrica: una fila por distrito (o provincia/departamento) y una columna por año.
+
+    En el ámbito nacional, `largo_ubigeo` 4 o 2 agrega a provincia o departamento.
+    """
+    df, clave = _agregados_metrica(metrica, ambito, largo_ubigeo)
+    return df.pivot(index=clave, columns="ANIO", values="VALOR").sort_index()
+
+
+def variacion_interanual(metrica, ambito="lima", largo_ubigeo=None):
+    """
+    Variación respecto del año anterior registrado, en puntos porcentuales.
+
+    Devuelve una fila por distrito y año con VALOR, ANIO_ANTERIOR,
+    VALOR_ANTERIOR y VARIACION_PP (NaN en el primer año de cada distrito).
+    """
+    df, clave = _agregados_metrica(metrica, ambito, largo_ubigeo)
+    df = df.sort_values([clave, "ANIO"])[[clave, "ANIO", "VALOR"]].reset_index(drop=True)
+
+    anterior = df.groupby(clave, sort=False)[["ANIO", "VALOR"]].shift()
+    df["ANIO_ANTERIOR"] = anterior["ANIO"].astype("Int64")
+    df["VALOR_ANTERIOR"] = anterior["VALOR"]
+    df["VARIACION_PP"] = df["VALOR"] - df["VALOR_ANTERIOR"]
+    return df
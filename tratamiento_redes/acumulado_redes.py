@@ -0,0 +1,212 @@
+"""
+Acumulado incremental de comentarios de redes sociales por fuente.
+
+Por fuente (YouTube, Twitter, ...) se guardan solo los estadísticos
+suficientes por distrito: los conteos de `COLUMNAS_CONTEO` (comentarios y
+comentarios de cada clase). Cada lote nuevo (p. ej. el volcado del día) se
+procesa una vez y se suma al acumulado, así el costo de una actualización
+depende del tamaño del lote y no de toda la historia. Las métricas se
+calculan al vuelo desde los conteos.
+
+Uso (p. ej. una vez al día, con el volcado nuevo):
+    python -m tratamiento_redes.acumulado_redes youtube comentarios_2024-05-01.jsonl --salida data/YT_DATA.csv
+
+Estructura en disco (por defecto data/redes/, o TESIS_REDES_DIR):
+    <fuente>.parquet   índice NOMBREDI, columnas COLUMNAS_CONTEO; los lotes ya
+                       sumados van en los metadatos (attrs["lotes"])
+    <fuente>.lock      bloqueo entre procesos: dos actualizaciones de la misma
+                       fuente a la vez (p. ej. cron y una corrida manual) se
+                       suman una después de la otra
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from tratamiento_redes.gazetteer import DISTRITOS_LIMA
+from tratamiento_redes.lectura_comentarios import TAMANO_BLOQUE
+from tratamiento_redes.pipeline_redes import COLUMNAS_CONTEO, metricas_distritales, procesar_comentarios
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+DIR_REDES = Path(os.environ.get(
+    "TESIS_REDES_DIR",
+    Path(__file__).resolve().parent.parent / "data" / "redes",
+))
+
+
+def _ruta_fuente(fuente):
+    return DIR_REDES / f"{fuente}.parquet"
+
+
+def conteos_vacios():
+    """Conteos en cero para todos los distritos, sin lotes."""
+    conteos = pd.DataFrame(np.zeros((len(DISTRITOS_LIMA), len(COLUMNAS_CONTEO)), dtype=np.int64),
+                           index=pd.Index(DISTRITOS_LIMA, name="NOMBREDI"), columns=COLUMNAS_CONTEO)
+    conteos.attrs["lotes"] = []
+    return conteos
+
+
+def huella_archivos(rutas):
+    """Identificador de un lote a partir de sus archivos (nombre, tamaño y fecha de modificación)."""
+    h = hashlib.blake2b(digest_size=8)
+    for ruta in sorted(map(Path, rutas)):
+        estado = ruta.stat()
+        h.update(f"{ruta.name}|{estado.st_size}|{estado.st_mtime_ns}".encode("utf-8"))
+    return h.hexdigest()
+
+
+# =========================
+# Lectura / escritura
+# =========================
+def cargar_acumulado(fuente):
+    """Conteos acumulados de la fuente (en cero si todavía no tiene lotes)."""
+    ruta = _ruta_fuente(fuente)
+    if not ruta.exists():
+        return conteos_vacios()
+    conteos = pd.read_parquet(ruta)
+    conteos.attrs["lotes"] = list(conteos.attrs.get("lotes", []))
+    return conteos
+
+
+def version_acumulado(fuente):
+    """Marca que cambia cada vez que se suma un lote (None si la fuente no existe)."""
+    ruta = _ruta_fuente(fuente)
+    return ruta.stat().st_mtime_ns if ruta.exists() else None
+
+
+def _guardar(fuente, conteos):
+    ruta = _ruta_fuente(fuente)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    # Escritura atómica: conteos y lista de lotes cambian juntos o no cambian
+    fd, tmp = tempfile.mkstemp(dir=ruta.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        conteos.to_parquet(tmp)
+        os.replace(tmp, ruta)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return ruta
+
+
+@contextmanager
+def _bloqueo(fuente):
+    """Bloqueo exclusivo (entre procesos) de la secuencia leer-sumar-guardar de una fuente."""
+    ruta = DIR_REDES / f"{fuente}.lock"
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    with open(ruta, "a+b") as f:
+        if os.name == "nt":
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK se rinde tras unos segundos: se sigue esperando
+                    pass
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+# =========================
+# Actualización incremental
+# =========================
+def sumar_conteos(acumulado, conteos, lote):
+    """
+    Nuevo acumulado con los conteos de un lote sumados (sin tocar el disco).
+
+    `conteos` puede ser la tabla de `procesar_comentarios` o la matriz de
+    `conteos_bloque`. Si `lote` ya está en el acumulado se devuelve sin cambios, así repetir
+    una actualización no cuenta dos veces los mismos comentarios.
+    """
+    if lote in acumulado.attrs["lotes"]:
+        return acumulado
+    if isinstance(conteos, np.ndarray):
+        conteos = pd.DataFrame(conteos, index=acumulado.index, columns=COLUMNAS_CONTEO)
+    conteos = conteos.reindex(index=acumulado.index, columns=COLUMNAS_CONTEO, fill_value=0)
+    nuevo = acumulado + conteos.astype(np.int64)
+    nuevo.attrs["lotes"] = acumulado.attrs["lotes"] + [lote]
+    return nuevo
+
+
+def registrar_conteos(fuente, conteos, lote):
+    """
+    Suma los conteos de un lote ya procesado al acumulado de la fuente y lo guarda.
+
+    Lectura, suma y escritura van bajo el bloqueo de la fuente: con dos
+    procesos a la vez ningún lote se pierde.
+    """
+    with _bloqueo(fuente):
+        acumulado = cargar_acumulado(fuente)
+        nuevo = sumar_conteos(acumulado, conteos, lote)
+        if nuevo is not acumulado:
+            _guardar(fuente, nuevo)
+    return nuevo
+
+
+def registrar_archivos(fuente, rutas, lote=None, procesos=None, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Procesa los volcados de un lote y los suma al acumulado de la fuente.
+
+    Por defecto el lote se identifica por `huella_archivos(rutas)`; si ya fue
+    sumado, los archivos no se vuelven a leer. El procesamiento corre fuera
+    del bloqueo; `registrar_conteos` vuelve a comprobar el lote al sumarlo.
+    """
+    lote = lote or huella_archivos(rutas)
+    acumulado = cargar_acumulado(fuente)
+    if lote in acumulado.attrs["lotes"]:
+        return acumulado
+    return registrar_conteos(fuente, procesar_comentarios(rutas, procesos, tamano_bloque), lote)
+
+
+def metricas_acumuladas(fuente, min_comentarios=1):
+    """Tabla de métricas de la fuente con todos los lotes (esquema de data/YT_DATA.csv)."""
+    return metricas_distritales(cargar_acumulado(fuente), min_comentarios)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suma un lote de comentarios al acumulado de una fuente.")
+    parser.add_argument("fuente", help="Nombre de la fuente (p. ej. youtube, twitter)")
+    parser.add_argument("archivos", nargs="+", help="Volcados del lote (JSONL o CSV, opcionalmente .gz)")
+    parser.add_argument("--lote", default=None,
+                        help="Identificador del lote (por defecto: huella de los archivos)")
+    parser.add_argument("--salida", default=None, help="CSV de métricas actualizado (formato de data/YT_DATA.csv)")
+    parser.add_argument("--procesos", type=int, default=None,
+                        help="Procesos en paralelo (por defecto: núcleos disponibles)")
+    parser.add_argument("--tamano-bloque", type=int, default=TAMANO_BLOQUE,
+                        help="Comentarios por bloque al leer")
+    parser.add_argument("--min-comentarios", type=int, default=1,
+                        help="Comentarios mínimos para publicar las métricas de un distrito")
+    args = parser.parse_args(argv)
+
+    lotes_previos = len(cargar_acumulado(args.fuente).attrs["lotes"])
+    acumulado = registrar_archivos(args.fuente, args.archivos, args.lote, args.procesos, args.tamano_bloque)
+    if args.salida:
+        metricas_distritales(acumulado, args.min_comentarios).to_csv(args.salida, index=False)
+
+    estado = "lote nuevo sumado" if len(acumulado.attrs["lotes"]) > lotes_previos else "lote ya registrado"
+    print(f"{args.fuente}: {estado}; {len(acumulado.attrs['lotes'])} lotes, "
+          f"{int(acumulado['N_COMENTARIOS'].sum()):,} comentarios con distrito", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
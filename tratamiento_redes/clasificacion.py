@@ -0,0 +1,132 @@
+"""
+Clasificación de comentarios con léxicos (sin modelos, solo CPU).
+
+Cada comentario normalizado se marca como relato de victimización,
+percepción de inseguridad y, si menciona a la policía, confianza o
+desconfianza en la PNP. Son aproximaciones a los indicadores de INEI.
+Se clasifica por lotes: cada palabra del lote se cruza una vez con el
+vocabulario de los léxicos, sin recorrer el texto una vez por léxico.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Frases en texto normalizado (mayúsculas, sin tildes ni signos)
+LEXICOS = {
+    # Relato de un delito sufrido por quien escribe o su entorno cercano
+    "VICTIMIZACION": (
+        "ME ROBARON", "NOS ROBARON", "ME ASALTARON", "NOS ASALTARON", "ME ARRANCHARON",
+        "ME ARREBATARON", "ME BAJARON", "ME CLONARON", "ME ESTAFARON", "ME EXTORSIONAN",
+        "NOS EXTORSIONAN", "FUI VICTIMA", "FUIMOS VICTIMAS", "ENTRARON A ROBAR",
+        "ROBARON A MI", "ASALTARON A MI", "ME QUISIERON ROBAR", "ME ACUCHILLARON",
+        "ME GOLPEARON PARA ROBAR", "ME SECUESTRARON",
+    ),
+    # Percepción de inseguridad en la zona
+    "INSEGURIDAD": (
+        "INSEGURO", "INSEGURA", "INSEGURIDAD", "PELIGROSO", "PELIGROSA", "MIEDO",
+        "TEMOR", "DELINCUENCIA", "DELINCUENTES", "RATEROS", "ZONA ROJA", "SICARIOS",
+        "SICARIATO", "EXTORSION", "NADIE ESTA SEGURO", "NO SE PUEDE CAMINAR",
+        "NO SE PUEDE SALIR", "TIERRA DE NADIE",
+    ),
+    # Mención de la policía (condición para medir confianza)
+    "POLICIA": ("POLICIA", "POLICIAS", "PNP", "COMISARIA", "POLI", "TOMBOS", "AGENTES POLICIALES"),
+    "CONFIANZA_PNP": (
+        "GRACIAS A LA POLICIA", "BUEN TRABAJO", "EXCELENTE TRABAJO", "EXCELENTE LABOR",
+        "FELICITACIONES", "FELICITO", "BIEN HECHO", "CONFIO EN LA POLICIA", "HEROES",
+        "LLEGARON RAPIDO", "GRAN LABOR",
+    ),
+    "DESCONFIANZA_PNP": (
+        "CORRUPTA", "CORRUPTOS", "CORRUPCION", "COIMA", "COIMEROS", "NO HACEN NADA",
+        "NO CONFIO", "NO SIRVEN", "NO SIRVE", "INUTILES", "INEPTOS", "NUNCA LLEGAN",
+        "NUNCA LLEGO", "COMPLICES", "VERGUENZA", "NI CASO",
+    ),
+}
+
+COLUMNAS_CLASES = ["VICTIMIZACION", "INSEGURIDAD", "CONFIANZA_PNP", "DESCONFIANZA_PNP"]
+
+
+class ClasificadorLexico:
+    """
+    Marca cada texto normalizado con las clases de `COLUMNAS_CLASES`.
+
+    En vez de buscar cada léxico en el texto, los comentarios de un lote se
+    parten en palabras y cada palabra se reemplaza por su número en el
+    vocabulario de los léxicos (0 si no aparece en ninguna frase). Una frase
+    de k palabras es un número en base len(vocabulario) + 1, y una tabla
+    ordenada por largo de frase da las clases (bits) de cada número. Solo se
+    buscan las frases que empiezan en palabras del vocabulario, que son pocas.
+    """
+
+    def __init__(self, lexicos=LEXICOS):
+        self.lexicos = lexicos
+        self.bits = {clase: 1 << i for i, clase in enumerate(lexicos)}
+        frases = {}
+        for clase, lista in lexicos.items():
+            for frase in lista:
+                frases[tuple(frase.split())] = frases.get(tuple(frase.split()), 0) | self.bits[clase]
+
+        self.vocabulario = pa.array(sorted({palabra for frase in frases for palabra in frase}))
+        numero = {palabra: i for i, palabra in enumerate(self.vocabulario.to_pylist(), start=1)}
+        self._base = len(numero) + 1
+        if self._base ** max(map(len, frases)) >= 2 ** 63:
+            raise ValueError("Léxicos demasiado grandes para codificar las frases en 64 bits.")
+
+        # Largo de frase -> (códigos ordenados, bits de clase)
+        self._frases = {}
+        for largo in sorted({len(f) for f in frases}):
+            tabla = {self._codigo([numero[p] for p in f]): bits for f, bits in frases.items() if len(f) == largo}
+            codigos = np.array(sorted(tabla), dtype=np.int64)
+            self._frases[largo] = (codigos, np.array([tabla[c] for c in codigos], dtype=np.int64))
+
+    def _codigo(self, numeros):
+        codigo = 0
+        for n in numeros:
+            codigo = codigo * self._base + n
+        return codigo
+
+    def mascaras(self, textos):
+        """OR de los bits de clase de todas las frases presentes en cada texto."""
+        textos = pa.array(textos, type=pa.large_string())
+        if isinstance(textos, pa.ChunkedArray):
+            textos = textos.combine_chunks()
+        palabras = pc.split_pattern(textos, " ")
+        # Texto al que pertenece cada palabra de la lista plana
+        texto_de = pc.list_parent_indices(palabras).to_numpy()
+        ids = pc.index_in(pc.list_flatten(palabras), value_set=self.vocabulario).fill_null(-1).to_numpy() + 1
+        # Los textos normalizados empiezan y terminan en espacio: las palabras
+        # vacías de los extremos (id 0) impiden que una frase cruce de un texto a otro
+        ids = np.append(ids, np.zeros(max(self._frases), dtype=ids.dtype))
+
+        candidatas = np.flatnonzero(ids)
+        mascaras = np.zeros(len(textos), dtype=np.int64)
+        for largo, (codigos, bits) in self._frases.items():
+            codigo = np.zeros(len(candidatas), dtype=np.int64)
+            for j in range(largo):
+                codigo = codigo * self._base + ids[candidatas + j]
+            pos = np.minimum(np.searchsorted(codigos, codigo), len(codigos) - 1)
+            encontradas = np.flatnonzero(codigos[pos] == codigo)
+            np.bitwise_or.at(mascaras, texto_de[candidatas[encontradas]], bits[pos[encontradas]])
+        return mascaras
+
+    def clasificar(self, textos):
+        """DataFrame booleano (una columna por clase) alineado con `textos`."""
+        mascaras = self.mascaras(textos)
+        marcas = {clase: (mascaras & bit) != 0 for clase, bit in self.bits.items()}
+        return _resolver(marcas, textos.index)
+
+
+def _resolver(marcas, index):
+    """
+    Reglas entre clases: la confianza solo cuenta si se menciona a la policía,
+    y si hay señales de confianza y desconfianza prevalece la desconfianza
+    ("no confío en la policía" contiene "confío").
+    """
+    desconfianza = marcas["POLICIA"] & marcas["DESCONFIANZA_PNP"]
+    confianza = marcas["POLICIA"] & marcas["CONFIANZA_PNP"] & ~desconfianza
+    return pd.DataFrame({
+        "VICTIMIZACION": marcas["VICTIMIZACION"],
+        "INSEGURIDAD": marcas["INSEGURIDAD"],
+        "CONFIANZA_PNP": confianza,
+        "DESCONFIANZA_PNP": desconfianza,
+    }, index=index)
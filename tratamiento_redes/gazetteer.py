@@ -0,0 +1,208 @@
+"""
+Geo-etiquetado de comentarios a distritos de Lima Metropolitana.
+
+Busca en el texto normalizado (ver `normalizar_textos`) los nombres de los
+distritos, sus alias y lugares conocidos, y asigna a cada comentario el
+distrito de su primera mención. Todos los patrones se buscan a la vez con
+un autómata de Aho-Corasick, en una sola pasada por comentario.
+"""
+from collections import deque
+
+import numpy as np
+
+from utils.geometrias import ALIAS_DISTRITOS
+from utils.normalizacion import normalizar_nombre
+
+# Distritos de Lima Metropolitana en el orden del UBIGEO (150101 = LIMA, ...),
+# escritos como en los CSV de INEI y redes sociales (columna NOMBREDI)
+DISTRITOS_LIMA = (
+    "LIMA", "ANCON", "ATE", "BARRANCO", "BRENA", "CARABAYLLO", "CHACLACAYO",
+    "CHORRILLOS", "CIENEGUILLA", "COMAS", "EL AGUSTINO", "INDEPENDENCIA",
+    "JESUS MARIA", "LA MOLINA", "LA VICTORIA", "LINCE", "LOS OLIVOS",
+    "LURIGANCHO", "LURIN", "MAGDALENA DEL MAR", "PUEBLO LIBRE", "MIRAFLORES",
+    "PACHACAMAC", "PUCUSANA", "PUENTE PIEDRA", "PUNTA HERMOSA", "PUNTA NEGRA",
+    "RIMAC", "SAN BARTOLO", "SAN BORJA", "SAN ISIDRO", "SAN JUAN DE LURIGANCHO",
+    "SAN JUAN DE MIRAFLORES", "SAN LUIS", "SAN MARTIN DE PORRES", "SAN MIGUEL",
+    "SANTA ANITA", "SANTA MARIA DEL MAR", "SANTA ROSA", "SANTIAGO DE SURCO",
+    "SURQUILLO", "VILLA EL SALVADOR", "VILLA MARIA DEL TRIUNFO",
+)
+
+# Formas en que los comentarios nombran a un distrito sin usar el nombre oficial
+ALIAS_REDES = {
+    "CERCADO DE LIMA": "LIMA",
+    "CENTRO DE LIMA": "LIMA",
+    "MESA REDONDA": "LIMA",
+    "VITARTE": "ATE",
+    "HUAYCAN": "ATE",
+    "SALAMANCA": "ATE",
+    "GAMARRA": "LA VICTORIA",
+    "PLAZA NORTE": "INDEPENDENCIA",
+    "MEGA PLAZA": "INDEPENDENCIA",
+    "MEGAPLAZA": "INDEPENDENCIA",
+    "LARCOMAR": "MIRAFLORES",
+    "MANCHAY": "PACHACAMAC",
+    "HUACHIPA": "LURIGANCHO",
+    "CHOSICA": "LURIGANCHO",
+    "SJL": "SAN JUAN DE LURIGANCHO",
+    "ZARATE": "SAN JUAN DE LURIGANCHO",
+    "CANTO GRANDE": "SAN JUAN DE LURIGANCHO",
+    "SJM": "SAN JUAN DE MIRAFLORES",
+    "SMP": "SAN MARTIN DE PORRES",
+    "VES": "VILLA EL SALVADOR",
+    "VMT": "VILLA MARIA DEL TRIUNFO",
+    "SURCO": "SANTIAGO DE SURCO",
+    "JOCKEY PLAZA": "SANTIAGO DE SURCO",
+    "MAGDALENA": "MAGDALENA DEL MAR",
+}
+
+# "Lima" casi siempre es la ciudad: el Cercado solo se reconoce por sus alias
+SOLO_POR_ALIAS = {"LIMA"}
+# Nombres que también son palabras comunes: solo cuentan precedidos de un contexto
+NOMBRES_AMBIGUOS = {"INDEPENDENCIA", "COMAS", "BARRANCO", "LA VICTORIA", "SAN LUIS", "SAN MIGUEL", "SANTA ROSA"}
+CONTEXTOS = ("EN", "DE", "DESDE", "DISTRITO DE", "VIVO EN")
+
+
+def patrones_distritos():
+    """
+    Diccionario patrón -> índice del distrito en DISTRITOS_LIMA.
+
+    Los patrones van rodeados de espacios, igual que el texto normalizado, así
+    solo coinciden palabras completas.
+    """
+    indice = {nombre: i for i, nombre in enumerate(DISTRITOS_LIMA)}
+    alias = {normalizar_nombre(k): normalizar_nombre(v) for k, v in ALIAS_DISTRITOS.items()}
+    alias.update(ALIAS_REDES)
+
+    patrones = {}
+    for nombre, i in indice.items():
+        if nombre in SOLO_POR_ALIAS:
+            continue
+        if nombre in NOMBRES_AMBIGUOS:
+            for contexto in CONTEXTOS:
+                patrones[f" {contexto} {nombre} "] = i
+        else:
+            patrones[f" {nombre} "] = i
+    for variante, nombre in alias.items():
+        if variante != nombre and nombre in indice:
+            patrones[f" {variante} "] = indice[nombre]
+    return patrones
+
+
+# =========================
+# Autómata Aho-Corasick
+# =========================
+# Alfabeto del texto normalizado: espacio, A-Z y 0-9 (todo lo demás cuenta como espacio)
+ALFABETO = " ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+_SIMBOLO = np.zeros(256, dtype=np.uint8)
+for _i, _c in enumerate(ALFABETO):
+    _SIMBOLO[ord(_c)] = _i
+
+
+class AutomataAhoCorasick:
+    """
+    Autómata de Aho-Corasick como tabla de transiciones completa (DFA).
+
+    - transiciones[estado, símbolo] -> estado siguiente
+    - largo_salida[estado]: largo del patrón más largo que termina en ese estado (0 si ninguno)
+    - valor_salida[estado]: valor asociado a ese patrón
+
+    Con la tabla completa cada carácter es una sola búsqueda, sin seguir
+    enlaces de fallo al recorrer el texto.
+    """
+
+    def __init__(self, patrones):
+        hijos = [{}]
+        terminal = [None]
+        for patron, valor in patrones.items():
+            estado = 0
+            for simbolo in _SIMBOLO[np.frombuffer(patron.encode("ascii"), dtype=np.uint8)]:
+                if simbolo not in hijos[estado]:
+                    hijos.append({})
+                    terminal.append(None)
+                    hijos[estado][simbolo] = len(hijos) - 1
+                estado = hijos[estado][simbolo]
+            terminal[estado] = (len(patron), valor)
+
+        n = len(hijos)
+        self.transiciones = np.zeros((n, len(ALFABETO)), dtype=np.int32)
+        self.largo_salida = np.zeros(n, dtype=np.int32)
+        self.valor_salida = np.full(n, -1, dtype=np.int64)
+
+        # Recorrido en anchura: el fallo de un estado ya tiene su fila completa
+        fallo = np.zeros(n, dtype=np.int32)
+        cola = deque()
+        for simbolo, hijo in hijos[0].items():
+            self.transiciones[0, simbolo] = hijo
+            cola.append(hijo)
+        while cola:
+            estado = cola.popleft()
+            f = fallo[estado]
+            if terminal[estado] is not None:
+                self.largo_salida[estado], self.valor_salida[estado] = terminal[estado]
+            elif self.largo_salida[f]:
+                self.largo_salida[estado], self.valor_salida[estado] = self.largo_salida[f], self.valor_salida[f]
+            self.transiciones[estado] = self.transiciones[f]
+            for simbolo, hijo in hijos[estado].items():
+                fallo[hijo] = self.transiciones[f, simbolo]
+                self.transiciones[estado, simbolo] = hijo
+                cola.append(hijo)
+
+        # Tabla plana con estado * len(ALFABETO): estado + símbolo es directamente el índice
+        self._tabla = (self.transiciones * len(ALFABETO)).ravel().astype(np.intp)
+        self._hay_salida = np.repeat(self.largo_salida > 0, len(ALFABETO))
+
+    def primera_mencion(self, textos):
+        """
+        Valor del patrón más a la izquierda de cada texto (el más largo si
+        empiezan en la misma posición), o -1 si no hay ninguno.
+
+        Todos los textos avanzan a la vez, un carácter por paso: la cantidad
+        de pasos es el largo del texto más largo y el trabajo total es lineal
+        en la cantidad de caracteres.
+        """
+        textos = textos.tolist() if hasattr(textos, "tolist") else list(textos)
+        n = len(textos)
+        largos = np.fromiter(map(len, textos), dtype=np.intp, count=n)
+        simbolos = _SIMBOLO[np.frombuffer("".join(textos).encode("ascii", "replace"), dtype=np.uint8)]
+
+        # De más largo a más corto: en el paso i los textos activos son un prefijo
+        orden = np.argsort(-largos, kind="stable")
+        inicio_texto = (np.cumsum(largos) - largos)[orden]
+        largos = largos[orden]
+        activos = np.searchsorted(-largos, -np.arange(largos[0] if n else 0), side="left")
+        inicio_paso = np.cumsum(activos) - activos
+
+        # Estados visitados, agrupados por paso (tramos contiguos)
+        estados = np.empty(len(simbolos), dtype=np.intp)
+        estado = np.zeros(n, dtype=np.intp)
+        for i, (a, k) in enumerate(zip(inicio_paso.tolist(), activos.tolist())):
+            e = estado[:k]
+            np.add(e, simbolos.take(inicio_texto[:k] + i), out=e)
+            self._tabla.take(e, out=e)
+            estados[a:a + k] = e
+
+        # Fin de cada coincidencia -> (texto, comienzo); por texto gana la que
+        # empieza antes y, si empatan, la más larga
+        fin = np.flatnonzero(self._hay_salida.take(estados))
+        paso = np.searchsorted(inicio_paso, fin, side="right") - 1
+        fila = fin - inicio_paso[paso]
+        estado_fin = estados[fin] // len(ALFABETO)
+        largo = self.largo_salida[estado_fin]
+        prioridad = np.lexsort((-largo, paso - largo, fila))
+        primera = prioridad[np.r_[True, fila[prioridad][1:] != fila[prioridad][:-1]]] if len(fin) else prioridad
+
+        resultado = np.full(n, -1, dtype=np.int64)
+        resultado[orden[fila[primera]]] = self.valor_salida[estado_fin[primera]]
+        return resultado
+
+
+class Gazetteer:
+    """Asigna a cada texto normalizado el índice del primer distrito mencionado (-1 si ninguno)."""
+
+    def __init__(self, patrones=None):
+        self.patrones = patrones_distritos() if patrones is None else patrones
+        self.automata = AutomataAhoCorasick(self.patrones)
+
+    def codigos(self, textos):
+        """Vector de índices de distrito para una Serie de textos normalizados (una pasada por texto)."""
+        return self.automata.primera_mencion(textos)
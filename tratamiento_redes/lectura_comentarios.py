@@ -0,0 +1,117 @@
+"""
+Lectura en flujo de volcados de comentarios (JSONL o CSV, opcionalmente .gz).
+
+Los archivos se leen por bloques de filas, así la memoria depende del tamaño
+del bloque y no del archivo. Un JSONL sin comprimir se puede partir en
+fragmentos por rango de bytes para leerlos en paralelo; CSV y comprimidos
+son un solo fragmento.
+"""
+import io
+import os
+import re
+from dataclasses import dataclass
+
+import pandas as pd
+
+# Columnas reconocidas (sin distinguir mayúsculas) según la API de origen
+COLUMNAS_TEXTO = ("texto", "text", "comentario", "comment", "textoriginal", "textdisplay", "full_text", "content")
+COLUMNAS_DISTRITO = ("nombredi", "distrito")
+TAMANO_BLOQUE = 100_000
+# Un JSONL se parte en fragmentos de al menos este tamaño
+BYTES_MINIMOS_FRAGMENTO = 64 * 1024 ** 2
+
+
+@dataclass(frozen=True)
+class Fragmento:
+    """Rango de bytes [inicio, fin) de un archivo; fin=None es hasta el final."""
+    ruta: str
+    inicio: int = 0
+    fin: int | None = None
+
+
+def _es_jsonl(ruta):
+    return re.search(r"\.(jsonl|ndjson|json)(\.gz)?$", str(ruta), re.IGNORECASE) is not None
+
+
+def _comprimido(ruta):
+    return str(ruta).lower().endswith(".gz")
+
+
+def fragmentar(rutas, partes_por_archivo=1):
+    """
+    Fragmentos de lectura para una lista de archivos.
+
+    Cada JSONL sin comprimir se divide en hasta `partes_por_archivo` rangos de
+    bytes (de al menos BYTES_MINIMOS_FRAGMENTO); el resto queda entero.
+    """
+    fragmentos = []
+    for ruta in map(str, rutas):
+        tamano = os.path.getsize(ruta)
+        partes = min(partes_por_archivo, max(1, tamano // BYTES_MINIMOS_FRAGMENTO))
+        if not _es_jsonl(ruta) or _comprimido(ruta) or partes <= 1:
+            fragmentos.append(Fragmento(ruta))
+            continue
+        cortes = [tamano * i // partes for i in range(partes + 1)]
+        fragmentos.extend(Fragmento(ruta, a, b) for a, b in zip(cortes[:-1], cortes[1:]))
+    return fragmentos
+
+
+def _columna(columnas, candidatas):
+    por_nombre = {str(c).lower(): c for c in columnas}
+    return next((por_nombre[c] for c in candidatas if c in por_nombre), None)
+
+
+def _estandarizar(bloque):
+    """Deja solo TEXTO y, si viene en el volcado, NOMBREDI."""
+    col_texto = _columna(bloque.columns, COLUMNAS_TEXTO)
+    if col_texto is None:
+        raise ValueError(f"El volcado no tiene una columna de texto ({', '.join(COLUMNAS_TEXTO)}).")
+    salida = pd.DataFrame({"TEXTO": bloque[col_texto]})
+    col_distrito = _columna(bloque.columns, COLUMNAS_DISTRITO)
+    if col_distrito is not None:
+        salida["NOMBREDI"] = bloque[col_distrito]
+    return salida
+
+
+def _lineas_jsonl(fragmento, tamano_bloque):
+    """
+    Bloques de líneas crudas del rango. Una línea pertenece al fragmento en el
+    que empieza, así cada línea se lee exactamente una vez entre fragmentos.
+    """
+    with open(fragmento.ruta, "rb") as f:
+        posicion = fragmento.inicio
+        if posicion > 0:
+            # Se descarta la línea que empezó en el fragmento anterior
+            f.seek(posicion - 1)
+            posicion += len(f.readline()) - 1
+        lineas = []
+        for linea in f:
+            if fragmento.fin is not None and posicion >= fragmento.fin:
+                break
+            posicion += len(linea)
+            if linea.strip():
+                lineas.append(linea)
+            if len(lineas) >= tamano_bloque:
+                yield lineas
+                lineas = []
+        if lineas:
+            yield lineas
+
+
+def leer_comentarios_por_bloques(fragmento, tamano_bloque=TAMANO_BLOQUE):
+    """Itera DataFrames de hasta `tamano_bloque` comentarios (columnas TEXTO y, si existe, NOMBREDI)."""
+    if not isinstance(fragmento, Fragmento):
+        fragmento = Fragmento(str(fragmento))
+
+    if _es_jsonl(fragmento.ruta) and _comprimido(fragmento.ruta):
+        for bloque in pd.read_json(fragmento.ruta, lines=True, chunksize=tamano_bloque, dtype=False):
+            yield _estandarizar(bloque)
+    elif _es_jsonl(fragmento.ruta):
+        for lineas in _lineas_jsonl(fragmento, tamano_bloque):
+            yield _estandarizar(pd.read_json(io.BytesIO(b"".join(lineas)), lines=True, dtype=False))
+    else:
+        # Solo se parsean las columnas de texto y distrito
+        usecols = lambda c: str(c).lower() in COLUMNAS_TEXTO + COLUMNAS_DISTRITO
+        for bloque in pd.read_csv(fragmento.ruta, chunksize=tamano_bloque, dtype=str, usecols=usecols,
+                                  on_bad_lines="skip"):
+            yield _estandarizar(bloque)
@@ -0,0 +1,150 @@
+"""
+Comentarios crudos de YouTube / Twitter -> indicadores por distrito.
+
+Uso:
+    python -m tratamiento_redes.pipeline_redes comentarios_*.jsonl --salida data/YT_DATA.csv
+
+Cada comentario se normaliza, se asigna al distrito que menciona (gazetteer)
+y se clasifica con léxicos. Por distrito solo se acumulan conteos, así la
+memoria no crece con la cantidad de comentarios. Los archivos (y los JSONL
+grandes, por rangos de bytes) se reparten entre procesos.
+
+La salida tiene el mismo esquema que data/YT_DATA.csv: NOMBREDI y las tres
+métricas en %, lista para `load_data` y `cargar_y_preparar_datos`.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+from tratamiento_redes.clasificacion import COLUMNAS_CLASES, ClasificadorLexico
+from tratamiento_redes.gazetteer import DISTRITOS_LIMA, Gazetteer, patrones_distritos
+from tratamiento_redes.lectura_comentarios import TAMANO_BLOQUE, fragmentar, leer_comentarios_por_bloques
+from utils.normalizacion import normalizar_serie, normalizar_textos
+
+METRICAS = ["Victimizacion_total_%", "Inseguridad_general_%", "Indice_confianza_PNP_%"]
+COLUMNAS_CONTEO = ["N_COMENTARIOS"] + [f"N_{c}" for c in COLUMNAS_CLASES]
+
+
+@lru_cache(maxsize=1)
+def _herramientas():
+    """Gazetteer, clasificador y nombre -> índice de distrito (una vez por proceso)."""
+    por_nombre = {p.strip(): i for p, i in patrones_distritos().items()}
+    por_nombre.update({nombre: i for i, nombre in enumerate(DISTRITOS_LIMA)})
+    return Gazetteer(), ClasificadorLexico(), por_nombre
+
+
+# =========================
+# Conteos por distrito
+# =========================
+def conteos_bloque(bloque):
+    """
+    Matriz (distritos x COLUMNAS_CONTEO) de un bloque de comentarios.
+
+    Si el volcado trae NOMBREDI (p. ej. ubicación del usuario) se usa ese
+    distrito; si no, o si no se reconoce, el que mencione el texto.
+    """
+    gazetteer, clasificador, por_nombre = _herramientas()
+    textos = normalizar_textos(bloque["TEXTO"])
+    codigos = gazetteer.codigos(textos)
+    if "NOMBREDI" in bloque.columns:
+        declarados = normalizar_serie(bloque["NOMBREDI"]).map(por_nombre).fillna(-1).to_numpy(dtype=np.int64)
+        codigos = np.where(declarados >= 0, declarados, codigos)
+
+    # Solo se clasifican los comentarios con distrito
+    validos = codigos >= 0
+    codigos = codigos[validos]
+    clases = clasificador.clasificar(textos[validos])
+
+    n = len(DISTRITOS_LIMA)
+    conteos = np.zeros((n, len(COLUMNAS_CONTEO)), dtype=np.int64)
+    conteos[:, 0] = np.bincount(codigos, minlength=n)
+    for j, clase in enumerate(COLUMNAS_CLASES, start=1):
+        conteos[:, j] = np.bincount(codigos[clases[clase].to_numpy()], minlength=n)
+    return conteos
+
+
+def procesar_fragmento(fragmento, tamano_bloque=TAMANO_BLOQUE):
+    """Suma de los conteos de todos los bloques de un fragmento."""
+    total = np.zeros((len(DISTRITOS_LIMA), len(COLUMNAS_CONTEO)), dtype=np.int64)
+    for bloque in leer_comentarios_por_bloques(fragmento, tamano_bloque):
+        total += conteos_bloque(bloque)
+    return total
+
+
+def procesar_comentarios(rutas, procesos=None, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Conteos por distrito (índice NOMBREDI, columnas COLUMNAS_CONTEO) de todos los archivos.
+
+    Con más de un proceso los fragmentos se reparten entre procesos
+    separados y sus conteos se suman al final.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    fragmentos = fragmentar(rutas, partes_por_archivo=procesos)
+
+    if procesos == 1 or len(fragmentos) == 1:
+        parciales = (procesar_fragmento(f, tamano_bloque) for f in fragmentos)
+        total = sum(parciales, np.zeros((len(DISTRITOS_LIMA), len(COLUMNAS_CONTEO)), dtype=np.int64))
+    else:
+        with ProcessPoolExecutor(max_workers=min(procesos, len(fragmentos)),
+                                 mp_context=get_context("spawn")) as pool:
+            total = sum(pool.map(procesar_fragmento, fragmentos, repeat(tamano_bloque)))
+
+    return pd.DataFrame(total, index=pd.Index(DISTRITOS_LIMA, name="NOMBREDI"), columns=COLUMNAS_CONTEO)
+
+
+# =========================
+# Conteos -> métricas (esquema de YT_DATA.csv)
+# =========================
+def metricas_distritales(conteos, min_comentarios=1):
+    """
+    NOMBREDI y las tres métricas en %, un distrito por fila (orden alfabético).
+
+    - Victimizacion_total_%: comentarios que relatan un delito sufrido
+    - Inseguridad_general_%: comentarios que expresan inseguridad
+    - Indice_confianza_PNP_%: confianza entre los comentarios con postura sobre la PNP
+
+    Los distritos con menos de `min_comentarios` comentarios se omiten.
+    """
+    n = conteos["N_COMENTARIOS"]
+    con_postura = conteos["N_CONFIANZA_PNP"] + conteos["N_DESCONFIANZA_PNP"]
+    tabla = pd.DataFrame({
+        "Victimizacion_total_%": conteos["N_VICTIMIZACION"] / n * 100,
+        "Inseguridad_general_%": conteos["N_INSEGURIDAD"] / n * 100,
+        "Indice_confianza_PNP_%": (conteos["N_CONFIANZA_PNP"] / con_postura * 100).where(con_postura > 0),
+    })
+    tabla = tabla.loc[n >= max(min_comentarios, 1)].round(2)
+    return tabla.sort_index().reset_index()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Indicadores por distrito desde comentarios de redes sociales.")
+    parser.add_argument("archivos", nargs="+", help="Volcados de comentarios (JSONL o CSV, opcionalmente .gz)")
+    parser.add_argument("--salida", required=True, help="CSV de salida (mismo formato que data/YT_DATA.csv)")
+    parser.add_argument("--conteos", default=None, help="CSV opcional con los conteos por distrito")
+    parser.add_argument("--procesos", type=int, default=None,
+                        help="Procesos en paralelo (por defecto: núcleos disponibles)")
+    parser.add_argument("--tamano-bloque", type=int, default=TAMANO_BLOQUE,
+                        help="Comentarios por bloque al leer")
+    parser.add_argument("--min-comentarios", type=int, default=1,
+                        help="Comentarios mínimos para publicar las métricas de un distrito")
+    args = parser.parse_args(argv)
+
+    conteos = procesar_comentarios(args.archivos, args.procesos, args.tamano_bloque)
+    if args.conteos:
+        conteos.to_csv(args.conteos)
+    metricas_distritales(conteos, args.min_comentarios).to_csv(args.salida, index=False)
+
+    print(f"{int(conteos['N_COMENTARIOS'].sum()):,} comentarios con distrito; "
+          f"métricas en {args.salida}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
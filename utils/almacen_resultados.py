@@ -0,0 +1,121 @@
+# utils/almacen_resultados.py
+"""
+Almacén de resultados compartido por todas las sesiones del proceso.
+
+Los resultados se registran una sola vez por clave de contenido (la misma de
+cache_resultados) y las sesiones guardan solo un `ManejadorResultado`. Si
+varias sesiones piden la misma clave a la vez, una calcula y las demás
+esperan ese mismo cálculo. Cada acceso entrega copias superficiales: con
+copy-on-write de pandas, lo que una sesión modifique no afecta a las demás.
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future
+from dataclasses import dataclass
+
+from utils.cache_resultados import cargar_resultados
+
+MAX_ENTRADAS = int(os.environ.get("TESIS_ALMACEN_MAX_ENTRADAS", 8))
+
+
+def _copias(tablas):
+    return {nombre: df.copy(deep=False) for nombre, df in tablas.items()}
+
+
+class AlmacenResultados:
+    """
+    Diccionario clave -> tablas, seguro entre hilos y con un solo cálculo en curso por clave.
+
+    Guarda las `max_entradas` claves usadas más recientemente; las que salen
+    se vuelven a leer de la caché en disco cuando se piden otra vez.
+    """
+
+    def __init__(self, max_entradas=MAX_ENTRADAS):
+        self.max_entradas = max_entradas
+        self._lock = threading.Lock()
+        self._tablas = OrderedDict()
+        self._en_curso = {}
+
+    def obtener(self, clave):
+        """Tablas registradas para `clave` (copias superficiales), o None."""
+        with self._lock:
+            tablas = self._tablas.get(clave)
+            if tablas is None:
+                return None
+            self._tablas.move_to_end(clave)
+        return _copias(tablas)
+
+    def obtener_o_calcular(self, clave, calcular):
+        """
+        Devuelve las tablas de `clave`, ejecutando `calcular()` solo si no están.
+
+        Si otro hilo ya está calculando la misma clave, se espera su
+        resultado (o su excepción) en vez de repetir el trabajo. Un `None`
+        de `calcular` no se registra. Si el cálculo se interrumpe sin error
+        propio (p. ej. la sesión que calculaba se vuelve a ejecutar), quienes
+        esperaban lo intentan de nuevo.
+        """
+        while True:
+            with self._lock:
+                if clave in self._tablas:
+                    self._tablas.move_to_end(clave)
+                    return _copias(self._tablas[clave])
+                futuro = self._en_curso.get(clave)
+                propio = futuro is None
+                if propio:
+                    futuro = self._en_curso[clave] = Future()
+
+            if not propio:
+                try:
+                    tablas = futuro.result()
+                except CancelledError:
+                    continue
+                return None if tablas is None else _copias(tablas)
+
+            try:
+                tablas = calcular()
+            except Exception as e:
+                with self._lock:
+                    del self._en_curso[clave]
+                futuro.set_exception(e)
+                raise
+            except BaseException:
+                # Control de flujo de la sesión que calculaba (rerun, stop,
+                # KeyboardInterrupt): no se reenvía a las demás sesiones
+                with self._lock:
+                    del self._en_curso[clave]
+                futuro.cancel()
+                raise
+
+            with self._lock:
+                if tablas is not None:
+                    self._registrar(clave, tablas)
+                del self._en_curso[clave]
+            futuro.set_result(tablas)
+            return None if tablas is None else _copias(tablas)
+
+    def _registrar(self, clave, tablas):
+        # Se llama con el lock tomado
+        self._tablas[clave] = dict(tablas)
+        self._tablas.move_to_end(clave)
+        while len(self._tablas) > self.max_entradas:
+            self._tablas.popitem(last=False)
+
+
+ALMACEN = AlmacenResultados()
+
+
+@dataclass(frozen=True)
+class ManejadorResultado:
+    """Lo único que guarda la sesión: la clave de un resultado del almacén compartido."""
+    clave: str
+
+    def tablas(self):
+        """Tablas del resultado; si salieron del almacén se recuperan de la caché en disco (o None)."""
+        return ALMACEN.obtener_o_calcular(self.clave, lambda: cargar_resultados(self.clave))
+
+
+def registrar_resultado(clave, calcular):
+    """Obtiene (o calcula una sola vez) el resultado de `clave` y devuelve (manejador, tablas)."""
+    return ManejadorResultado(clave), ALMACEN.obtener_o_calcular(clave, calcular)
@@ -0,0 +1,111 @@
+# utils/cache_resultados.py
+"""
+Caché en disco de resultados procesados, direccionada por contenido.
+
+La clave combina una huella barata del CSV de entrada (metadatos del miembro
+del ZIP: nombre, tamaño y CRC32, sin leer los datos) con una huella del código
+de tratamiento_inei. Cada entrada es una carpeta con una tabla Parquet por
+resultado; al superar el límite de tamaño se eliminan las entradas usadas hace
+más tiempo.
+"""
+import hashlib
+import os
+import shutil
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+RAIZ_REPO = Path(__file__).resolve().parent.parent
+DIR_CACHE = Path(os.environ.get("TESIS_CACHE_DIR", RAIZ_REPO / ".cache" / "resultados"))
+LIMITE_CACHE_BYTES = int(os.environ.get("TESIS_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+
+# =========================
+# Huellas
+# =========================
+@lru_cache(maxsize=1)
+def version_procesamiento():
+    """Huella del código de tratamiento_inei: cambia si cambia cualquier procesador."""
+    h = hashlib.blake2b(digest_size=8)
+    for ruta in sorted((RAIZ_REPO / "tratamiento_inei").glob("*.py")):
+        h.update(ruta.name.encode("utf-8"))
+        h.update(ruta.read_bytes())
+    return h.hexdigest()
+
+
+def huella_miembro_zip(zip_ref, nombre):
+    """Huella de un archivo dentro del ZIP usando solo su entrada del directorio."""
+    info = zip_ref.getinfo(nombre)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{info.filename}|{info.file_size}|{info.CRC:08x}".encode("utf-8"))
+    return h.hexdigest()
+
+
+def huella_subida(archivo):
+    """Huella de un UploadedFile de Streamlit sin recorrer sus bytes."""
+    return f"{getattr(archivo, 'file_id', '')}|{archivo.name}|{archivo.size}"
+
+
+def clave_resultados(huella_entrada):
+    return f"{huella_entrada}-{version_procesamiento()}"
+
+
+# =========================
+# Lectura / escritura
+# =========================
+def cargar_resultados(clave):
+    """Devuelve el diccionario de tablas guardado para `clave`, o None si no existe."""
+    carpeta = DIR_CACHE / clave
+    if not carpeta.is_dir():
+        return None
+    try:
+        tablas = {ruta.stem: pd.read_parquet(ruta) for ruta in carpeta.glob("*.parquet")}
+    except (OSError, ValueError):
+        # Entrada dañada o borrada a mitad de lectura: se recalcula
+        return None
+    # Marca de uso reciente para la política de desalojo
+    os.utime(carpeta, None)
+    return tablas or None
+
+
+def guardar_resultados(clave, tablas):
+    """Guarda cada DataFrame de `tablas` como Parquet y aplica el límite de tamaño."""
+    DIR_CACHE.mkdir(parents=True, exist_ok=True)
+    destino = DIR_CACHE / clave
+    temporal = DIR_CACHE / f".{clave}.{os.getpid()}.tmp"
+    temporal.mkdir(parents=True, exist_ok=True)
+
+    for nombre, df in tablas.items():
+        df.to_parquet(temporal / f"{nombre}.parquet")
+
+    try:
+        os.replace(temporal, destino)
+    except OSError:
+        # Otra ejecución guardó la misma clave primero
+        shutil.rmtree(temporal, ignore_errors=True)
+
+    podar_cache()
+
+
+def _tamano_carpeta(carpeta):
+    return sum(f.stat().st_size for f in carpeta.glob("*") if f.is_file())
+
+
+def podar_cache(limite_bytes=LIMITE_CACHE_BYTES):
+    """Elimina las entradas menos usadas recientemente hasta quedar bajo el límite."""
+    if not DIR_CACHE.is_dir():
+        return
+    entradas = [c for c in DIR_CACHE.iterdir() if c.is_dir() and not c.name.startswith(".")]
+    entradas.sort(key=lambda c: c.stat().st_mtime)
+
+    total = sum(_tamano_carpeta(c) for c in entradas)
+    while entradas and total > limite_bytes:
+        carpeta = entradas.pop(0)
+        total -= _tamano_carpeta(carpeta)
+        shutil.rmtree(carpeta, ignore_errors=True)
+    # Limpia temporales abandonados hace más de un día
+    for c in DIR_CACHE.glob(".*.tmp"):
+        if time.time() - c.stat().st_mtime > 86400:
+            shutil.rmtree(c, ignore_errors=True)
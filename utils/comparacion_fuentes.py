@@ -0,0 +1,163 @@
+# utils/comparacion_fuentes.py
+"""
+Comparación entre fuentes (INEI, YouTube, Twitter) sobre un solo índice de distritos.
+
+Las tablas de cada fuente se alinean una vez por UBIGEO con unión externa:
+un distrito que falta en una fuente queda como NaN, no desaparece de la
+comparación. Con los valores en un arreglo (fuente x distrito x métrica)
+se calculan juntas, para todas las métricas, las medidas de acuerdo por
+par de fuentes (Pearson, Spearman, MAE) y, por distrito, la diferencia y
+el cambio de puesto respecto de la fuente de referencia.
+"""
+from dataclasses import dataclass
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class ComparacionFuentes:
+    """
+    Resultado de `comparar_fuentes`.
+
+    - valores: índice UBIGEO, columna NOMBDIST y columnas (métrica, fuente)
+    - acuerdo: una fila por métrica y par de fuentes con N (distritos en
+      común), PEARSON, SPEARMAN y MAE (puntos porcentuales)
+    - diferencias: una fila por métrica, fuente distinta de la referencia y
+      distrito, con VALOR, VALOR_REF, DELTA (VALOR - VALOR_REF), PUESTO,
+      PUESTO_REF y CAMBIO_PUESTO (PUESTO_REF - PUESTO; positivo = sube). Los
+      puestos se cuentan sobre los distritos con valor en ambas fuentes
+    - referencia: fuente contra la que se miden las diferencias
+    """
+    valores: pd.DataFrame
+    acuerdo: pd.DataFrame
+    diferencias: pd.DataFrame
+    referencia: str
+
+    def valores_metrica(self, metrica):
+        """NOMBDIST y una columna por fuente para `metrica`."""
+        tabla = self.valores[metrica].copy()
+        tabla.insert(0, "NOMBDIST", self.valores["NOMBDIST"])
+        return tabla
+
+    def faltantes(self, metrica):
+        """Fuente -> cantidad de distritos sin valor de `metrica` en esa fuente."""
+        return self.valores[metrica].isna().sum().to_dict()
+
+
+def alinear_fuentes(tablas, metricas, clave="UBIGEO", nombre="NOMBDIST"):
+    """
+    Arreglo (fuente x distrito x métrica) sobre la unión de los `clave` de todas las fuentes.
+
+    Devuelve (arreglo, índice de distritos, nombres de los distritos).
+    """
+    indices = {f: pd.Index(df[clave]) for f, df in tablas.items()}
+    for fuente, indice in indices.items():
+        if indice.has_duplicates:
+            raise ValueError(f"La fuente {fuente} tiene más de una fila por {clave}.")
+
+    distritos = indices[next(iter(tablas))]
+    for indice in list(indices.values())[1:]:
+        distritos = distritos.union(indice, sort=False)
+    distritos = distritos.sort_values()
+
+    valores = np.full((len(tablas), len(distritos), len(metricas)), np.nan)
+    for i, (fuente, df) in enumerate(tablas.items()):
+        columnas = df.reindex(columns=metricas).apply(pd.to_numeric, errors="coerce")
+        valores[i, distritos.get_indexer(indices[fuente])] = columnas.to_numpy(dtype="float64", na_value=np.nan)
+
+    # Nombre de cada distrito: el de la primera fuente que lo trae
+    pares = [df[[clave, nombre]] for df in tablas.values() if nombre in df.columns]
+    nombres = (pd.concat(pares).drop_duplicates(clave).set_index(clave)[nombre].reindex(distritos)
+               if pares else pd.Series(pd.NA, index=distritos, dtype=object))
+    return valores, distritos, nombres
+
+
+def _pearson(x, y, validos):
+    """Correlación de Pearson por columna usando solo las filas válidas en ambas."""
+    n = validos.sum(axis=0)
+    x = np.where(validos, x, 0.0)
+    y = np.where(validos, y, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mx = x.sum(axis=0) / n
+        my = y.sum(axis=0) / n
+        dx = np.where(validos, x - mx, 0.0)
+        dy = np.where(validos, y - my, 0.0)
+        r = (dx * dy).sum(axis=0) / np.sqrt((dx ** 2).sum(axis=0) * (dy ** 2).sum(axis=0))
+    return np.where(n >= 2, r, np.nan)
+
+
+def _rangos(x, validos):
+    """Rango promedio (1 = menor) por columna entre las filas válidas; NaN en el resto."""
+    return pd.DataFrame(np.where(validos, x, np.nan)).rank(method="average").to_numpy()
+
+
+def _puestos(x, validos):
+    """Puesto (1 = valor más alto) por columna entre las filas válidas; NaN en el resto."""
+    return pd.DataFrame(np.where(validos, x, np.nan)).rank(method="min", ascending=False).to_numpy()
+
+
+def comparar_fuentes(tablas, metricas, referencia=None, clave="UBIGEO", nombre="NOMBDIST"):
+    """
+    Alinea las fuentes y calcula acuerdo y diferencias para todas las métricas.
+
+    `tablas` es un diccionario fuente -> DataFrame con `clave` y las métricas
+    (p. ej. los GeoDataFrames de `cargar_y_preparar_datos`). La referencia
+    por defecto es la primera fuente.
+    """
+    fuentes = list(tablas)
+    referencia = referencia or fuentes[0]
+    valores, distritos, nombres = alinear_fuentes(tablas, metricas, clave, nombre)
+    presentes = ~np.isnan(valores)
+
+    # Acuerdo por par de fuentes, todas las métricas a la vez
+    filas = []
+    for a, b in combinations(range(len(fuentes)), 2):
+        validos = presentes[a] & presentes[b]
+        n = validos.sum(axis=0)
+        with np.errstate(invalid="ignore"):
+            mae = np.where(validos, np.abs(valores[a] - valores[b]), 0.0).sum(axis=0) / n
+        pearson = _pearson(valores[a], valores[b], validos)
+        spearman = _pearson(_rangos(valores[a], validos), _rangos(valores[b], validos), validos)
+        filas.append(pd.DataFrame({
+            "METRICA": metricas, "FUENTE_A": fuentes[a], "FUENTE_B": fuentes[b],
+            "N": n, "PEARSON": pearson, "SPEARMAN": spearman, "MAE": np.where(n > 0, mae, np.nan),
+        }))
+    columnas_acuerdo = ["METRICA", "FUENTE_A", "FUENTE_B", "N", "PEARSON", "SPEARMAN", "MAE"]
+    acuerdo = (pd.concat(filas, ignore_index=True) if filas else pd.DataFrame(columns=columnas_acuerdo))
+    orden_metrica = {m: i for i, m in enumerate(metricas)}
+    acuerdo = acuerdo.sort_values("METRICA", key=lambda s: s.map(orden_metrica), kind="stable", ignore_index=True)
+
+    # Diferencias respecto de la referencia: (fuente, distrito, métrica) -> filas
+    r = fuentes.index(referencia)
+    otras = [i for i in range(len(fuentes)) if i != r]
+    forma = (len(otras), len(distritos), len(metricas))
+
+    # Puestos de cada par (fuente, referencia) sobre los mismos distritos: los que
+    # tienen valor en ambas (un faltante en una fuente no corre los puestos de la otra)
+    comunes = [presentes[i] & presentes[r] for i in otras]
+    puestos = np.stack([_puestos(valores[i], v) for i, v in zip(otras, comunes)]) if otras else np.empty(forma)
+    puestos_ref = np.stack([_puestos(valores[r], v) for v in comunes]) if otras else np.empty(forma)
+    diferencias = pd.DataFrame({
+        "METRICA": np.broadcast_to(np.array(metricas, dtype=object), forma).ravel(),
+        "FUENTE": np.broadcast_to(np.array(fuentes, dtype=object)[otras][:, None, None], forma).ravel(),
+        clave: np.broadcast_to(distritos.to_numpy()[None, :, None], forma).ravel(),
+        nombre: np.broadcast_to(nombres.to_numpy()[None, :, None], forma).ravel(),
+        "VALOR": valores[otras].ravel(),
+        "VALOR_REF": np.broadcast_to(valores[r], forma).ravel(),
+        "PUESTO": puestos.ravel(),
+        "PUESTO_REF": puestos_ref.ravel(),
+    })
+    diferencias.insert(6, "DELTA", diferencias["VALOR"] - diferencias["VALOR_REF"])
+    diferencias["CAMBIO_PUESTO"] = diferencias["PUESTO_REF"] - diferencias["PUESTO"]
+    diferencias = diferencias.sort_values("METRICA", key=lambda s: s.map(orden_metrica), kind="stable",
+                                          ignore_index=True)
+
+    tabla = pd.DataFrame(
+        valores.transpose(1, 2, 0).reshape(len(distritos), -1),
+        index=distritos,
+        columns=pd.MultiIndex.from_product([metricas, fuentes], names=["METRICA", "FUENTE"]),
+    )
+    tabla.insert(0, "NOMBDIST", nombres.to_numpy())
+    return ComparacionFuentes(tabla, acuerdo, diferencias, referencia)
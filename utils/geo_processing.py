@@ -1,12 +1,12 @@
 # utils/geo_processing.py
+import numpy as np
 import pandas as pd
-import geopandas as gpd
-from unidecode import unidecode
-import io
+
+from utils.ubigeo import indice_ubigeo, ubigeo_de_tabla
 
 def cargar_y_preparar_datos(csv_input):
     """
-    Carga el GeoJSON de Lima, normaliza nombres y hace merge con el CSV.
+    Carga la geometría local de Lima y le une las métricas del CSV por UBIGEO.
     
     Parámetro csv_input puede ser:
         - str: ruta al archivo CSV
@@ -14,42 +14,30 @@ def cargar_y_preparar_datos(csv_input):
         - UploadedFile (Streamlit)
     """
 
-    # ---------- 1) Cargar GeoJSON ----------
-    url = "https://raw.githubusercontent.com/juaneladio/peru-geojson/master/peru_distrital_simple.geojson"
-    gdf = gpd.read_file(url)
-
-    gdf_lima_metro = gdf[
-        (gdf["NOMBDEP"].str.upper() == "LIMA") &
-        (gdf["NOMBPROV"].str.upper() == "LIMA")
-    ][["NOMBDIST", "geometry"]].copy()
+    # ---------- 1) Índice UBIGEO de Lima (geometría cargada una vez por proceso) ----------
+    indice = indice_ubigeo("lima")
 
     # ---------- 2) Interpretar el CSV según el tipo recibido ----------
+    # df_raw solo se lee (no se modifica): no hace falta copiarlo
     if isinstance(csv_input, str):
         # Ruta al archivo
-        df_raw = pd.read_csv(csv_input).copy()
+        df_raw = pd.read_csv(csv_input)
 
     elif isinstance(csv_input, pd.DataFrame):
         # Ya es un DataFrame
-        df_raw = csv_input.copy()
+        df_raw = csv_input
 
     elif hasattr(csv_input, "read"):
-        # Caso Streamlit UploadedFile: leer el buffer
-        df_raw = pd.read_csv(io.BytesIO(csv_input.read())).copy()
+        # Caso Streamlit UploadedFile: se parsea directo desde el buffer, sin copiar sus bytes
+        csv_input.seek(0)
+        df_raw = pd.read_csv(csv_input)
 
     else:
         raise ValueError(
             "csv_input debe ser: ruta (str), DataFrame o UploadedFile de Streamlit."
         )
 
-    # ---------- 3) Verificar la columna de distrito ----------
-    if "NOMBREDI" in df_raw.columns:
-        name_col = "NOMBREDI"
-    elif "NOMBDIST" in df_raw.columns:
-        name_col = "NOMBDIST"
-    else:
-        raise ValueError("El CSV debe contener 'NOMBREDI' o 'NOMBDIST'.")
-
-    # ---------- 4) Verificar métricas ----------
+    # ---------- 3) Verificar métricas ----------
     metric_cols = [
         "Victimizacion_total_%",
         "Inseguridad_general_%",
@@ -60,38 +48,24 @@ def cargar_y_preparar_datos(csv_input):
     if missing:
         raise ValueError(f"Faltan columnas métricas en el CSV: {missing}")
 
-    # ---------- 5) Normalizar nombres ----------
-    def norm(s):
-        return unidecode(str(s).strip().upper())
-
-    gdf_lima_metro["_MERGE_KEY"] = gdf_lima_metro["NOMBDIST"].map(norm)
-    df_raw["_MERGE_KEY"] = df_raw[name_col].map(norm)
-
-    alias = {
-        "MAGDALENA VIEJA": "PUEBLO LIBRE",
-        "BREÑA": "BRENA",
-        "RÍMAC": "RIMAC",
-        "JESÚS MARÍA": "JESUS MARIA",
-        "SAN MARTÍN DE PORRES": "SAN MARTIN DE PORRES",
-        "SANTIAGO DE SURCO": "SANTIAGO DE SURCO"
-    }
-    alias_norm = {norm(k): norm(v) for k, v in alias.items()}
-    gdf_lima_metro["_MERGE_KEY"] = gdf_lima_metro["_MERGE_KEY"].replace(alias_norm)
-
-    # ---------- 6) Merge ----------
-    df_to_merge = df_raw[["_MERGE_KEY"] + metric_cols].copy()
-    gdfm = gdf_lima_metro.merge(
-        df_to_merge,
-        on="_MERGE_KEY",
-        how="left",
-        validate="1:1"
-    )
+    # ---------- 4) UBIGEO de cada fila ----------
+    # Por código si el CSV lo trae; si solo tiene NOMBREDI/NOMBDIST (YouTube,
+    # Twitter), por el diccionario de variantes de nombre precalculado
+    ubigeos = ubigeo_de_tabla(df_raw, "lima")
+    if ubigeos.dropna().duplicated().any():
+        repetidos = sorted(ubigeos[ubigeos.duplicated(keep=False) & ubigeos.notna()].unique().tolist())
+        raise ValueError(f"El CSV tiene más de una fila por distrito (UBIGEO {repetidos}).")
 
-    # ---------- 7) Mantener columnas finales ----------
-    gdfm = gdfm[["NOMBDIST", "geometry"] + metric_cols].copy()
+    # ---------- 5) Unión por UBIGEO entero ----------
+    # Fila de la geometría de cada fila del CSV; los distritos sin datos quedan en NaN
+    posiciones = indice.posiciones(ubigeos)
+    encontrados = posiciones >= 0
 
-    # Asegurar métricas numéricas
+    gdfm = indice.geometria[["UBIGEO", "NOMBDIST", "geometry"]].copy()
     for c in metric_cols:
-        gdfm[c] = pd.to_numeric(gdfm[c], errors="coerce")
+        valores = np.full(len(gdfm), np.nan)
+        valores[posiciones[encontrados]] = pd.to_numeric(df_raw[c], errors="coerce").to_numpy(
+            dtype="float64", na_value=np.nan)[encontrados]
+        gdfm[c] = valores
 
     return gdfm
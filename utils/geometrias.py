@@ -0,0 +1,153 @@
+# utils/geometrias.py
+"""
+Geometría distrital de Lima Metropolitana guardada localmente.
+
+El GeoJSON nacional se descarga una sola vez con `python -m utils.geometrias`,
+se filtra a Lima/Lima, se precalculan las claves normalizadas y se guarda como
+GeoParquet versionado en data/geo/. Ese archivo va en el repositorio: en
+ejecución solo se lee, una vez por proceso, y todas las sesiones comparten el
+resultado. La aplicación nunca descarga la fuente ni escribe en data/geo/.
+"""
+import math
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+import geopandas as gpd
+import shapely
+
+from utils.normalizacion import normalizar_nombre, normalizar_serie
+
+URL_GEOJSON_PERU = "https://raw.githubusercontent.com/juaneladio/peru-geojson/master/peru_distrital_simple.geojson"
+
+# Cambiar la versión si cambia la fuente, el filtro o las claves precalculadas
+VERSION_GEOMETRIA = "v2"
+DIR_GEOMETRIAS = Path(__file__).resolve().parent.parent / "data" / "geo"
+RUTA_GEOMETRIA_LIMA = DIR_GEOMETRIAS / f"lima_distritos_{VERSION_GEOMETRIA}.parquet"
+
+# Niveles de detalle de los mapas, del más liviano al más fino:
+# nivel -> (tolerancia de simplificación, grilla de coordenadas), ambas en grados
+# (0.0001° ≈ 11 m). La simplificación es por cobertura: los bordes compartidos
+# se simplifican una sola vez, así no aparecen huecos entre distritos.
+NIVELES_DETALLE = {
+    "minimo":   (0.01,   1e-3),
+    "bajo":     (0.002,  1e-4),
+    "medio":    (0.0005, 1e-4),
+    "completo": (0.0001, 1e-5),
+}
+
+# Nombres del GeoJSON que difieren de los usados por INEI / redes sociales
+ALIAS_DISTRITOS = {
+    "MAGDALENA VIEJA": "PUEBLO LIBRE",
+    "BREÑA": "BRENA",
+    "RÍMAC": "RIMAC",
+    "JESÚS MARÍA": "JESUS MARIA",
+    "SAN MARTÍN DE PORRES": "SAN MARTIN DE PORRES",
+    "SANTIAGO DE SURCO": "SANTIAGO DE SURCO"
+}
+
+
+def _preparar_geometria_lima(gdf):
+    gdf_lima_metro = gdf[
+        (gdf["NOMBDEP"].str.upper() == "LIMA") &
+        (gdf["NOMBPROV"].str.upper() == "LIMA")
+    ][["IDDIST", "NOMBDIST", "geometry"]].copy()
+    gdf_lima_metro.insert(0, "UBIGEO", gdf_lima_metro.pop("IDDIST").astype(str).str.zfill(6))
+
+    # Clave de unión precalculada (normalizada y con alias aplicados)
+    alias_norm = {normalizar_nombre(k): normalizar_nombre(v) for k, v in ALIAS_DISTRITOS.items()}
+    gdf_lima_metro["_MERGE_KEY"] = normalizar_serie(gdf_lima_metro["NOMBDIST"]).replace(alias_norm)
+    return gdf_lima_metro.reset_index(drop=True)
+
+
+def _leer(ruta):
+    if not ruta.exists():
+        raise FileNotFoundError(
+            f"No existe {ruta}. Genere las geometrías locales con `python -m utils.geometrias`."
+        )
+    return gpd.read_parquet(ruta)
+
+
+def _guardar(gdf, destino):
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    gdf.to_parquet(destino, index=False)
+
+
+def construir_geometria_lima(fuente=URL_GEOJSON_PERU, destino=RUTA_GEOMETRIA_LIMA):
+    """Lee el GeoJSON nacional y guarda Lima Metropolitana como GeoParquet."""
+    gdf_lima_metro = _preparar_geometria_lima(gpd.read_file(fuente))
+    _guardar(gdf_lima_metro, destino)
+    return gdf_lima_metro
+
+
+@lru_cache(maxsize=1)
+def cargar_geometria_lima():
+    """
+    Devuelve la geometría de Lima Metropolitana (UBIGEO, NOMBDIST, geometry, _MERGE_KEY).
+
+    Se lee una vez por proceso. El resultado es compartido: quien necesite
+    modificarlo debe trabajar sobre una copia. Si falta el archivo se lanza
+    FileNotFoundError (ver `python -m utils.geometrias`).
+    """
+    return _leer(RUTA_GEOMETRIA_LIMA)
+
+
+# =========================
+# Geometrías simplificadas
+# =========================
+def simplificar_cobertura(gdf, nivel):
+    """
+    Copia de `gdf` con la geometría simplificada y cuantizada al nivel pedido.
+
+    Usa `coverage_simplify` (preserva la topología entre polígonos vecinos) y
+    luego `set_precision`, que redondea los vértices a la grilla del nivel:
+    vértices compartidos caen en el mismo punto y el GeoJSON queda más corto.
+    """
+    tolerancia, grilla = NIVELES_DETALLE[nivel]
+    geometrias = shapely.coverage_simplify(gdf.geometry.to_numpy(), tolerancia)
+    geometrias = shapely.set_precision(geometrias, grilla)
+    return gdf.set_geometry(gpd.GeoSeries(geometrias, index=gdf.index, crs=gdf.crs))
+
+
+@lru_cache(maxsize=None)
+def geometria_lima_simplificada(nivel):
+    """Geometría de Lima (UBIGEO, geometry) al nivel de detalle pedido, una vez por proceso."""
+    return simplificar_cobertura(cargar_geometria_lima()[["UBIGEO", "geometry"]], nivel)
+
+
+def zoom_ajustado(limites, ancho_px, alto_px):
+    """
+    Zoom con el que la caja `limites` (minx, miny, maxx, maxy, en grados)
+    entra completa en un panel de `ancho_px` x `alto_px`.
+
+    En Mercator un grado de latitud ocupa 1 / cos(latitud) veces lo que uno
+    de longitud; a zoom z un grado de longitud mide 256 * 2**z / 360 píxeles.
+    """
+    minx, miny, maxx, maxy = limites
+    alto_equivalente = (maxy - miny) / math.cos(math.radians((miny + maxy) / 2))
+    px_por_grado = min(ancho_px / (maxx - minx), alto_px / alto_equivalente)
+    return math.log2(px_por_grado * 360 / 256)
+
+
+def nivel_detalle(zoom, error_px=0.5):
+    """
+    Nivel de detalle más liviano cuyo error no se nota en pantalla.
+
+    A un `zoom` dado un píxel mide 360 / (256 * 2**zoom) grados; se acepta un
+    error de `error_px` píxeles. Con varios paneles lado a lado el tamaño del
+    panel entra a través del zoom (ver `zoom_ajustado`), no del error admitido.
+    """
+    grados_por_px = 360 / (256 * 2 ** zoom)
+    error_admitido = error_px * grados_por_px
+    for nivel, (tolerancia, _) in NIVELES_DETALLE.items():
+        if tolerancia <= error_admitido:
+            return nivel
+    return "completo"
+
+
+if __name__ == "__main__":
+    # Uso: python -m utils.geometrias [ruta_o_url_geojson]
+    fuente = sys.argv[1] if len(sys.argv) > 1 else URL_GEOJSON_PERU
+    gdf = construir_geometria_lima(fuente)
+    print(f"{len(gdf)} distritos guardados en {RUTA_GEOMETRIA_LIMA}")
@@ -0,0 +1,80 @@
+# utils/mapas.py
+import json
+from functools import lru_cache
+
+import plotly.express as px
+
+from utils.geometrias import cargar_geometria_lima, geometria_lima_simplificada, nivel_detalle, zoom_ajustado
+
+# Columna que identifica cada distrito en el GeoJSON (propiedad "id" de cada feature)
+CLAVE_DISTRITO = "UBIGEO"
+
+ZOOM_LIMA = 10
+# Ancho útil aproximado de la página (layout="wide"), repartido entre los paneles
+ANCHO_PAGINA_PX = 1200
+ALTO_MAPA_LIMA_PX = 650
+
+
+@lru_cache(maxsize=None)
+def geojson_distritos(nivel="completo"):
+    """
+    GeoJSON de los distritos serializado una sola vez por proceso y nivel de detalle.
+
+    Cada feature lleva como "id" el UBIGEO del distrito, así los mapas solo
+    necesitan el vector de la métrica y `featureidkey="id"`.
+    """
+    gdf = geometria_lima_simplificada(nivel)[[CLAVE_DISTRITO, "geometry"]].set_index(CLAVE_DISTRITO)
+    return json.loads(gdf.to_json())
+
+
+@lru_cache(maxsize=None)
+def zoom_lima(paneles=1):
+    """Zoom con el que Lima entra completa en un panel de 1/`paneles` del ancho (como mucho ZOOM_LIMA)."""
+    limites = tuple(cargar_geometria_lima().total_bounds)
+    return min(ZOOM_LIMA, zoom_ajustado(limites, ANCHO_PAGINA_PX / paneles, ALTO_MAPA_LIMA_PX))
+
+
+def crear_mapa(gdf, metric, data_source, paneles=1):
+    """
+    Mapa de Lima de una métrica.
+
+    `paneles` es la cantidad de mapas mostrados lado a lado: el zoom se
+    ajusta al ancho de cada panel y el nivel de detalle sale de ese zoom
+    (ver `nivel_detalle`).
+    """
+    # Colores específicos según la fuente de datos
+    if data_source == "youtube":
+        color_scale = "reds"  # Color rojo para YouTube
+    elif data_source == "twitter":
+        color_scale = "blues"  # Color azul para Twitter
+    else:  # INEI
+        color_scale = "Viridis"  # Color por defecto para INEI
+
+    # Solo se envían la clave y la métrica; la geometría viene del GeoJSON en caché
+    datos = gdf[[CLAVE_DISTRITO, "NOMBDIST", metric]]
+
+    zoom = zoom_lima(paneles)
+    fig = px.choropleth_map(
+        datos,
+        geojson=geojson_distritos(nivel_detalle(zoom)),
+        locations=CLAVE_DISTRITO,
+        featureidkey="id",
+        color=metric,
+        hover_name="NOMBDIST",
+        color_continuous_scale=color_scale,  # Asignar color específico
+        map_style="carto-positron",
+        center={"lat": -12.0464, "lon": -77.0428},
+        zoom=zoom,
+        opacity=0.70,
+    )
+    fig.update_layout(
+        height=ALTO_MAPA_LIMA_PX,
+        margin={"r": 0, "t": 5, "l": 0, "b": 0},
+        coloraxis_colorbar=dict(
+            title=metric,
+            thickness=14,
+            len=0.55
+        )
+    )
+    return fig
+
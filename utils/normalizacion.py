@@ -0,0 +1,102 @@
+# utils/normalizacion.py
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+# =========================
+# Normalizador único de nombres geográficos
+# =========================
+@lru_cache(maxsize=None)
+def _normalizar_texto(s):
+    s = unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii")
+    return s.strip().upper()
+
+
+def normalizar_nombre(s):
+    """Quita tildes, espacios extremos y pasa a mayúsculas ("Breña " -> "BRENA")."""
+    if pd.isna(s):
+        return s
+    return _normalizar_texto(str(s))
+
+
+def aplicar_por_valor(serie, funcion):
+    """
+    Aplica `funcion` a cada valor distinto de la Serie y reconstruye el resultado.
+
+    Los valores se factorizan, la función se evalúa solo sobre los únicos y el
+    resultado se arma vectorialmente con los códigos. Los NaN se conservan.
+    Si la Serie es categórica, el resultado también lo es.
+    """
+    codigos, unicos = pd.factorize(serie)
+    valores = [funcion(u) for u in unicos]
+
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # Valores distintos pueden colapsar en uno solo ("1" y "01"): se vuelve a factorizar.
+        # Categorías ordenadas, para que groupby/factorize(sort=True) ordenen alfabéticamente
+        codigos_nuevos, categorias = pd.factorize(pd.Series(valores, dtype=object), sort=True)
+        codigos_finales = np.append(codigos_nuevos, -1).take(codigos)
+        return pd.Series(pd.Categorical.from_codes(codigos_finales, categories=categorias),
+                         index=serie.index, name=serie.name)
+
+    resultado = np.array(valores + [np.nan], dtype=object)
+    # El código -1 (NaN) apunta al último elemento, que es NaN
+    return pd.Series(resultado.take(codigos), index=serie.index, name=serie.name)
+
+
+def normalizar_serie(serie):
+    """Aplica `normalizar_nombre` a una Serie, una sola vez por valor distinto (con memoria entre llamadas)."""
+    return aplicar_por_valor(serie, normalizar_nombre)
+
+
+# Byte ASCII -> byte normalizado: letras en mayúsculas, dígitos igual, el
+# resto de ASCII a espacio y los bytes no ASCII (tildes sueltas, emojis) a 0
+_BYTE_NORMALIZADO = np.zeros(256, dtype=np.uint8)
+_BYTE_NORMALIZADO[:128] = ord(" ")
+for _c in "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789":
+    _BYTE_NORMALIZADO[ord(_c)] = _BYTE_NORMALIZADO[ord(_c.lower())] = ord(_c)
+_ESPACIO, _VACIO = pa.scalar(" ", pa.large_string()), pa.scalar("", pa.large_string())
+
+
+def _filtrar_bytes(datos, offsets, conservar):
+    """Deja los bytes marcados en `conservar` y recalcula los límites de cada texto."""
+    borrados = np.flatnonzero(~conservar)
+    return datos[conservar], offsets - np.searchsorted(borrados, offsets)
+
+
+def normalizar_textos(serie):
+    """
+    Normalización vectorizada de texto libre (comentarios de redes).
+
+    Quita tildes, pasa a mayúsculas y deja solo letras y dígitos separados
+    por un espacio, con un espacio al inicio y al final: " ME ROBARON EN ATE ".
+    No usa la memoria de `normalizar_nombre`, porque casi todos los comentarios
+    son distintos: la descomposición NFKD la hace pyarrow y el resto se hace
+    byte a byte con numpy sobre el buffer de la columna.
+    """
+    textos = pa.array(serie.fillna("").astype(str), type=pa.large_string())
+    if isinstance(textos, pa.ChunkedArray):
+        textos = textos.combine_chunks()
+    textos = pc.utf8_normalize(pc.binary_join_element_wise(_ESPACIO, textos, _ESPACIO, _VACIO), "NFKD")
+
+    _, buffer_offsets, buffer_datos = textos.buffers()
+    offsets = np.frombuffer(buffer_offsets, dtype=np.int64, count=len(textos) + 1, offset=textos.offset * 8)
+    datos = _BYTE_NORMALIZADO[np.frombuffer(buffer_datos, dtype=np.uint8, count=offsets[-1] - offsets[0],
+                                            offset=offsets[0])]
+    offsets = offsets - offsets[0]
+
+    # Se borran los bytes no ASCII ("a😡b" -> "AB") y después los espacios
+    # repetidos; el espacio inicial de cada texto siempre se conserva
+    datos, offsets = _filtrar_bytes(datos, offsets, datos != 0)
+    espacio = datos == ord(" ")
+    conservar = np.ones(len(datos), dtype=bool)
+    conservar[1:] = ~(espacio[1:] & espacio[:-1])
+    conservar[offsets[:-1]] = True
+    datos, offsets = _filtrar_bytes(datos, offsets, conservar)
+
+    resultado = pa.LargeStringArray.from_buffers(len(offsets) - 1, pa.py_buffer(offsets), pa.py_buffer(datos))
+    return pd.Series(resultado, index=serie.index, name=serie.name, dtype="str")
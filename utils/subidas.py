@@ -0,0 +1,116 @@
+# utils/subidas.py
+"""
+Subidas de Streamlit volcadas a disco.
+
+Un ZIP de ENAPRES nacional pesa varios GB: en vez de abrirlo sobre el buffer
+en memoria de la subida (y de copiar sus bytes con `read()`), se escribe una
+sola vez en un archivo temporal y desde ahí se leen sus miembros en flujo.
+El archivo se identifica por su contenido (tamaño y hash), así los reruns de
+la misma sesión y otras sesiones que suban el mismo archivo lo reutilizan. El
+hash se calcula una vez por subida.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from utils.cache_resultados import huella_subida
+
+DIR_SUBIDAS = Path(os.environ.get("TESIS_SUBIDAS_DIR", Path(tempfile.gettempdir()) / "tesis_subidas"))
+# Los archivos sin uso por más de este tiempo se eliminan
+ANTIGUEDAD_MAXIMA_S = 6 * 3600
+TAMANO_BLOQUE = 16 * 1024 ** 2
+# Subidas recientes cuyo hash de contenido se recuerda (huella_subida -> hash)
+MAX_HUELLAS = 64
+
+_huellas_contenido = OrderedDict()
+_lock_huellas = threading.Lock()
+
+
+def _escribir(archivo, destino):
+    archivo.seek(0)
+    if hasattr(archivo, "getbuffer"):
+        # BytesIO (UploadedFile): se escribe su buffer sin copiarlo
+        destino.write(archivo.getbuffer())
+    else:
+        shutil.copyfileobj(archivo, destino, TAMANO_BLOQUE)
+    archivo.seek(0)
+
+
+def huella_contenido(archivo):
+    """
+    Tamaño y hash del contenido de la subida (igual para el mismo archivo en cualquier sesión).
+
+    El contenido se recorre por bloques una vez por subida; los reruns
+    reutilizan el hash guardado bajo `huella_subida`.
+    """
+    huella = huella_subida(archivo)
+    with _lock_huellas:
+        if huella in _huellas_contenido:
+            _huellas_contenido.move_to_end(huella)
+            return _huellas_contenido[huella]
+
+    h = hashlib.blake2b(digest_size=16)
+    archivo.seek(0)
+    if hasattr(archivo, "getbuffer"):
+        buffer = archivo.getbuffer()
+        for inicio in range(0, len(buffer), TAMANO_BLOQUE):
+            h.update(buffer[inicio:inicio + TAMANO_BLOQUE])
+        tamano = len(buffer)
+        del buffer
+    else:
+        tamano = 0
+        while bloque := archivo.read(TAMANO_BLOQUE):
+            h.update(bloque)
+            tamano += len(bloque)
+    archivo.seek(0)
+    contenido = f"{tamano}-{h.hexdigest()}"
+
+    with _lock_huellas:
+        _huellas_contenido[huella] = contenido
+        while len(_huellas_contenido) > MAX_HUELLAS:
+            _huellas_contenido.popitem(last=False)
+    return contenido
+
+
+def archivo_en_disco(archivo):
+    """
+    Ruta de un archivo en disco con el contenido de la subida `archivo`.
+
+    Se escribe una vez por contenido (escritura atómica) y se reutiliza
+    mientras exista; cada llamada renueva su fecha de uso.
+    """
+    DIR_SUBIDAS.mkdir(parents=True, exist_ok=True)
+    ruta = DIR_SUBIDAS / (huella_contenido(archivo) + Path(archivo.name).suffix.lower())
+
+    if ruta.exists():
+        os.utime(ruta, None)
+        return ruta
+
+    fd, tmp = tempfile.mkstemp(dir=DIR_SUBIDAS, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as destino:
+            _escribir(archivo, destino)
+        os.replace(tmp, ruta)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    podar_subidas()
+    return ruta
+
+
+def podar_subidas(antiguedad_maxima_s=ANTIGUEDAD_MAXIMA_S):
+    """Elimina los archivos volcados que no se usan hace más de `antiguedad_maxima_s` segundos."""
+    limite = time.time() - antiguedad_maxima_s
+    for ruta in DIR_SUBIDAS.glob("*"):
+        try:
+            if ruta.stat().st_mtime < limite:
+                ruta.unlink()
+        except OSError:
+            # Otra sesión lo eliminó o lo está usando
+            pass
@@ -0,0 +1,74 @@
+# utils/tabla_paginada.py
+"""
+Paginación del lado del servidor para tablas grandes.
+
+El navegador recibe solo la página visible. El filtro y el orden se
+resuelven aquí como un vector de posiciones sobre el DataFrame original
+(que no se copia); ese vector se guarda en caché, así pasar de página no
+vuelve a filtrar ni a ordenar.
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+FILAS_POR_PAGINA = 50
+
+
+def filtrar_posiciones(df, texto):
+    """Posiciones de las filas donde alguna columna de texto contiene `texto` (sin distinguir mayúsculas)."""
+    if not texto:
+        return np.arange(len(df))
+
+    mascara = np.zeros(len(df), dtype=bool)
+    for c in df.columns:
+        serie = df[c]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            # Se evalúa una vez por categoría y se expande con los códigos
+            en_categoria = serie.cat.categories.astype(str).str.contains(texto, case=False, regex=False)
+            codigos = serie.cat.codes.to_numpy()
+            mascara |= np.append(np.asarray(en_categoria, dtype=bool), False)[codigos]
+        elif serie.dtype == object or pd.api.types.is_string_dtype(serie.dtype):
+            mascara |= serie.astype(str).str.contains(texto, case=False, regex=False).to_numpy(dtype=bool)
+    return np.flatnonzero(mascara)
+
+
+def ordenar_posiciones(df, posiciones, columna=None, ascendente=True):
+    """Reordena `posiciones` según `columna` (orden estable, faltantes al final)."""
+    if columna is None:
+        return posiciones
+    valores = pd.Series(df[columna].to_numpy()[posiciones])
+    orden = valores.sort_values(ascending=ascendente, kind="stable", na_position="last").index.to_numpy()
+    return posiciones[orden]
+
+
+class VistaPaginada:
+    """
+    Vista filtrada y ordenada de un DataFrame, servida por páginas.
+
+    Las posiciones de cada combinación (filtro, columna, sentido) se guardan
+    en una caché pequeña (las últimas `max_vistas`).
+    """
+
+    def __init__(self, df, max_vistas=8):
+        self.df = df
+        self.max_vistas = max_vistas
+        self._vistas = OrderedDict()
+
+    def posiciones(self, filtro="", columna=None, ascendente=True):
+        clave = (filtro, columna, ascendente)
+        if clave in self._vistas:
+            self._vistas.move_to_end(clave)
+            return self._vistas[clave]
+
+        posiciones = ordenar_posiciones(self.df, filtrar_posiciones(self.df, filtro), columna, ascendente)
+        self._vistas[clave] = posiciones
+        if len(self._vistas) > self.max_vistas:
+            self._vistas.popitem(last=False)
+        return posiciones
+
+    def pagina(self, numero, filas_por_pagina=FILAS_POR_PAGINA, filtro="", columna=None, ascendente=True):
+        """Devuelve (filas de la página `numero`, desde 1; total de filas que pasan el filtro)."""
+        posiciones = self.posiciones(filtro, columna, ascendente)
+        inicio = (max(numero, 1) - 1) * filas_por_pagina
+        return self.df.iloc[posiciones[inicio:inicio + filas_por_pagina]], len(posiciones)
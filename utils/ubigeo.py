@@ -0,0 +1,119 @@
+# utils/ubigeo.py
+"""
+Índice canónico de distritos por UBIGEO.
+
+La clave de unión con la geometría es el UBIGEO como entero (150101): cada
+tabla se traduce a códigos y la fila de la geometría se obtiene con una
+búsqueda en un índice entero. Los nombres quedan solo como respaldo para
+las fuentes que traen únicamente NOMBREDI (YouTube, Twitter); todas sus
+variantes conocidas (nombre del GeoJSON, alias, forma normalizada) se
+resuelven a UBIGEO una sola vez por proceso.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+from utils.geometrias import ALIAS_DISTRITOS, cargar_geometria_lima
+from utils.normalizacion import normalizar_nombre
+
+COLUMNAS_CODIGO = ("CCDD", "CCPP", "CCDI")
+COLUMNAS_NOMBRE = ("NOMBREDI", "NOMBDIST")
+
+
+def ubigeo_entero(serie):
+    """UBIGEO (o código parcial) como entero nullable: "150101", 150101 o "040101" -> 150101 / 40101."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype(object)
+    return pd.to_numeric(serie, errors="coerce").astype("Int64")
+
+
+# =========================
+# Índice de Lima Metropolitana
+# =========================
+@dataclass(frozen=True)
+class IndiceUbigeo:
+    """
+    UBIGEO entero -> fila de la geometría, y variante de nombre -> UBIGEO.
+
+    - geometria: GeoDataFrame compartido (no modificar)
+    - codigos: UBIGEO entero de cada fila de `geometria`
+    - nombres: variante normalizada del nombre -> UBIGEO entero (sin ambiguos)
+    """
+    geometria: gpd.GeoDataFrame
+    codigos: pd.Index
+    nombres: dict
+
+    def posiciones(self, ubigeos):
+        """Fila de la geometría de cada UBIGEO (-1 si no existe)."""
+        ubigeos = ubigeo_entero(pd.Series(ubigeos)).fillna(-1).to_numpy(dtype="int64")
+        return self.codigos.get_indexer(ubigeos)
+
+    def ubigeo_desde_nombres(self, nombres):
+        """UBIGEO de cada nombre, evaluando el diccionario una vez por valor distinto."""
+        codigos, unicos = pd.factorize(nombres)
+        tabla = np.array([self.nombres.get(normalizar_nombre(u), -1) for u in unicos] + [-1],
+                         dtype="int64")
+        # El código -1 (NaN) apunta al último elemento, que es -1
+        resultado = tabla.take(codigos)
+        return pd.Series(pd.arrays.IntegerArray(resultado, resultado < 0),
+                         index=nombres.index, name="UBIGEO")
+
+
+def _sin_ambiguos(pares):
+    """Diccionario variante -> UBIGEO descartando las variantes que apuntan a más de un código."""
+    nombres = {}
+    for variante, codigo in pares:
+        nombres[variante] = codigo if nombres.get(variante, codigo) == codigo else None
+    return {v: c for v, c in nombres.items() if c is not None}
+
+
+@lru_cache(maxsize=None)
+def indice_ubigeo(ambito="lima"):
+    """
+    Índice de Lima Metropolitana, construido una vez por proceso.
+
+    Las variantes son el nombre del distrito (del GeoJSON y con los alias de
+    INEI / redes sociales). Solo hay geometría local de Lima: otro `ambito`
+    es un error.
+    """
+    if ambito != "lima":
+        raise ValueError("Solo hay geometría local para el ámbito 'lima'.")
+    gdf = cargar_geometria_lima()
+
+    codigos = ubigeo_entero(gdf["UBIGEO"])
+    if codigos.isna().any() or codigos.duplicated().any():
+        raise ValueError("La geometría tiene UBIGEO faltantes o repetidos.")
+    codigos = pd.Index(codigos.to_numpy(dtype="int64"))
+
+    alias = {normalizar_nombre(k): normalizar_nombre(v) for k, v in ALIAS_DISTRITOS.items()}
+    pares = []
+    for nombre, codigo in zip(gdf["NOMBDIST"], codigos):
+        variante = normalizar_nombre(nombre)
+        pares += [(variante, codigo), (alias.get(variante, variante), codigo)]
+    return IndiceUbigeo(geometria=gdf, codigos=codigos, nombres=_sin_ambiguos(pares))
+
+
+# =========================
+# Códigos de una tabla cualquiera
+# =========================
+def ubigeo_de_tabla(df, ambito="lima"):
+    """
+    UBIGEO entero de cada fila de `df`.
+
+    Se usa, en este orden, la columna UBIGEO, los códigos CCDD/CCPP/CCDI o,
+    como respaldo, el nombre del distrito resuelto con `indice_ubigeo`.
+    """
+    if "UBIGEO" in df.columns:
+        return ubigeo_entero(df["UBIGEO"]).rename("UBIGEO")
+    if all(c in df.columns for c in COLUMNAS_CODIGO):
+        dd, pp, di = (ubigeo_entero(df[c]) for c in COLUMNAS_CODIGO)
+        return (dd * 10_000 + pp * 100 + di).rename("UBIGEO")
+
+    indice = indice_ubigeo(ambito)
+    name_col = next((c for c in COLUMNAS_NOMBRE if c in df.columns), None)
+    if name_col is None:
+        raise ValueError("El CSV debe contener 'UBIGEO', 'CCDD'/'CCPP'/'CCDI', 'NOMBREDI' o 'NOMBDIST'.")
+    return indice.ubigeo_desde_nombres(df[name_col])
@@ -1,8 +1,8 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import json
 from utils.geo_processing import cargar_y_preparar_datos
+from utils.mapas import crear_mapa
 from st_aggrid import AgGrid
 
 
@@ -217,38 +217,7 @@ def page_2():
     # ================================
     # 4. FUNCIONES DE MAPAS Y GRAFICOS
     # ================================
-    def crear_mapa(gdf, metric, data_source):
-        geojson = json.loads(gdf.to_json())
-        
-        # Colores específicos según la fuente de datos
-        if data_source == "youtube":
-            color_scale = "reds"  # Color rojo para YouTube
-        elif data_source == "twitter":
-            color_scale = "blues"  # Color azul para Twitter
-        else:  # INEI
-            color_scale = "Viridis"  # Color por defecto para INEI
-        
-        fig = px.choropleth_mapbox(
-            gdf,
-            geojson=geojson,
-            locations=gdf.index,
-            color=metric,
-            color_continuous_scale=color_scale,  # Asignar color específico
-            mapbox_style="carto-positron",
-            center={"lat": -12.0464, "lon": -77.0428},
-            zoom=10,
-            opacity=0.70,
-        )
-        fig.update_layout(
-            height=650,
-            margin={"r": 0, "t": 5, "l": 0, "b": 0},
-            coloraxis_colorbar=dict(
-                title=metric,
-                thickness=14,
-                len=0.55
-            )
-        )
-        return fig
+    # crear_mapa vive en utils/mapas.py (GeoJSON serializado una vez por proceso)
 
     # ================================
     # 5. LÓGICA GENERAL DE ANÁLISIS